@@ -1,9 +1,10 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 import sqlite3
 from datetime import datetime
 import random
 import os
 import base64
+import json
 from utils.database import Database
 from services.lottery import LotteryMachine
 from services.register import registration_manager
@@ -11,30 +12,97 @@ from services.face_service import FaceRecognitionService
 from services.pdf_service import PDFService
 from services.credit_limit_service import CreditLimitService
 from services.abu_dhabi_service import AbuDhabiService
+from services.recommendation_cache import RecommendationCache
+from utils import metrics
+from utils.profiling import RequestProfiler
+from utils.sql_trace import SQLTracer
 
 # 告诉 Flask 你的 static 文件夹在 'templates/static'
 app = Flask(__name__, static_folder='templates/static', static_url_path='/static')
 app.secret_key = 'anappleadaythedoctorkeepsalway'  # 用于session加密
 
-# 数据库路径
-DB_PATH = 'instance/fintech.db'
+# 请求计时与 /metrics 接口（Prometheus 文本格式），同时统计每个请求的数据库语句耗时
+metrics.init_app(app)
+
+# 按需剖析（默认关闭），结果写入 instance/profiles:
+#   PROFILE_TOKEN: 请求头 X-Profile 携带此令牌的请求会被剖析
+#   PROFILE_SAMPLE_RATE / PROFILE_ROUTES: 按比例随机剖析指定路由（逗号分隔的路由模板）
+#   PROFILE_MODE: sample（栈采样，输出火焰图折叠栈）或 cprofile
+#   PROFILE_MIN_DURATION: 只保存耗时超过此秒数的请求
+request_profiler = RequestProfiler(
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', '0')),
+    routes=[r for r in os.environ.get('PROFILE_ROUTES', '').split(',') if r] or None,
+    token=os.environ.get('PROFILE_TOKEN') or None,
+    mode=os.environ.get('PROFILE_MODE', 'sample'),
+    min_duration=float(os.environ.get('PROFILE_MIN_DURATION', '0'))
+).init_app(app)
+
+# SQL 追踪与慢查询日志（SQL_TRACE=0 关闭），慢查询追加写入 instance/slow_queries.log:
+#   SQL_SLOW_MS: 慢查询阈值（毫秒，execute + fetch）
+#   SQL_EXPLAIN: slow（只对慢查询）/ all / off，执行 EXPLAIN QUERY PLAN 并标出全表扫描
+#   SQL_TRACE_TOKEN: 设置后可在 /debug/sql 查看语句汇总（请求头 X-Debug-Token 携带此令牌）
+if os.environ.get('SQL_TRACE', '1') != '0':
+    sql_explain = os.environ.get('SQL_EXPLAIN', 'slow')
+    sql_tracer = SQLTracer(
+        slow_threshold=float(os.environ.get('SQL_SLOW_MS', '100')) / 1000,
+        log_path='instance/slow_queries.log',
+        explain=None if sql_explain == 'off' else sql_explain
+    ).init_app(app, token=os.environ.get('SQL_TRACE_TOKEN') or None)
+
+# 数据库路径（基准测试时可用环境变量 FINTECH_DB_PATH 指向合成数据库，见 utils/synthetic_data.py）
+DB_PATH = os.environ.get('FINTECH_DB_PATH', 'instance/fintech.db')
 
 # 初始化数据库操作类和抽奖机
 db = Database(DB_PATH)
 lottery_machine = LotteryMachine(DB_PATH)
 face_service = FaceRecognitionService()
 pdf_service = PDFService()
-credit_limit_service = CreditLimitService()
+credit_limit_service = CreditLimitService()  # 模型在第一次预测时加载
 # 阿布扎比推荐服务
 # 参数说明:
 #   use_proxy=True: 启用代理（需要Clash等代理工具运行）
 #   use_proxy=False: 不使用代理（直连）
 #   proxy_url: 代理地址（默认Clash端口7890）
+# 压测时可用环境变量指向本地桩服务器（见 tests/stub_servers.py）:
+#   OLLAMA_URL / DUCKDUCKGO_URL / ABU_DHABI_USE_PROXY=0
 abu_dhabi_service = AbuDhabiService(
     model_name="llama3.2:3b",
-    use_proxy=True,  # 改为False可禁用代理
-    proxy_url="http://127.0.0.1:7890"  # Clash默认端口
+    use_proxy=os.environ.get('ABU_DHABI_USE_PROXY', '1') != '0',  # 改为False可禁用代理
+    proxy_url="http://127.0.0.1:7890",  # Clash默认端口
+    ollama_url=os.environ.get('OLLAMA_URL', 'http://127.0.0.1:11434'),
+    search_url=os.environ.get('DUCKDUCKGO_URL', 'https://duckduckgo.com/html/'),
+    fan_out=3,  # 并行搜索 当前主题 + 1个其他主题 + 通用查询
+    search_deadline=4.0,  # 搜索总时限（秒），慢的搜索结果直接丢弃
+    max_concurrent_generations=2,  # 本地 Ollama 同时生成数上限
+    queue_timeout=5.0  # 排队超过5秒返回默认推荐
 )
+# 推荐缓存：每个主题30分钟内直接返回，过期后6小时内先返回旧数据再后台刷新
+recommendation_cache = RecommendationCache(
+    abu_dhabi_service,
+    ttl=1800,
+    stale_ttl=6 * 3600
+)
+
+
+def start_background_tasks():
+    """
+    启动访问外部网络的后台线程（Ollama 健康检查、推荐缓存预生成）
+
+    导入 app 时不启动，测试和基准导入 app 不会访问 DuckDuckGo / Ollama；
+    直接运行 app.py 时自动启动，其他部署方式（如 gunicorn）设置环境变量 FINTECH_BACKGROUND_TASKS=1
+    """
+    abu_dhabi_service.start_health_check()
+    recommendation_cache.start()  # 后台预生成所有主题
+
+
+def stop_background_tasks(timeout=None):
+    """停止 start_background_tasks 启动的后台线程"""
+    recommendation_cache.stop(timeout)
+    abu_dhabi_service.stop_health_check(timeout)
+
+
+if os.environ.get('FINTECH_BACKGROUND_TASKS') == '1':
+    start_background_tasks()
 
 # 创建上传文件夹
 UPLOAD_FOLDER = 'uploads/faces'
@@ -91,6 +159,8 @@ def home():
             SELECT available_limit
             FROM credit
             WHERE user_id = ?
+            ORDER BY updated_at DESC, id DESC
+            LIMIT 1
         ''', (current_user_id,))
         credit_row = cursor.fetchone()
         available_limit = credit_row['available_limit'] if credit_row else 0
@@ -139,6 +209,8 @@ def home():
         SELECT total_limit
         FROM credit
         WHERE user_id = ?
+        ORDER BY updated_at DESC, id DESC
+        LIMIT 1
     ''', (current_user_id,))
     limit_row = cursor.fetchone()
     total_limit = limit_row['total_limit'] if limit_row else 0 # 
@@ -611,9 +683,14 @@ def complete_registration():
         # 获取预测的信用额度
         session_id = session.get('temp_registration_id')
         credit_limit = 100000  # 默认额度
+        total_income = None
+        balance = None
 
         if session_id and session_id in registration_temp_data:
-            credit_limit = registration_temp_data[session_id].get('predicted_credit_limit', 100000)
+            temp_data = registration_temp_data[session_id]
+            credit_limit = temp_data.get('predicted_credit_limit', 100000)
+            total_income = temp_data.get('total_income')
+            balance = temp_data.get('balance')
             print(f"使用预测额度: {credit_limit}")
         else:
             print("使用默认额度: 100000")
@@ -623,7 +700,9 @@ def complete_registration():
             data['card_suffix'],
             data['expected_return_day'],
             data.get('username'),  # 传递用户名
-            credit_limit  # 传递预测的额度
+            credit_limit,  # 传递预测的额度
+            total_income=total_income,  # 收入画像（用于额度重评分）
+            balance=balance
         )
 
         if result['success']:
@@ -1110,10 +1189,10 @@ def logout():
 @app.route('/api/abu_dhabi_recommendations', methods=['GET'])
 def get_abu_dhabi_recommendations():
     """
-    获取阿布扎比推荐信息
+    获取阿布扎比推荐信息（从推荐缓存返回，不等待搜索和模型生成）
     """
     try:
-        recommendations = abu_dhabi_service.generate_recommendations()
+        recommendations = recommendation_cache.get()
         return jsonify({
             'success': True,
             'recommendations': recommendations,
@@ -1132,6 +1211,82 @@ def get_abu_dhabi_recommendations():
 
 
 
+
+@app.route('/api/abu_dhabi_recommendations/stats', methods=['GET'])
+def get_abu_dhabi_recommendation_stats():
+    """
+    推荐服务运行统计（Ollama 排队深度 / 等待时间、请求合并、各级缓存命中）
+    """
+    return jsonify({
+        'success': True,
+        'ollama': abu_dhabi_service.ollama_stats(),
+        'recommendation_cache': recommendation_cache.stats(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+def _sse_event(event, data):
+    """格式化一条 Server-Sent Events 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/abu_dhabi_recommendations/stream', methods=['GET'])
+def stream_abu_dhabi_recommendations():
+    """
+    流式获取阿布扎比推荐信息（Server-Sent Events）
+
+    事件:
+        recommendation: 一条推荐（模型每生成完一个 JSON 对象就推送一条）
+        done: 推送结束，附带主题和来源（cache / stale / model / default）
+
+    有缓存时（包括已过期、正在后台刷新的旧数据）直接推送缓存内容，只有从未生成过的主题才当场调用搜索和模型
+    """
+    topic = request.args.get('topic')
+    if topic not in AbuDhabiService.TOPICS:
+        topic = random.choice(AbuDhabiService.TOPICS)
+
+    def generate():
+        # 有可用缓存时直接推送（过期的旧数据由推荐缓存在后台刷新），页面加载不等待 Ollama
+        cached, state = recommendation_cache.get_cached(topic)
+        if cached:
+            for item in cached:
+                yield _sse_event('recommendation', item)
+            yield _sse_event('done', {'topic': topic, 'source': 'cache' if state == 'fresh' else 'stale'})
+            return
+
+        recommendations = []
+        failed = False
+        try:
+            for item in abu_dhabi_service.stream_topic_recommendations(topic):
+                recommendations.append(item)
+                yield _sse_event('recommendation', item)
+        except Exception as e:
+            failed = True
+            print(f"❌ 流式生成推荐失败: {str(e)}")
+
+        if recommendations:
+            if not failed:
+                recommendation_cache.put(topic, recommendations)  # 只缓存完整生成的结果
+            yield _sse_event('done', {'topic': topic, 'source': 'model'})
+            return
+
+        # 搜索或模型失败且尚未推送任何内容：推送默认推荐
+        for item in abu_dhabi_service._get_default_recommendations():
+            yield _sse_event('recommendation', item)
+        yield _sse_event('done', {'topic': topic, 'source': 'default'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # 禁用反向代理缓冲，保证逐条送达
+        }
+    )
+
 # 确保当你直接运行这个脚本时，服务器会启动
 if __name__ == '__main__':
+    # debug 模式的重载器父进程只负责监视文件，后台任务在实际处理请求的子进程中启动
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true' and os.environ.get('FINTECH_BACKGROUND_TASKS') != '1':
+        start_background_tasks()
     app.run(debug=True)
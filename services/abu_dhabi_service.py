@@ -4,16 +4,51 @@
 使用DuckDuckGo HTML搜索接口
 """
 
-import requests
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 import random
 import json
-from bs4 import BeautifulSoup
+import threading
+import time
 import re
+import urllib.parse
+
+from utils.completion_cache import CompletionCache
+from utils.concurrency import ConcurrencyLimiter, SingleFlight
+from utils.html_extract import extract_elements
+from utils.http import get_session
+from utils.json_stream import JSONObjectStreamParser
+from utils.metrics import bind_request_stats, record_external, track_external
+from utils.search_cache import SearchResultCache
+from services.ollama_health import OllamaHealthMonitor
+
+
+class OllamaBusyError(RuntimeError):
+    """Ollama 并发已满且排队超时"""
+
+
+class OllamaUnavailableError(OllamaBusyError):
+    """Ollama 已被健康检查 / 熔断器判定为不可用"""
 
 
 class AbuDhabiService:
-    def __init__(self, model_name="llama3.2:3b", use_proxy=True, proxy_url="http://127.0.0.1:7890", ollama_url="http://127.0.0.1:11434"):
+    # 推荐主题
+    TOPICS = [
+        "阿布扎比必去景点",
+        "阿布扎比美食推荐",
+        "阿布扎比购物中心",
+        "阿布扎比文化体验",
+        "阿布扎比海滩度假"
+    ]
+
+    # 并行搜索线程池（所有实例共享，首次使用时创建）
+    _search_executor = None
+    _search_executor_lock = threading.Lock()
+
+    def __init__(self, model_name="llama3.2:3b", use_proxy=True, proxy_url="http://127.0.0.1:7890", ollama_url="http://127.0.0.1:11434",
+                 fan_out=3, search_deadline=4.0, search_cache_path='instance/search_cache.db', search_cache_ttl=24 * 3600,
+                 completion_cache_dir='instance/completion_cache', max_concurrent_generations=2, queue_timeout=5.0,
+                 search_url="https://duckduckgo.com/html/", health_check_interval=30.0):
         """
         初始化阿布扎比推荐服务
 
@@ -22,10 +57,28 @@ class AbuDhabiService:
             use_proxy: 是否使用代理（默认True）
             proxy_url: 代理地址（默认Clash代理端口7890）
             ollama_url: Ollama服务地址
+            fan_out: 每次推荐并行搜索的查询数（主题 + 其他主题 + 通用查询；1 表示只串行搜索当前主题）
+            search_deadline: 并行搜索的总时限（秒），超时未返回的搜索结果被丢弃
+            search_cache_path: 搜索结果缓存数据库路径（None 表示不缓存）
+            search_cache_ttl: 搜索结果缓存有效期（秒）
+            completion_cache_dir: Ollama 输出缓存目录（None 表示不缓存）
+            max_concurrent_generations: 同时进行的 Ollama 生成数上限
+            queue_timeout: 等待生成名额的最长时间（秒），超时返回默认推荐
+            search_url: DuckDuckGo HTML搜索地址（压测时指向本地桩服务器）
+            health_check_interval: 后台探测 Ollama 的间隔（秒；探测线程由 start_health_check 启动，构造时不访问网络）
         """
         self.model_name = model_name
         self.use_proxy = use_proxy
         self.ollama_url = ollama_url
+        self.search_url = search_url
+        self.fan_out = fan_out
+        self.search_deadline = search_deadline
+        self.search_cache = SearchResultCache(search_cache_path, ttl=search_cache_ttl) if search_cache_path else None
+        self.completion_cache = CompletionCache(completion_cache_dir) if completion_cache_dir else None
+
+        # Ollama 并发控制：相同提示词合并为一次生成，不同提示词最多同时生成 max_concurrent_generations 个
+        self._ollama_flight = SingleFlight()
+        self.ollama_limiter = ConcurrencyLimiter(max_concurrent_generations, queue_timeout)
 
         # 配置代理
         if use_proxy:
@@ -38,18 +91,26 @@ class AbuDhabiService:
             self.proxies = None
             print("🌐 未使用代理")
 
-        # 测试 Ollama 连接
-        try:
-            test_url = f"{ollama_url}/api/tags"
-            response = requests.get(test_url, timeout=5)
-            if response.status_code == 200:
-                print(f"✅ Ollama服务连接成功，模型: {model_name}")
-            else:
-                print(f"⚠️ Ollama服务响应异常: {response.status_code}")
-        except Exception as e:
-            print(f"⚠️ Ollama服务连接失败: {e}")
-            print("💡 提示: 请确保Ollama已安装并运行 (ollama serve)")
-    
+        # 连接池：搜索流量走代理，Ollama 走本地直连，两者各用一个共享会话复用 keep-alive 连接
+        self.search_session = get_session('search', proxies=self.proxies)
+        # 并行搜索有总时限，不重试：重试和退避会让超时的线程在时限过后继续占用搜索线程池
+        self.fanout_search_session = get_session('search-fanout', proxies=self.proxies, retries=0)
+        self.ollama_session = get_session('ollama', retries=1)
+
+        # Ollama 健康检查在后台线程中进行，不阻塞服务启动；判定不可用期间跳过模型调用
+        self.ollama_health = OllamaHealthMonitor(
+            self.ollama_session, ollama_url, model_name,
+            interval=health_check_interval or 30.0
+        )
+
+    def start_health_check(self):
+        """启动 Ollama 后台健康检查（立即进行第一次探测，不阻塞调用方）"""
+        self.ollama_health.start()
+
+    def stop_health_check(self, timeout=None):
+        """停止 Ollama 后台健康检查"""
+        self.ollama_health.stop(timeout)
+
     def translate_to_english(self, chinese_query):
         """
         将中文查询翻译成英文（使用预定义映射）
@@ -72,11 +133,16 @@ class AbuDhabiService:
         # 如果没有匹配，返回 "Abu Dhabi" + 原查询
         return f"Abu Dhabi {chinese_query}"
 
-    def search_duckduckgo(self, query, num_results=3, timeout=10):
+    def search_duckduckgo(self, query, num_results=3, timeout=10, fallback=True, retry=True):
         """
         使用DuckDuckGo HTML搜索接口进行搜索（支持代理）
         自动将中文查询翻译成英文以提高搜索成功率
+
+        参数:
+            fallback: 无结果时是否再用通用查询 "Abu Dhabi" 重试一次（并行搜索时已包含通用查询，无需重试）
+            retry: 连接失败 / 超时 / 5xx 时是否由会话自动重试（并行搜索时为 False）
         """
+        cache_key = None
         try:
             # 检测是否为中文查询，如果是则翻译成英文
             original_query = query
@@ -84,68 +150,19 @@ class AbuDhabiService:
                 query = self.translate_to_english(query)
                 print(f"🌐 翻译查询: {original_query} -> {query}")
 
-            # 使用DuckDuckGo HTML搜索接口
-            url = "https://duckduckgo.com/html/"
-            params = {
-                "q": query
-            }
-
-            # 设置请求头，模拟浏览器
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-
-            print(f"🔍 正在搜索: {query}")
-
-            # 使用代理（如果已配置）
-            response = requests.get(
-                url,
-                params=params,
-                headers=headers,
-                proxies=self.proxies,  # 使用代理
-                timeout=timeout
-            )
-            response.raise_for_status()
-
-            # 解析HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            results = []
-
-            # 查找搜索结果
-            # DuckDuckGo HTML版本的搜索结果在 class="result" 的div中
-            result_divs = soup.find_all('div', class_='result')
-
-            for result_div in result_divs[:num_results]:
-                try:
-                    # 提取标题和链接
-                    title_tag = result_div.find('a', class_='result__a')
-                    if title_tag:
-                        title = title_tag.get_text(strip=True)
-                        # 提取真实URL（DuckDuckGo会重定向）
-                        url_link = title_tag.get('href', '')
-
-                        # 清理URL（移除DuckDuckGo的重定向）
-                        if url_link.startswith('//duckduckgo.com/l/?'):
-                            # 从重定向URL中提取真实URL
-                            match = re.search(r'uddg=([^&]+)', url_link)
-                            if match:
-                                import urllib.parse
-                                url_link = urllib.parse.unquote(match.group(1))
-
-                        if title and url_link:
-                            results.append({
-                                'title': title[:100],
-                                'url': url_link
-                            })
-                except Exception as e:
-                    print(f"⚠️ 解析单个结果失败: {e}")
-                    continue
-
-                if len(results) >= num_results:
-                    break
+            # 相同查询优先读缓存（含失败 / 无结果的负缓存），不请求网络也不解析HTML
+            cache_key = f"duckduckgo:{num_results}:{query}"
+            cached = self.search_cache.get(cache_key) if self.search_cache else None
+            if cached is not None:
+                print(f"💾 搜索缓存命中: {query} - {len(cached)} 条结果")
+                results = cached
+            else:
+                results = self._fetch_duckduckgo(query, num_results, timeout, retry)
+                if self.search_cache:
+                    self.search_cache.set(cache_key, results)
 
             # 如果还是没有结果，尝试使用通用的 "Abu Dhabi" 查询
-            if not results and original_query != "Abu Dhabi":
+            if not results and fallback and original_query != "Abu Dhabi":
                 print(f"⚠️ 未找到结果，尝试使用通用查询: Abu Dhabi")
                 return self.search_duckduckgo("Abu Dhabi", num_results, timeout)
 
@@ -160,40 +177,314 @@ class AbuDhabiService:
             print(f"❌ 搜索失败: {query} - {str(e)}")
             import traceback
             traceback.print_exc()
+            # 失败也做负缓存，短时间内不再重复请求
+            if self.search_cache and cache_key:
+                try:
+                    self.search_cache.set(cache_key, [])
+                except Exception:
+                    pass
             return []
-    
-    def generate_recommendations(self):
+
+    def _fetch_duckduckgo(self, query, num_results, timeout, retry=True):
+        """请求DuckDuckGo HTML搜索页并解析结果（请求失败时抛出异常）"""
+        # 使用DuckDuckGo HTML搜索接口
+        url = self.search_url
+        params = {
+            "q": query
+        }
+
+        # 设置请求头，模拟浏览器
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+
+        print(f"🔍 正在搜索: {query}")
+
+        # 使用共享会话（已配置代理）
+        session = self.search_session if retry else self.fanout_search_session
+        with track_external('search'):
+            response = session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=timeout
+            )
+        response.raise_for_status()
+
+        # 只提取前 num_results 个结果链接（DuckDuckGo HTML版本的结果标题为 class="result__a" 的链接）
+        results = []
+        for link in extract_elements(response.text, 'a', class_name='result__a', limit=num_results):
+            title = link['text']
+            url_link = link['href']
+
+            # 清理URL（移除DuckDuckGo的重定向）
+            if url_link.startswith('//duckduckgo.com/l/?'):
+                # 从重定向URL中提取真实URL
+                match = re.search(r'uddg=([^&]+)', url_link)
+                if match:
+                    url_link = urllib.parse.unquote(match.group(1))
+
+            if title and url_link:
+                results.append({
+                    'title': title[:100],
+                    'url': url_link
+                })
+
+        return results
+
+    def search_many(self, queries, num_results=3, deadline=None):
+        """
+        并行搜索多个查询，在总时限内返回已完成的结果
+
+        参数:
+            queries: 查询列表（按优先级排序，合并结果时保持该顺序）
+            num_results: 每个查询的结果数
+            deadline: 总时限（秒），默认使用 self.search_deadline
+
+        返回:
+            list: 按查询顺序合并、按URL去重后的搜索结果
+        """
+        deadline = self.search_deadline if deadline is None else deadline
+        start = time.monotonic()
+
+        end = start + deadline
+
+        def search(query):
+            # 单个请求的超时取总时限的剩余时间（排队等线程的时间也算在内），且不重试，
+            # 被丢弃的搜索最晚在时限前后结束，不会长时间占用共享线程池
+            remaining = min(deadline, end - time.monotonic())
+            if remaining <= 0:
+                return []
+            return self.search_duckduckgo(query, num_results, remaining, False, retry=False)
+
+        executor = self._get_search_executor()
+        # 线程池中的搜索耗时计入发起搜索的请求（/metrics 中的 request_external_seconds）
+        search = bind_request_stats(search)
+        futures = [executor.submit(search, query) for query in queries]
+        done, not_done = wait(futures, timeout=deadline)
+
+        merged, seen = [], set()
+        for query, future in zip(queries, futures):
+            if future not in done or future.exception() is not None:
+                continue
+            for result in future.result():
+                if result['url'] not in seen:
+                    seen.add(result['url'])
+                    merged.append(result)
+
+        elapsed = time.monotonic() - start
+        print(f"⏱️ 并行搜索 {len(queries)} 个查询，{len(done)} 个在时限内完成，"
+              f"丢弃 {len(not_done)} 个，耗时 {elapsed:.2f}s，合并 {len(merged)} 条结果")
+        return merged
+
+    def _search_for_topic(self, topic, num_results=5):
+        """搜索一个推荐主题：fan_out > 1 时并行搜索主题、其他主题和通用查询"""
+        if self.fan_out <= 1:
+            return self.search_duckduckgo(topic, num_results=num_results)
+
+        others = [t for t in self.TOPICS if t != topic]
+        queries = [topic] + random.sample(others, min(self.fan_out - 2, len(others))) + ["Abu Dhabi"]
+        return self.search_many(queries, num_results=3)[:num_results]
+
+    @classmethod
+    def _get_search_executor(cls):
+        with cls._search_executor_lock:
+            if cls._search_executor is None:
+                cls._search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='abu-dhabi-search')
+            return cls._search_executor
+
+    def generate_recommendations(self, topic=None):
         """
         自动生成阿布扎比推荐
         返回3条推荐信息
+
+        参数:
+            topic: 推荐主题（默认从 TOPICS 中随机选择）
         """
         
         try:
-            # 定义推荐主题
-            topics = [
-                "阿布扎比必去景点",
-                "阿布扎比美食推荐",
-                "阿布扎比购物中心",
-                "阿布扎比文化体验",
-                "阿布扎比海滩度假"
-            ]
-            
             # 随机选择一个主题
-            topic = random.choice(topics)
-            
-            # 搜索相关信息
-            print(f"🔍 正在搜索: {topic}")
-            search_results = self.search_duckduckgo(topic, num_results=5)
-            
-            if not search_results:
+            topic = topic or random.choice(self.TOPICS)
+
+            recommendations = self.generate_topic_recommendations(topic)
+            if not recommendations:
                 return self._get_default_recommendations()
+            return recommendations
+
+        except OllamaBusyError as e:
+            # 模型已满载：直接降级为默认推荐
+            print(f"⏳ {str(e)}，返回默认推荐")
+            return self._get_default_recommendations()
             
-            # 构建提示词
-            search_context = "\n".join([
-                f"- {r['title']}" for r in search_results[:3]
-            ])
-            
-            system_prompt = """你是阿布扎比旅游专家。请根据搜索结果，生成3条简短的阿布扎比推荐。
+        except Exception as e:
+            print(f"❌ 生成推荐失败: {str(e)}")
+            print(f"❌ 错误类型: {type(e).__name__}")
+            import traceback
+            traceback.print_exc()
+            return self._get_default_recommendations()
+
+    def generate_topic_recommendations(self, topic):
+        """
+        为指定主题生成推荐（搜索 + Ollama）
+
+        与 generate_recommendations 不同，失败时不返回默认推荐：
+        搜索无结果时返回 None，请求 Ollama 出错时直接抛出异常，便于缓存层区分成功与失败
+        """
+        # 搜索相关信息
+        print(f"🔍 正在搜索: {topic}")
+        search_results = self._search_for_topic(topic)
+
+        if not search_results:
+            return None
+
+        # 调用Ollama生成推荐（使用原始HTTP请求）
+        print("🤖 正在生成推荐...")
+
+        ollama_api_url = f"{self.ollama_url}/api/chat"
+        payload = self._build_chat_payload(search_results, stream=False)
+
+        # 相同提示词直接使用缓存的模型输出
+        cache_key = self._completion_key(payload)
+        ai_response = self.completion_cache.get(cache_key) if self.completion_cache else None
+
+        if ai_response is not None:
+            print("💾 模型输出缓存命中")
+        else:
+            # 相同提示词的并发请求合并为一次生成
+            ai_response = self._ollama_flight.do(
+                cache_key, lambda: self._call_ollama(ollama_api_url, payload, cache_key)
+            )
+
+        # 解析AI响应
+        recommendations = self._parse_ai_response(ai_response, search_results)
+
+        print(f"✅ 生成了 {len(recommendations)} 条推荐")
+        return recommendations
+
+    def _call_ollama(self, ollama_api_url, payload, cache_key):
+        """在并发限制内调用 Ollama 生成，返回模型输出文本（熔断期间直接抛出 OllamaUnavailableError）"""
+        self._ensure_ollama_available()
+        if not self.ollama_limiter.acquire():
+            raise OllamaBusyError(f'Ollama 繁忙，排队超过 {self.ollama_limiter.queue_timeout}s')
+
+        try:
+            start = time.perf_counter()
+            try:
+                with track_external('ollama'):
+                    response = self.ollama_session.post(
+                        ollama_api_url,
+                        json=payload,
+                        timeout=60
+                    )
+                response.raise_for_status()
+
+                data = response.json()
+                ai_response = data.get('message', {}).get('content', '')
+            except Exception:
+                self.ollama_health.record_failure()
+                raise
+            self.ollama_health.record_success()
+
+            if self.completion_cache:
+                self.completion_cache.record_model_latency(time.perf_counter() - start)
+                self.completion_cache.set(cache_key, ai_response, model=self.model_name)
+            return ai_response
+        finally:
+            self.ollama_limiter.release()
+
+    def stream_topic_recommendations(self, topic):
+        """
+        为指定主题流式生成推荐（搜索 + Ollama 流式输出）
+
+        Ollama 每输出一段文本就增量解析一次，JSON 数组中每完成一个对象立即产出一条推荐，
+        不必等待全部 token 生成完毕。搜索无结果时不产出任何推荐，请求出错时直接抛出异常。
+
+        产出:
+            dict: 推荐信息（title / description / url / icon）
+        """
+        print(f"🔍 正在搜索: {topic}")
+        search_results = self._search_for_topic(topic)
+
+        if not search_results:
+            return
+
+        print("🤖 正在流式生成推荐...")
+
+        payload = self._build_chat_payload(search_results, stream=True)
+        parser = JSONObjectStreamParser()
+        count = 0
+
+        # 相同提示词直接使用缓存的模型输出，一次性解析产出
+        cache_key = self._completion_key(payload)
+        cached = self.completion_cache.get(cache_key) if self.completion_cache else None
+
+        if cached is not None:
+            print("💾 模型输出缓存命中")
+            for item in parser.feed(cached)[:3]:
+                yield self._build_recommendation(item, count, search_results)
+                count += 1
+        else:
+            # 熔断只拦截真正的模型调用，缓存命中的输出在 Ollama 不可用时照常返回
+            self._ensure_ollama_available()
+            if not self.ollama_limiter.acquire():
+                raise OllamaBusyError(f'Ollama 繁忙，排队超过 {self.ollama_limiter.queue_timeout}s')
+
+            start = time.perf_counter()
+            generated = []
+            finished = False
+
+            try:
+                with self.ollama_session.post(f"{self.ollama_url}/api/chat", json=payload, stream=True, timeout=60) as response:
+                    response.raise_for_status()
+
+                    # Ollama 流式接口每行一个 JSON 片段: {"message": {"content": "..."}, "done": false}
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        content = chunk.get('message', {}).get('content', '')
+                        generated.append(content)
+
+                        for item in parser.feed(content):
+                            if count >= 3:
+                                break
+                            yield self._build_recommendation(item, count, search_results)
+                            count += 1
+
+                        if chunk.get('done') or count >= 3:
+                            finished = True
+                            break
+            except Exception:
+                self.ollama_health.record_failure()
+                record_external('ollama', time.perf_counter() - start, ok=False)
+                raise
+            else:
+                self.ollama_health.record_success()
+                record_external('ollama', time.perf_counter() - start)
+            finally:
+                # 客户端断开（生成器被关闭）时也会释放名额
+                self.ollama_limiter.release()
+
+            # 只缓存完整的输出（生成结束或已得到3条推荐）
+            if self.completion_cache and finished:
+                self.completion_cache.record_model_latency(time.perf_counter() - start)
+                self.completion_cache.set(cache_key, ''.join(generated), model=self.model_name)
+
+        # 模型没有输出可解析的 JSON 时，退回到搜索结果
+        if count == 0:
+            for rec in self._format_search_results(search_results):
+                yield rec
+            count = min(len(search_results), 3)
+
+        print(f"✅ 流式生成了 {count} 条推荐")
+
+    def _build_chat_payload(self, search_results, stream=False):
+        """构建 Ollama /api/chat 请求体"""
+        search_context = "\n".join([
+            f"- {r['title']}" for r in search_results[:3]
+        ])
+
+        system_prompt = """你是阿布扎比旅游专家。请根据搜索结果，生成3条简短的阿布扎比推荐。
 每条推荐格式：
 1. 标题（10-15字）
 2. 简介（20-30字）
@@ -204,7 +495,7 @@ class AbuDhabiService:
 - 突出特色
 - 用中文回答"""
 
-            user_prompt = f"""基于以下搜索结果，生成3条阿布扎比推荐：
+        user_prompt = f"""基于以下搜索结果，生成3条阿布扎比推荐：
 
 {search_context}
 
@@ -215,46 +506,52 @@ class AbuDhabiService:
   {{"title": "标题3", "description": "简介3"}}
 ]"""
 
-            # 调用Ollama生成推荐（使用原始HTTP请求）
-            print("🤖 正在生成推荐...")
-
-            ollama_api_url = f"{self.ollama_url}/api/chat"
-            payload = {
-                "model": self.model_name,
-                "messages": [
-                    {'role': 'system', 'content': system_prompt},
-                    {'role': 'user', 'content': user_prompt}
-                ],
-                "stream": False,
-                "options": {
-                    'temperature': 0.7,
-                    'num_predict': 500
-                }
+        return {
+            "model": self.model_name,
+            "messages": [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': user_prompt}
+            ],
+            "stream": stream,
+            "options": {
+                'temperature': 0.7,
+                'num_predict': 500
             }
+        }
 
-            response = requests.post(
-                ollama_api_url,
-                json=payload,
-                timeout=60
-            )
-            response.raise_for_status()
+    def _ensure_ollama_available(self):
+        """Ollama 被判定为不可用时立即抛出 OllamaUnavailableError，不再等待模型超时（在查完输出缓存之后调用）"""
+        if not self.ollama_health.allow_request():
+            raise OllamaUnavailableError('Ollama 服务不可用（熔断中）')
+
+    def ollama_stats(self):
+        """
+        Ollama 调用统计
+
+        返回:
+            dict: {'health': 可用性 / 熔断状态, 'limiter': 排队深度 / 等待时间等,
+                   'coalescing': 请求合并, 'completion_cache': 输出缓存}
+        """
+        return {
+            'health': self.ollama_health.stats(),
+            'limiter': self.ollama_limiter.stats(),
+            'coalescing': self._ollama_flight.stats(),
+            'completion_cache': self.completion_cache.stats() if self.completion_cache else None
+        }
+
+    def _completion_key(self, payload):
+        """模型输出缓存键（不含 stream 标志，流式与非流式请求共用缓存）"""
+        return CompletionCache.make_key(payload['model'], payload['messages'], payload['options'])
+
+    def _build_recommendation(self, item, index, search_results):
+        """组合AI生成的标题和搜索结果的链接"""
+        return {
+            'title': item.get('title', f'推荐 {index+1}'),
+            'description': item.get('description', ''),
+            'url': search_results[index]['url'] if index < len(search_results) else '#',
+            'icon': self._get_icon_for_index(index)
+        }
 
-            data = response.json()
-            ai_response = data.get('message', {}).get('content', '')
-            
-            # 解析AI响应
-            recommendations = self._parse_ai_response(ai_response, search_results)
-            
-            print(f"✅ 生成了 {len(recommendations)} 条推荐")
-            return recommendations
-            
-        except Exception as e:
-            print(f"❌ 生成推荐失败: {str(e)}")
-            print(f"❌ 错误类型: {type(e).__name__}")
-            import traceback
-            traceback.print_exc()
-            return self._get_default_recommendations()
-    
     def _parse_ai_response(self, ai_response, search_results):
         """解析AI响应，提取推荐信息"""
         try:
@@ -269,17 +566,16 @@ class AbuDhabiService:
                 # 组合AI生成的标题和搜索结果的链接
                 recommendations = []
                 for i, item in enumerate(recommendations_data[:3]):
-                    rec = {
-                        'title': item.get('title', f'推荐 {i+1}'),
-                        'description': item.get('description', ''),
-                        'url': search_results[i]['url'] if i < len(search_results) else '#',
-                        'icon': self._get_icon_for_index(i)
-                    }
-                    recommendations.append(rec)
+                    recommendations.append(self._build_recommendation(item, i, search_results))
                 
                 return recommendations
         except:
             pass
+
+        # 数组不完整（如流式生成在第3条后提前结束）时，逐个提取已完成的对象
+        items = JSONObjectStreamParser().feed(ai_response)
+        if items:
+            return [self._build_recommendation(item, i, search_results) for i, item in enumerate(items[:3])]
         
         # 如果解析失败，使用搜索结果
         return self._format_search_results(search_results)
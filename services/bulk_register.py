@@ -0,0 +1,301 @@
+"""
+批量注册服务 - 从 CSV / JSONL 文件批量导入申请人（合作方团体开户）
+
+流程：
+1. 逐行读取并校验申请人（卡号后缀、返程日期、用户名、额度、收入画像），无效行记录后跳过
+2. 按块处理：每块一个事务，批量分配卡号前缀，executemany 写入 user / credit / income_profile
+3. 输出每秒导入行数
+
+与 RegistrationManager.complete_registration 相比，不再为每个用户单独提交，也不再重复插入汇率记录。
+
+用法:
+    python -m services.bulk_register applicants.csv --db instance/fintech.db --chunk-size 5000
+"""
+
+import csv
+import json
+import sqlite3
+import sys
+import time
+from datetime import date, datetime
+
+from services.card_allocator import CardPrefixAllocator
+from services.register import INITIAL_REDEEM_COUNT, INITIAL_WECOIN, default_user_info, format_card_number
+from utils.database import INCOME_PROFILE_DDL
+
+DEFAULT_CREDIT_LIMIT = 100000
+
+# 错误明细最多保留的条数
+MAX_REPORTED_ERRORS = 100
+
+
+def read_applicants(path, file_format=None):
+    """
+    读取申请人文件
+
+    Args:
+        path: 文件路径
+        file_format: 'csv' / 'jsonl'（默认按扩展名判断）
+
+    Yields:
+        tuple: (行号, dict)
+    """
+    file_format = file_format or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if file_format == 'csv':
+            # 第1行为表头，数据从第2行开始
+            for line_no, row in enumerate(csv.DictReader(f), start=2):
+                yield line_no, row
+        else:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except ValueError as e:
+                    yield line_no, {'_error': f'JSON格式错误: {e}'}
+
+
+def _optional_float(value):
+    if value is None or value == '':
+        return None
+    return float(value)
+
+
+def parse_applicant(record):
+    """
+    校验并规范化一个申请人
+
+    Args:
+        record: {'card_suffix', 'expected_return_day', 'username'?, 'credit_limit'?, 'total_income'?, 'balance'?}
+
+    Returns:
+        dict: 规范化后的申请人
+
+    Raises:
+        ValueError: 字段无效
+    """
+    if record.get('_error'):
+        raise ValueError(record['_error'])
+
+    card_suffix = str(record.get('card_suffix') or '').replace(' ', '')
+    if len(card_suffix) != 8 or not card_suffix.isdigit():
+        raise ValueError('卡号后缀必须是8位数字')
+
+    expected_return_day = str(record.get('expected_return_day') or '').strip()
+    try:
+        # fromisoformat 比 strptime 快一个数量级；长度检查排除 YYYYMMDD 等其他 ISO 写法
+        if len(expected_return_day) != 10:
+            raise ValueError
+        date.fromisoformat(expected_return_day)
+    except ValueError:
+        raise ValueError('返程日期必须是 YYYY-MM-DD 格式')
+
+    username = str(record.get('username') or 'Yogurt').strip() or 'Yogurt'
+    credit_limit = _optional_float(record.get('credit_limit'))
+    return {
+        'card_suffix': card_suffix,
+        'expected_return_day': expected_return_day,
+        'username': username,
+        'credit_limit': DEFAULT_CREDIT_LIMIT if credit_limit is None else credit_limit,
+        'total_income': _optional_float(record.get('total_income')),
+        'balance': _optional_float(record.get('balance'))
+    }
+
+
+class BulkRegistrationImporter:
+    """批量注册导入器"""
+
+    def __init__(self, db_path='instance/fintech.db', chunk_size=5000, card_allocator=None):
+        """
+        Args:
+            db_path: 数据库路径
+            chunk_size: 每个事务导入的用户数
+            card_allocator: CardPrefixAllocator 实例（默认新建）
+        """
+        self.db_path = db_path
+        self.chunk_size = chunk_size
+        self.card_allocator = card_allocator or CardPrefixAllocator(db_path)
+
+    def get_connection(self):
+        """获取数据库连接"""
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def import_records(self, records, progress=None):
+        """
+        导入申请人
+
+        Args:
+            records: 可迭代的 (行号, dict) 或 dict
+            progress: 进度回调 progress(stats: dict)，默认打印到控制台
+
+        Returns:
+            dict: {
+                'success': bool,
+                'imported': int,        # 成功导入的用户数
+                'invalid': int,         # 校验失败而跳过的行数
+                'errors': list,         # [{'line', 'message'}]（最多 MAX_REPORTED_ERRORS 条）
+                'user_ids': (first, last),
+                'elapsed': float,
+                'rows_per_second': float,
+                'message': str
+            }
+        """
+        progress = progress or self._print_progress
+        conn = self.get_connection()
+        imported = invalid = 0
+        errors = []
+        first_user_id = last_user_id = None
+        start = time.perf_counter()
+
+        try:
+            conn.execute(INCOME_PROFILE_DDL)
+            conn.commit()
+
+            chunk = []
+            for index, item in enumerate(records, start=1):
+                line_no, record = item if isinstance(item, tuple) else (index, item)
+                try:
+                    chunk.append(parse_applicant(record))
+                except (ValueError, TypeError) as e:
+                    invalid += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({'line': line_no, 'message': str(e)})
+                    continue
+
+                if len(chunk) >= self.chunk_size:
+                    ids = self._import_chunk(conn, chunk)
+                    first_user_id = first_user_id or ids[0]
+                    last_user_id = ids[-1]
+                    imported += len(chunk)
+                    chunk = []
+                    progress({'imported': imported, 'invalid': invalid, 'elapsed': time.perf_counter() - start})
+
+            if chunk:
+                ids = self._import_chunk(conn, chunk)
+                first_user_id = first_user_id or ids[0]
+                last_user_id = ids[-1]
+                imported += len(chunk)
+                progress({'imported': imported, 'invalid': invalid, 'elapsed': time.perf_counter() - start})
+
+            elapsed = time.perf_counter() - start
+            rate = imported / elapsed if elapsed > 0 else 0.0
+            return {
+                'success': True,
+                'imported': imported,
+                'invalid': invalid,
+                'errors': errors,
+                'user_ids': (first_user_id, last_user_id),
+                'elapsed': elapsed,
+                'rows_per_second': rate,
+                'message': f'批量注册完成 - 导入{imported}个用户，跳过{invalid}行无效数据，{rate:,.0f} 行/秒'
+            }
+
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 批量注册失败: {str(e)}")
+            return {
+                'success': False,
+                'imported': imported,
+                'invalid': invalid,
+                'errors': errors,
+                'user_ids': (first_user_id, last_user_id),
+                'message': f'批量注册失败（已提交{imported}个用户）: {str(e)}'
+            }
+        finally:
+            conn.close()
+
+    def import_file(self, path, file_format=None, progress=None):
+        """从 CSV / JSONL 文件导入（见 import_records）"""
+        return self.import_records(read_applicants(path, file_format), progress=progress)
+
+    def _import_chunk(self, conn, applicants):
+        """
+        在一个事务中导入一块申请人
+
+        Returns:
+            list[int]: 新用户ID（与 applicants 顺序一致）
+        """
+        cursor = conn.cursor()
+        # 立即获取写锁：本块的用户ID和卡号前缀都是连续分配的
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            prefixes = self.card_allocator.allocate_many(conn, len(applicants))
+            now = datetime.now()
+
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM user')
+            max_id_before = cursor.fetchone()[0]
+
+            user_rows = []
+            for applicant, prefix in zip(applicants, prefixes):
+                info = default_user_info(applicant['username'])
+                user_rows.append((
+                    info['username'], format_card_number(prefix, applicant['card_suffix']),
+                    info['region'], info['location_city'], info['avatar_initial'], info['landmark_image'],
+                    info['phone'], info['email'], INITIAL_WECOIN, INITIAL_REDEEM_COUNT,
+                    applicant['expected_return_day'], now
+                ))
+            cursor.executemany('''
+                INSERT INTO user (username, card_number, region, location_city,
+                                avatar_initial, landmark_image, phone, email,
+                                wecoin, redeem_today_count, expected_return_day, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', user_rows)
+
+            # AUTOINCREMENT 的ID单调递增，持有写锁时本块用户的ID即按插入顺序排列
+            cursor.execute('SELECT id FROM user WHERE id > ? ORDER BY id', (max_id_before,))
+            user_ids = [row[0] for row in cursor.fetchall()]
+            if len(user_ids) != len(applicants):
+                raise RuntimeError(f'新用户ID数量不符: {len(user_ids)} != {len(applicants)}')
+
+            cursor.executemany('UPDATE card_prefix SET user_id = ? WHERE prefix = ?', zip(user_ids, prefixes))
+            cursor.executemany('''
+                INSERT INTO credit (user_id, total_limit, available_limit, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', ((user_id, a['credit_limit'], a['credit_limit'], now) for user_id, a in zip(user_ids, applicants)))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO income_profile (user_id, total_income, balance, updated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (
+                (user_id, a['total_income'], a['balance'], now)
+                for user_id, a in zip(user_ids, applicants)
+                if a['total_income'] is not None and a['balance'] is not None
+            ))
+            conn.commit()
+            return user_ids
+        except Exception:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _print_progress(stats):
+        """默认进度输出"""
+        elapsed = stats['elapsed']
+        rate = stats['imported'] / elapsed if elapsed > 0 else 0.0
+        print(f"📊 已导入{stats['imported']} 跳过{stats['invalid']} {rate:,.0f} 行/秒")
+
+
+def main(argv=None):
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='从 CSV / JSONL 批量注册用户')
+    parser.add_argument('path', help='申请人文件（CSV 需要表头: card_suffix,expected_return_day,username,'
+                                     'credit_limit,total_income,balance）')
+    parser.add_argument('--db', default='instance/fintech.db', help='数据库路径')
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default=None, help='文件格式（默认按扩展名判断）')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='每个事务导入的用户数')
+    args = parser.parse_args(argv)
+
+    result = BulkRegistrationImporter(db_path=args.db, chunk_size=args.chunk_size).import_file(
+        args.path, file_format=args.format
+    )
+    for error in result['errors'][:10]:
+        print(f"⚠️ 第{error['line']}行: {error['message']}")
+    print(('✅ ' if result['success'] else '❌ ') + result['message'])
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+卡号前缀分配器 - 常数时间、无碰撞地分配8位卡号前缀
+
+分配序号 seq = 1, 2, 3, ... 经过一个固定密钥的 Feistel 置换映射到 [0, 10^8) 中的前缀：
+置换是双射，不同序号必然得到不同前缀，无需随机重试，也无需按前缀扫描 user 表；
+前缀看起来仍是随机的。已分配的前缀记录在 card_prefix 表（前缀主键、序号唯一）。
+"""
+
+import hashlib
+import sqlite3
+from datetime import datetime
+
+from utils.database import CARD_PREFIX_DDL
+
+PREFIX_DIGITS = 8
+_HALF = 10 ** (PREFIX_DIGITS // 2)
+PREFIX_SPACE = _HALF * _HALF
+
+
+class CardPrefixExhaustedError(RuntimeError):
+    """8位前缀已全部分配"""
+
+
+def permute_prefix(seq, key=b'fintech2026', rounds=4):
+    """
+    把分配序号置换为8位前缀（平衡 Feistel 网络，左右各4位，模 10^4 加法）
+
+    参数:
+        seq: 分配序号，0 <= seq < 10^8
+        key: 置换密钥（改变密钥得到另一种前缀顺序）
+        rounds: Feistel 轮数
+
+    返回:
+        str: 8位数字前缀
+    """
+    left, right = divmod(seq, _HALF)
+    for round_index in range(rounds):
+        digest = hashlib.blake2b(f'{round_index}:{right}'.encode(), key=key, digest_size=8).digest()
+        left, right = right, (left + int.from_bytes(digest, 'big')) % _HALF
+    return f'{left * _HALF + right:0{PREFIX_DIGITS}d}'
+
+
+class CardPrefixAllocator:
+    """卡号前缀分配器"""
+
+    def __init__(self, db_path='instance/fintech.db', key=b'fintech2026'):
+        """
+        参数:
+            db_path: 数据库路径
+            key: 置换密钥
+        """
+        self.db_path = db_path
+        self.key = key
+
+    def ensure_schema(self, conn):
+        """建表，并把已有用户卡号的前缀回填到分配表（只在分配表为空时执行一次）"""
+        cursor = conn.cursor()
+        cursor.execute(CARD_PREFIX_DDL)
+        cursor.execute('SELECT 1 FROM card_prefix LIMIT 1')
+        if cursor.fetchone():
+            return
+        cursor.execute('SELECT id, card_number FROM user WHERE card_number IS NOT NULL')
+        rows = [
+            (card_number.replace(' ', '')[:PREFIX_DIGITS], user_id)
+            for user_id, card_number in cursor.fetchall()
+            if len(card_number.replace(' ', '')) >= PREFIX_DIGITS
+        ]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO card_prefix (prefix, seq, user_id, allocated_at)
+            VALUES (?, NULL, ?, NULL)
+        ''', rows)
+
+    def allocate(self, conn, user_id=None):
+        """
+        在调用方的事务中分配一个前缀（事务回滚时分配一并撤销）
+
+        取下一个序号只需在 seq 唯一索引上查 MAX，插入由主键保证唯一；
+        只有与回填的旧前缀相撞时才会跳过序号，跳过次数不超过旧用户数。
+
+        参数:
+            conn: sqlite3 连接（调用方负责提交）
+            user_id: 关联的用户ID（可稍后用 assign 设置）
+
+        返回:
+            str: 8位数字前缀
+        """
+        self.ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(seq) FROM card_prefix')
+        seq = cursor.fetchone()[0] or 0
+
+        while True:
+            seq += 1
+            if seq >= PREFIX_SPACE:
+                raise CardPrefixExhaustedError('8位卡号前缀已全部分配')
+            prefix = permute_prefix(seq, self.key)
+            cursor.execute('''
+                INSERT OR IGNORE INTO card_prefix (prefix, seq, user_id, allocated_at)
+                VALUES (?, ?, ?, ?)
+            ''', (prefix, seq, user_id, datetime.now()))
+            if cursor.rowcount == 1:
+                return prefix
+            # 与旧前缀相撞：让旧记录占用这个序号，继续取下一个
+            cursor.execute('UPDATE card_prefix SET seq = ? WHERE prefix = ? AND seq IS NULL', (seq, prefix))
+
+    def allocate_many(self, conn, count):
+        """
+        在调用方的事务中批量分配 count 个前缀
+
+        一次取得序号区间，按批查询哪些候选前缀已被旧数据占用，其余用一次 executemany 写入。
+
+        返回:
+            list[str]: 按序号顺序的前缀
+        """
+        self.ensure_schema(conn)
+        cursor = conn.cursor()
+        cursor.execute('SELECT MAX(seq) FROM card_prefix')
+        seq = cursor.fetchone()[0] or 0
+
+        allocated, collisions = [], []
+        while len(allocated) < count:
+            need = count - len(allocated)
+            if seq + need >= PREFIX_SPACE:
+                raise CardPrefixExhaustedError('8位卡号前缀已全部分配')
+            candidates = [(seq + i, permute_prefix(seq + i, self.key)) for i in range(1, need + 1)]
+            seq += need
+            taken = self._existing_prefixes(cursor, [prefix for _, prefix in candidates])
+            for candidate in candidates:
+                (collisions if candidate[1] in taken else allocated).append(candidate)
+
+        now = datetime.now()
+        # 与旧前缀相撞的序号由旧记录占用（与 allocate 一致）
+        cursor.executemany('UPDATE card_prefix SET seq = ? WHERE prefix = ? AND seq IS NULL', collisions)
+        cursor.executemany('''
+            INSERT INTO card_prefix (prefix, seq, user_id, allocated_at)
+            VALUES (?, ?, NULL, ?)
+        ''', ((prefix, candidate_seq, now) for candidate_seq, prefix in allocated))
+        return [prefix for _, prefix in allocated]
+
+    @staticmethod
+    def _existing_prefixes(cursor, prefixes, batch_size=500):
+        """查询候选前缀中已存在的（每批不超过 SQLite 参数个数上限）"""
+        existing = set()
+        for i in range(0, len(prefixes), batch_size):
+            batch = prefixes[i:i + batch_size]
+            cursor.execute(f'SELECT prefix FROM card_prefix WHERE prefix IN ({",".join("?" * len(batch))})', batch)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
+    def assign(self, conn, prefix, user_id):
+        """把已分配的前缀关联到用户"""
+        conn.execute('UPDATE card_prefix SET user_id = ? WHERE prefix = ?', (user_id, prefix))
+
+    def allocate_one(self, user_id=None):
+        """独立事务中分配一个前缀并提交"""
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            # 立即获取写锁，并发分配时串行执行 MAX(seq) + INSERT
+            conn.execute('BEGIN IMMEDIATE')
+            prefix = self.allocate(conn, user_id)
+            conn.commit()
+            return prefix
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
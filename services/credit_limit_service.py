@@ -1,27 +1,122 @@
 # credit_limit_service.py
-import joblib
 import numpy as np
 import os
+import csv
+import json
+import sys
+import threading
+import hashlib
+
+from utils.cache import LRUCache
+
+# 风险等级（与 predict_credit_limit 的单条判断保持一致）
+RISK_LOW = "低风险"
+RISK_MEDIUM = "中等风险"
+RISK_HIGH = "高风险"
+
+
+class _NativeBoosterModel:
+    """原生 Booster 的轻量包装，提供与 XGBRegressor 相同的 predict 接口"""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    def predict(self, features_array):
+        # inplace_predict 直接读取 numpy 数组，无需构建 DMatrix
+        return self.booster.inplace_predict(features_array)
+
+    def get_booster(self):
+        return self.booster
+
 
 class CreditLimitService:
     """信用额度预测服务 - 使用XGBoost简化模型（只需收入和余额）"""
 
-    def __init__(self, model_path='models/xgboost_simple_model.pkl'):
+    def __init__(self, model_path='models/xgboost_simple_model.pkl', lazy=True, native_model_path=None,
+                 cache_size=1024, cache_quantum=0.01, backend='xgboost'):
         """
         初始化服务
 
         Args:
-            model_path: XGBoost模型文件路径
+            model_path: XGBoost模型文件路径（joblib pickle）
+            lazy: 是否延迟到第一次预测时再加载模型（默认True，加快启动）
+            native_model_path: XGBoost 原生格式模型路径（.ubj/.json）。
+                指定后直接由 XGBoost 读取原生 Booster，代替 pickle 加载
+            cache_size: 单条预测结果缓存的最大条目数（0 表示不缓存）
+            cache_quantum: 缓存键的量化精度（默认0.01，即按分取整）
+            backend: 推理后端，'xgboost'（默认）或 'numpy'（扁平化树数组的向量化推理，
+                单条和批量预测的调用开销更低，结果与 XGBoost 逐位一致）
         """
+        if backend not in ('xgboost', 'numpy'):
+            raise ValueError(f'不支持的推理后端: {backend}')
+
         self.model_path = model_path
-        self.model = None
-        self._load_model()
-    
+        self.native_model_path = native_model_path
+        self.backend = backend
+        self._model = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+        # 预测结果缓存：键包含量化后的输入和模型文件哈希，模型文件变化后旧条目自然失效
+        self.cache_quantum = cache_quantum
+        self._prediction_cache = LRUCache(cache_size) if cache_size > 0 else None
+        self._model_signature = None  # (mtime_ns, size)，用于判断是否需要重新计算哈希
+        self._model_hash = None
+
+        if not lazy:
+            self.preload()
+
+    @property
+    def model(self):
+        """模型对象（首次访问时加载）"""
+        if not self._loaded:
+            self.preload()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._model = value
+        self._loaded = True
+
+    def preload(self):
+        """
+        立即加载模型（线程安全，只加载一次）
+
+        多进程部署（如 gunicorn --preload）时在主进程调用，
+        fork 出的 worker 以写时复制方式共享 Booster 的内存页
+        """
+        with self._load_lock:
+            if not self._loaded:
+                self._load_model()
+                if self.backend == 'numpy' and self._model is not None:
+                    self._compile_model()
+                self._loaded = True
+        return self._model is not None
+
+    def _compile_model(self):
+        """把已加载的 XGBoost 模型转换为 NumPy 树数组后端"""
+        from services.tree_ensemble import TreeEnsemble
+
+        try:
+            ensemble = TreeEnsemble.from_booster(self._model.get_booster())
+            # 模型只有 收入、余额 两个特征，编译为查找表
+            ensemble.compile_lookup_table(num_features=2)
+            self._model = ensemble
+            print(f"✅ 已编译为NumPy树模型: {ensemble.num_trees}棵树, 深度{ensemble.max_depth}")
+        except Exception as e:
+            # 不支持的模型结构时退回 XGBoost 推理
+            print(f"⚠️ NumPy树模型编译失败，使用XGBoost推理: {str(e)}")
+
     def _load_model(self):
         """加载XGBoost模型"""
+        if self.native_model_path:
+            self._load_native_model()
+            return
+
         try:
             if os.path.exists(self.model_path):
-                self.model = joblib.load(self.model_path)
+                import joblib
+                self._model = joblib.load(self.model_path)
                 print(f"✅ XGBoost模型加载成功: {self.model_path}")
             else:
                 print(f"⚠️ 模型文件不存在: {self.model_path}")
@@ -29,10 +124,105 @@ class CreditLimitService:
         except Exception as e:
             print(f"❌ 模型加载失败: {str(e)}")
             print("将使用默认规则计算额度")
-            self.model = None
-    
+            self._model = None
+
+    def _load_native_model(self):
+        """读取 XGBoost 原生格式模型（按扩展名识别 .ubj/.json，不经过 pickle 反序列化）"""
+        try:
+            if not os.path.exists(self.native_model_path):
+                print(f"⚠️ 原生模型文件不存在: {self.native_model_path}")
+                print("将使用默认规则计算额度")
+                return
+
+            import xgboost as xgb
+
+            booster = xgb.Booster()
+            booster.load_model(self.native_model_path)
+
+            self._model = _NativeBoosterModel(booster)
+            print(f"✅ XGBoost原生模型加载成功: {self.native_model_path}")
+        except Exception as e:
+            print(f"❌ 原生模型加载失败: {str(e)}")
+            print("将使用默认规则计算额度")
+            self._model = None
+
+    # ==================== 模型文件变更检测 ====================
+
+    def _active_model_path(self):
+        """当前使用的模型文件路径"""
+        return self.native_model_path or self.model_path
+
+    def _check_model_file(self):
+        """
+        检查模型文件是否变化，返回当前模型文件的哈希
+
+        只在文件 mtime/size 变化时重新计算 SHA-256；哈希变化时清空预测缓存，
+        并在下次访问 model 时重新加载
+        """
+        path = self._active_model_path()
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+
+        if signature == self._model_signature and self._model_hash is not None:
+            return self._model_hash
+
+        with self._load_lock:
+            if signature != self._model_signature or self._model_hash is None:
+                new_hash = _file_sha256(path) if signature else 'missing'
+                if self._model_hash is not None and new_hash != self._model_hash:
+                    print(f"🔄 模型文件已更新，重新加载: {path}")
+                    self._loaded = False
+                    self._model = None
+                    if self._prediction_cache is not None:
+                        self._prediction_cache.clear()
+                self._model_signature = signature
+                self._model_hash = new_hash
+        return self._model_hash
+
+    def _quantize(self, value):
+        """把输入量化到 cache_quantum 精度，作为缓存键"""
+        return int(round(float(value) / self.cache_quantum))
+
+    def cache_stats(self):
+        """
+        预测缓存统计
+
+        Returns:
+            dict: {'enabled', 'size', 'maxsize', 'hits', 'misses', 'evictions', 'hit_rate', 'model_hash'}
+        """
+        if self._prediction_cache is None:
+            return {'enabled': False, 'model_hash': self._model_hash}
+        stats = self._prediction_cache.stats()
+        stats['enabled'] = True
+        stats['model_hash'] = self._model_hash
+        return stats
+
+    def clear_cache(self):
+        """清空预测缓存"""
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+    def export_native_model(self, output_path):
+        """
+        将 pickle 模型导出为 XGBoost 原生格式（.ubj 或 .json）
+
+        Args:
+            output_path: 输出路径，扩展名决定格式
+
+        Returns:
+            bool: 是否导出成功
+        """
+        if self.model is None or not hasattr(self.model, 'get_booster'):
+            print("❌ 没有可导出的模型（需要 xgboost 推理后端）")
+            return False
+
+        self.model.get_booster().save_model(output_path)
+        print(f"✅ 原生模型已导出: {output_path}")
+        return True
 
-    
     def predict_credit_limit(self, total_income, balance):
         """
         预测用户信用额度（回归模型：直接预测额度）
@@ -50,6 +240,15 @@ class CreditLimitService:
             }
         """
         try:
+            # 命中缓存时直接返回，跳过模型调用
+            cache_key = None
+            if self._prediction_cache is not None:
+                cache_key = ('predict', self._quantize(total_income), self._quantize(balance),
+                             self._check_model_file())
+                cached = self._prediction_cache.get(cache_key)
+                if cached is not None:
+                    return dict(cached, balance=float(balance), total_income=float(total_income))
+
             # 构建特征向量 (2个特征: 总收入, 余额)
             features_array = np.array([[total_income, balance]])
 
@@ -68,14 +267,9 @@ class CreditLimitService:
                 credit_limit = self._calculate_default_limit(total_income, balance)
 
             # 根据额度判断风险等级
-            if credit_limit >= balance * 3:
-                risk_level = "低风险"
-            elif credit_limit >= balance * 1.5:
-                risk_level = "中等风险"
-            else:
-                risk_level = "高风险"
+            risk_level = self._classify_risk(credit_limit, balance)
 
-            return {
+            result = {
                 'success': True,
                 'credit_limit': float(round(credit_limit, 2)),
                 'risk_level': risk_level,
@@ -83,6 +277,9 @@ class CreditLimitService:
                 'total_income': float(total_income),
                 'message': f'预测成功 - {risk_level}，授信额度¥{credit_limit:,.2f}'
             }
+            if cache_key is not None:
+                self._prediction_cache.set(cache_key, result)
+            return dict(result)
 
         except Exception as e:
             print(f"额度预测错误: {str(e)}")
@@ -93,6 +290,171 @@ class CreditLimitService:
                 'message': f'额度预测失败: {str(e)}'
             }
 
+    def predict_many(self, total_incomes, balances):
+        """
+        批量预测信用额度（一次向量化的模型调用）
+
+        Args:
+            total_incomes: 总收入序列（list / np.ndarray）
+            balances: 账户余额序列，长度与 total_incomes 相同
+
+        Returns:
+            dict: {
+                'success': bool,
+                'credit_limit': np.ndarray,  # 已保留两位小数
+                'risk_level': np.ndarray,    # 风险等级字符串数组
+                'source': str,               # 'model' 或 'rule'
+                'message': str
+            }
+        """
+        try:
+            total_incomes = np.asarray(total_incomes, dtype=np.float64).reshape(-1)
+            balances = np.asarray(balances, dtype=np.float64).reshape(-1)
+            if total_incomes.shape != balances.shape:
+                raise ValueError(f'收入与余额数量不一致: {total_incomes.size} != {balances.size}')
+
+            # 构建特征矩阵 (N x 2: 总收入, 余额)
+            features_array = np.column_stack((total_incomes, balances))
+            self._check_model_file()
+
+            source = 'rule'
+            if self.model is not None and len(features_array) > 0:
+                try:
+                    credit_limits = np.asarray(self.model.predict(features_array), dtype=np.float64)
+                    source = 'model'
+                except Exception as e:
+                    print(f"❌ 批量模型预测失败: {str(e)}")
+                    credit_limits = self._calculate_default_limit_many(total_incomes, balances)
+            else:
+                credit_limits = self._calculate_default_limit_many(total_incomes, balances)
+
+            return {
+                'success': True,
+                'credit_limit': np.round(credit_limits, 2),
+                'risk_level': self._classify_risk_many(credit_limits, balances),
+                'source': source,
+                'message': f'批量预测成功 - 共{len(credit_limits)}条'
+            }
+
+        except Exception as e:
+            print(f"批量额度预测错误: {str(e)}")
+            return {
+                'success': False,
+                'message': f'批量额度预测失败: {str(e)}'
+            }
+
+    def iter_predictions(self, rows, chunk_size=10000):
+        """
+        按块批量预测，逐条产出结果（用于流式写出，不在内存中保留全部结果）
+
+        Args:
+            rows: 可迭代对象，每个元素为 (total_income, balance) 或包含这两个键的 dict
+            chunk_size: 每次向量化预测的行数
+
+        Yields:
+            dict: {'total_income', 'balance', 'credit_limit', 'risk_level'}
+        """
+        incomes, balances = [], []
+        for row in rows:
+            if isinstance(row, dict):
+                incomes.append(float(row['total_income']))
+                balances.append(float(row['balance']))
+            else:
+                incomes.append(float(row[0]))
+                balances.append(float(row[1]))
+
+            if len(incomes) >= chunk_size:
+                yield from self._predict_chunk(incomes, balances)
+                incomes, balances = [], []
+
+        if incomes:
+            yield from self._predict_chunk(incomes, balances)
+
+    def _predict_chunk(self, incomes, balances):
+        """预测一个块并转换为逐行结果"""
+        result = self.predict_many(incomes, balances)
+        if not result['success']:
+            raise RuntimeError(result['message'])
+
+        for income, balance, limit, risk in zip(incomes, balances,
+                                                result['credit_limit'].tolist(),
+                                                result['risk_level'].tolist()):
+            yield {
+                'total_income': income,
+                'balance': balance,
+                'credit_limit': limit,
+                'risk_level': risk
+            }
+
+    def write_predictions(self, rows, output, fmt='csv', chunk_size=10000):
+        """
+        批量预测并流式写出到 CSV 或 JSON Lines
+
+        Args:
+            rows: 同 iter_predictions
+            output: 输出文件对象（已打开，文本模式）
+            fmt: 'csv' 或 'jsonl'
+            chunk_size: 每次向量化预测的行数
+
+        Returns:
+            int: 写出的行数
+        """
+        fields = ['total_income', 'balance', 'credit_limit', 'risk_level']
+        count = 0
+
+        if fmt == 'csv':
+            writer = csv.DictWriter(output, fieldnames=fields)
+            writer.writeheader()
+            for record in self.iter_predictions(rows, chunk_size):
+                writer.writerow(record)
+                count += 1
+        elif fmt == 'jsonl':
+            for record in self.iter_predictions(rows, chunk_size):
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+        else:
+            raise ValueError(f'不支持的输出格式: {fmt}')
+
+        return count
+
+    @staticmethod
+    def _classify_risk(credit_limit, balance):
+        """根据额度与余额的倍数判断风险等级"""
+        if credit_limit >= balance * 3:
+            return RISK_LOW
+        elif credit_limit >= balance * 1.5:
+            return RISK_MEDIUM
+        else:
+            return RISK_HIGH
+
+    @staticmethod
+    def _classify_risk_many(credit_limits, balances):
+        """_classify_risk 的向量化版本"""
+        credit_limits = np.asarray(credit_limits, dtype=np.float64)
+        balances = np.asarray(balances, dtype=np.float64)
+        return np.select(
+            [credit_limits >= balances * 3, credit_limits >= balances * 1.5],
+            [RISK_LOW, RISK_MEDIUM],
+            default=RISK_HIGH
+        )
+
+    @staticmethod
+    def _calculate_default_limit_many(total_incomes, balances):
+        """_calculate_default_limit 的向量化版本（不逐条打印日志）"""
+        total_incomes = np.asarray(total_incomes, dtype=np.float64)
+        balances = np.asarray(balances, dtype=np.float64)
+
+        # 收入余额比（余额<=0 时记为0）
+        safe_balances = np.where(balances > 0, balances, 1.0)
+        ratio = np.where(balances > 0, total_incomes / safe_balances, 0.0)
+
+        multiplier = np.select(
+            [ratio >= 15, ratio >= 10, ratio >= 5, ratio >= 2],
+            [4.0, 3.0, 2.0, 1.5],
+            default=1.0
+        )
+        return balances * multiplier
+
     def _calculate_default_limit(self, total_income, balance):
         """
         使用规则计算默认额度
@@ -135,10 +497,17 @@ class CreditLimitService:
         Returns:
             dict: 信用额度信息
         """
+        cache_key = None
+        if self._prediction_cache is not None:
+            cache_key = ('default', self._quantize(total_income), self._quantize(balance))
+            cached = self._prediction_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
         # 使用规则计算默认额度
         credit_limit = self._calculate_default_limit(total_income, balance)
 
-        return {
+        result = {
             'success': True,
             'credit_limit': float(round(credit_limit, 2)),
             'risk_level': "中等风险",
@@ -146,4 +515,93 @@ class CreditLimitService:
             'total_income': float(total_income),
             'message': '使用默认额度计算'
         }
+        if cache_key is not None:
+            self._prediction_cache.set(cache_key, result)
+        return dict(result)
+
+
+def _file_sha256(path, chunk_size=1 << 20):
+    """计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_rows(input_file):
+    """从 CSV（需包含 total_income, balance 列）或 JSON Lines 逐行读取申请人数据"""
+    first_line = input_file.readline()
+    if not first_line:
+        return
+
+    if first_line.lstrip().startswith('{'):
+        yield json.loads(first_line)
+        for line in input_file:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        header = next(csv.reader([first_line]))
+        yield from csv.DictReader(input_file, fieldnames=header)
+
+
+def main(argv=None):
+    """
+    批量额度预测命令行
+
+    用法:
+        python -m services.credit_limit_service predict_many applicants.csv -o scores.csv
+        python -m services.credit_limit_service predict_many applicants.jsonl --format jsonl
+        python -m services.credit_limit_service export_native models/xgboost_simple_model.ubj
+    """
+    import argparse
+    import contextlib
+    import time
+
+    parser = argparse.ArgumentParser(description='信用额度批量预测')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('predict_many', help='批量预测 (total_income, balance)')
+    batch.add_argument('input', help='输入文件（CSV 或 JSON Lines），"-" 表示标准输入')
+    batch.add_argument('-o', '--output', default='-', help='输出文件，默认标准输出')
+    batch.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='输出格式')
+    batch.add_argument('--chunk-size', type=int, default=10000, help='每次向量化预测的行数')
+    batch.add_argument('--model', default='models/xgboost_simple_model.pkl', help='模型文件路径')
+    batch.add_argument('--native-model', default=None, help='XGBoost 原生格式模型路径（代替 pickle）')
+    batch.add_argument('--backend', choices=['xgboost', 'numpy'], default='xgboost', help='推理后端')
+
+    export = subparsers.add_parser('export_native', help='导出 XGBoost 原生格式模型')
+    export.add_argument('output', help='输出路径（.ubj 或 .json）')
+    export.add_argument('--model', default='models/xgboost_simple_model.pkl', help='模型文件路径')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'export_native':
+        service = CreditLimitService(model_path=args.model)
+        return 0 if service.export_native_model(args.output) else 1
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8', newline='')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+
+    try:
+        # 服务日志改写到 stderr，避免混入输出到 stdout 的结果
+        with contextlib.redirect_stdout(sys.stderr):
+            service = CreditLimitService(model_path=args.model, native_model_path=args.native_model,
+                                         backend=args.backend)
+            start = time.perf_counter()
+            count = service.write_predictions(_read_rows(input_file), output_file,
+                                              fmt=args.format, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"✅ 批量预测完成: {count} 条, 耗时 {elapsed:.2f}s ({rate:,.0f} 条/秒)", file=sys.stderr)
+    return 0
+
 
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+信用额度重评分服务 - 夜间批量刷新全体用户的授信额度
+
+流程：
+1. 按用户ID分块（keyset 分页）读取收入画像与消费汇总
+2. 调用 CreditLimitService.predict_many 一次性批量预测
+3. 每块用一次 executemany 写入新的 credit 记录，并在同一事务中更新断点
+4. 中断后再次运行会从上次提交的断点继续
+
+用法:
+    python -m services.credit_rescore --db instance/fintech.db --chunk-size 5000
+"""
+
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from utils.database import INCOME_PROFILE_DDL
+from services.credit_limit_service import CreditLimitService
+
+
+# 重评分断点表：每个批次一行，last_user_id 为已提交的最后一个用户
+RESCORE_RUN_DDL = '''
+CREATE TABLE IF NOT EXISTS credit_rescore_run (
+    run_id TEXT PRIMARY KEY,
+    last_user_id INTEGER,
+    processed INTEGER,
+    skipped INTEGER,
+    started_at DATETIME,
+    updated_at DATETIME,
+    finished_at DATETIME
+)
+'''
+
+# 按用户汇总消费时使用的索引
+TRANSACTIONS_USER_INDEX_DDL = '''
+CREATE INDEX IF NOT EXISTS idx_transactions_user_id ON transactions(user_id)
+'''
+
+
+class CreditRescorePipeline:
+    """额度重评分流水线"""
+
+    def __init__(self, db_path='instance/fintech.db', credit_service=None, chunk_size=5000):
+        """
+        Args:
+            db_path: 数据库路径
+            credit_service: CreditLimitService 实例（默认新建）
+            chunk_size: 每块处理的用户数
+        """
+        self.db_path = db_path
+        self.credit_service = credit_service or CreditLimitService()
+        self.chunk_size = chunk_size
+
+    def get_connection(self):
+        """获取数据库连接"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def ensure_schema(self, conn):
+        """创建重评分依赖的表和索引（已存在则跳过）"""
+        cursor = conn.cursor()
+        cursor.execute(INCOME_PROFILE_DDL)
+        cursor.execute(RESCORE_RUN_DDL)
+        cursor.execute(TRANSACTIONS_USER_INDEX_DDL)
+        conn.commit()
+
+    # ==================== 断点管理 ====================
+
+    def _find_unfinished_run(self, cursor):
+        """查找最近一次未完成的批次"""
+        cursor.execute('''
+            SELECT run_id, last_user_id, processed, skipped
+            FROM credit_rescore_run
+            WHERE finished_at IS NULL
+            ORDER BY started_at DESC
+            LIMIT 1
+        ''')
+        return cursor.fetchone()
+
+    def _start_run(self, cursor, run_id):
+        """登记一个新批次"""
+        now = datetime.now()
+        cursor.execute('''
+            INSERT INTO credit_rescore_run (run_id, last_user_id, processed, skipped, started_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (run_id, 0, 0, 0, now, now))
+
+    # ==================== 分块读取 ====================
+
+    def _fetch_chunk(self, cursor, last_user_id):
+        """
+        读取 last_user_id 之后的一块用户及其收入画像、消费汇总
+
+        Returns:
+            list[sqlite3.Row]: user_id, total_income, balance, total_consume
+        """
+        cursor.execute('''
+            SELECT user.id AS user_id, income_profile.total_income, income_profile.balance
+            FROM user
+            LEFT JOIN income_profile ON income_profile.user_id = user.id
+            WHERE user.id > ?
+            ORDER BY user.id
+            LIMIT ?
+        ''', (last_user_id, self.chunk_size))
+        users = cursor.fetchall()
+        if not users:
+            return []
+
+        # 只汇总本块用户ID区间内的消费（走 user_id 索引）
+        cursor.execute('''
+            SELECT user_id, SUM(amount) AS total_consume
+            FROM transactions
+            WHERE user_id BETWEEN ? AND ?
+            GROUP BY user_id
+        ''', (users[0]['user_id'], users[-1]['user_id']))
+        consume_map = {row['user_id']: row['total_consume'] or 0.0 for row in cursor.fetchall()}
+
+        return [
+            {
+                'user_id': row['user_id'],
+                'total_income': row['total_income'],
+                'balance': row['balance'],
+                'total_consume': consume_map.get(row['user_id'], 0.0)
+            }
+            for row in users
+        ]
+
+    # ==================== 主流程 ====================
+
+    def run(self, run_id=None, resume=True, progress=None):
+        """
+        执行重评分
+
+        Args:
+            run_id: 批次ID（默认自动生成；指定已存在的未完成批次则继续该批次，指定已完成的批次则直接返回）
+            resume: 是否自动继续最近一次未完成的批次
+            progress: 进度回调 progress(stats: dict)，默认打印到控制台
+
+        Returns:
+            dict: {
+                'success': bool,
+                'run_id': str,
+                'processed': int,   # 写入新额度的用户数
+                'skipped': int,     # 缺少收入画像而跳过的用户数
+                'elapsed': float,
+                'users_per_second': float,
+                'already_finished': bool,  # run_id 对应的批次此前已完成，本次未做任何处理
+                'message': str
+            }
+        """
+        progress = progress or self._print_progress
+        conn = self.get_connection()
+
+        try:
+            self.ensure_schema(conn)
+            cursor = conn.cursor()
+
+            # 1. 确定批次与断点
+            existing = None
+            if run_id:
+                cursor.execute('''
+                    SELECT run_id, last_user_id, processed, skipped, finished_at
+                    FROM credit_rescore_run
+                    WHERE run_id = ?
+                ''', (run_id,))
+                existing = cursor.fetchone()
+                if existing and existing['finished_at'] is not None:
+                    print(f"⚠️ 重评分批次 {run_id} 已于 {existing['finished_at']} 完成，不再重复执行")
+                    return {
+                        'success': True,
+                        'run_id': run_id,
+                        'processed': existing['processed'],
+                        'skipped': existing['skipped'],
+                        'elapsed': 0.0,
+                        'users_per_second': 0.0,
+                        'already_finished': True,
+                        'message': f'重评分批次 {run_id} 已完成（更新{existing["processed"]}个用户，跳过{existing["skipped"]}个），未重复执行'
+                    }
+            elif resume:
+                existing = self._find_unfinished_run(cursor)
+
+            if existing:
+                run_id = existing['run_id']
+                last_user_id = existing['last_user_id']
+                processed = existing['processed']
+                skipped = existing['skipped']
+                print(f"🔁 继续重评分批次 {run_id}，从用户ID {last_user_id} 之后开始")
+            else:
+                run_id = run_id or datetime.now().strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:6]
+                last_user_id, processed, skipped = 0, 0, 0
+                self._start_run(cursor, run_id)
+                conn.commit()
+                print(f"🚀 开始重评分批次 {run_id}")
+
+            cursor.execute('SELECT COUNT(*) AS total FROM user WHERE id > ?', (last_user_id,))
+            remaining_total = cursor.fetchone()['total']
+            start = time.perf_counter()
+            done_this_run = 0
+
+            # 2. 分块处理
+            while True:
+                chunk = self._fetch_chunk(cursor, last_user_id)
+                if not chunk:
+                    break
+
+                scorable = [r for r in chunk if r['total_income'] is not None and r['balance'] is not None]
+                skipped += len(chunk) - len(scorable)
+
+                rows = []
+                if scorable:
+                    result = self.credit_service.predict_many(
+                        [r['total_income'] for r in scorable],
+                        [r['balance'] for r in scorable]
+                    )
+                    if not result['success']:
+                        raise RuntimeError(result['message'])
+
+                    now = datetime.now()
+                    for record, limit in zip(scorable, result['credit_limit'].tolist()):
+                        available = max(limit - float(record['total_consume']), 0.0)
+                        rows.append((record['user_id'], limit, round(available, 2), now))
+
+                # 3. 写入新额度 + 更新断点（同一事务，保证可恢复）
+                last_user_id = chunk[-1]['user_id']
+                processed += len(rows)
+                cursor.executemany('''
+                    INSERT INTO credit (user_id, total_limit, available_limit, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+                cursor.execute('''
+                    UPDATE credit_rescore_run
+                    SET last_user_id = ?, processed = ?, skipped = ?, updated_at = ?
+                    WHERE run_id = ?
+                ''', (last_user_id, processed, skipped, datetime.now(), run_id))
+                conn.commit()
+
+                done_this_run += len(chunk)
+                elapsed = time.perf_counter() - start
+                progress({
+                    'run_id': run_id,
+                    'done': done_this_run,
+                    'total': remaining_total,
+                    'processed': processed,
+                    'skipped': skipped,
+                    'last_user_id': last_user_id,
+                    'elapsed': elapsed
+                })
+
+            # 4. 标记完成
+            cursor.execute('''
+                UPDATE credit_rescore_run
+                SET finished_at = ?, updated_at = ?
+                WHERE run_id = ?
+            ''', (datetime.now(), datetime.now(), run_id))
+            conn.commit()
+
+            elapsed = time.perf_counter() - start
+            rate = done_this_run / elapsed if elapsed > 0 else 0.0
+            return {
+                'success': True,
+                'run_id': run_id,
+                'processed': processed,
+                'skipped': skipped,
+                'elapsed': elapsed,
+                'users_per_second': rate,
+                'already_finished': False,
+                'message': f'重评分完成 - 更新{processed}个用户，跳过{skipped}个，{rate:,.0f} 用户/秒'
+            }
+
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 额度重评分失败: {str(e)}")
+            return {
+                'success': False,
+                'run_id': run_id,
+                'message': f'额度重评分失败: {str(e)}'
+            }
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _print_progress(stats):
+        """默认进度输出"""
+        done, total, elapsed = stats['done'], stats['total'], stats['elapsed']
+        rate = done / elapsed if elapsed > 0 else 0.0
+        percent = done / total * 100 if total else 100.0
+        eta = (total - done) / rate if rate > 0 else 0.0
+        print(f"📊 [{stats['run_id']}] {done}/{total} ({percent:.1f}%) "
+              f"更新{stats['processed']} 跳过{stats['skipped']} "
+              f"{rate:,.0f} 用户/秒 预计剩余{eta:.1f}s")
+
+
+def main(argv=None):
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='信用额度夜间重评分')
+    parser.add_argument('--db', default='instance/fintech.db', help='数据库路径')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='每块处理的用户数')
+    parser.add_argument('--model', default='models/xgboost_simple_model.pkl', help='模型文件路径')
+    parser.add_argument('--backend', choices=['xgboost', 'numpy'], default='numpy', help='推理后端')
+    parser.add_argument('--run-id', default=None, help='指定批次ID（继续某个未完成批次）')
+    parser.add_argument('--no-resume', action='store_true', help='不继续未完成批次，重新开始')
+    args = parser.parse_args(argv)
+
+    pipeline = CreditRescorePipeline(
+        db_path=args.db,
+        credit_service=CreditLimitService(model_path=args.model, backend=args.backend),
+        chunk_size=args.chunk_size
+    )
+    result = pipeline.run(run_id=args.run_id, resume=not args.no_resume)
+    print(('✅ ' if result['success'] else '❌ ') + result['message'])
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
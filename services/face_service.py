@@ -189,6 +189,34 @@ class FaceRecognitionService:
                 'message': f'注册失败: {str(e)}'
             }
 
+    def find_best_match(self, current_encoding, all_users_encodings):
+        """
+        在已注册用户中查找与当前人脸特征最相似的匹配
+
+        Args:
+            current_encoding: 当前人脸特征
+            all_users_encodings: 所有用户的人脸特征（格式同 search_face）
+
+        Returns:
+            tuple: (user_id, similarity)，没有匹配时为 (None, 0)
+        """
+        best_match = None
+        best_similarity = 0
+
+        for user_data in all_users_encodings:
+            user_id = user_data['user_id']
+            known_encoding = user_data['encoding']
+
+            # 比对人脸
+            compare_result = self.compare_faces(known_encoding, current_encoding)
+
+            if compare_result['success'] and compare_result['is_match']:
+                if compare_result['similarity'] > best_similarity:
+                    best_similarity = compare_result['similarity']
+                    best_match = user_id
+
+        return best_match, best_similarity
+
     def search_face(self, image_base64, all_users_encodings):
         """
         搜索匹配的人脸（登录时使用）
@@ -222,20 +250,7 @@ class FaceRecognitionService:
             current_encoding = extract_result['encoding']
 
             # 与所有已注册用户比对
-            best_match = None
-            best_similarity = 0
-
-            for user_data in all_users_encodings:
-                user_id = user_data['user_id']
-                known_encoding = user_data['encoding']
-
-                # 比对人脸
-                compare_result = self.compare_faces(known_encoding, current_encoding)
-
-                if compare_result['success'] and compare_result['is_match']:
-                    if compare_result['similarity'] > best_similarity:
-                        best_similarity = compare_result['similarity']
-                        best_match = user_id
+            best_match, best_similarity = self.find_best_match(current_encoding, all_users_encodings)
 
             if best_match:
                 return {
@@ -0,0 +1,126 @@
+"""
+FAQ 匹配引擎 - 从 FAQ 文件加载常见问题，启动时构建一次多关键词自动机和 TF-IDF 检索索引
+
+- match: 关键词精确匹配，一遍扫描返回所有命中的主题并按命中次数排序
+- retrieve: 字符 n-gram TF-IDF 向量检索，处理没有命中关键词的近似问法
+"""
+
+import json
+import os
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utils.keyword_matcher import KeywordAutomaton
+
+DEFAULT_FAQ_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'fintech_faq.json')
+
+
+class FAQEngine:
+    """常见问题匹配引擎"""
+
+    def __init__(self, entries):
+        """
+        参数:
+            entries: FAQ 列表 [{'topic', 'answer', 'keywords': [...], 'questions': [...]}]，
+                     列表顺序即同分时的优先级；questions（常见问法）可选，用于向量检索
+        """
+        self.entries = list(entries)
+        self._automaton = KeywordAutomaton()
+        for index, entry in enumerate(self.entries):
+            # 同一条 FAQ 的重复关键词只计一次
+            for keyword in dict.fromkeys(k.lower() for k in entry.get('keywords', [])):
+                self._automaton.add(keyword, index)
+        self._automaton.build()
+        self.index = FAQVectorIndex(self.entries)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_FAQ_PATH):
+        """
+        从 JSON 文件加载 FAQ
+
+        文件格式: {"faqs": [{"topic": ..., "answer": ..., "keywords": [...], "questions": [...]}]}
+        """
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['faqs'] if isinstance(data, dict) else data)
+
+    def match(self, query, limit=None):
+        """
+        匹配查询
+
+        参数:
+            query: 用户问题
+            limit: 最多返回的主题数（None 表示全部）
+
+        返回:
+            list[dict]: [{'topic', 'answer', 'hits'}]，按命中次数降序，同分按 FAQ 顺序
+        """
+        counts = self._automaton.count(query.lower())
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [
+            {'topic': self.entries[index]['topic'], 'answer': self.entries[index]['answer'], 'hits': hits}
+            for index, hits in ranked
+        ]
+
+    def retrieve(self, query, min_score=0.0, limit=1):
+        """
+        向量检索（见 FAQVectorIndex.search）
+
+        返回:
+            list[dict]: [{'topic', 'answer', 'score'}]，按相似度降序
+        """
+        return [
+            {'topic': self.entries[index]['topic'], 'answer': self.entries[index]['answer'], 'score': score}
+            for index, score in self.index.search(query, min_score=min_score, limit=limit)
+        ]
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class FAQVectorIndex:
+    """
+    FAQ 字符 n-gram TF-IDF 检索索引
+
+    每条 FAQ 的主题、关键词、常见问法和答案拼成一个文档，按字符 2-3 gram 计算 TF-IDF，
+    L2 归一化后存为稀疏矩阵（条目数 × 特征数）。查询向量与矩阵做一次稀疏矩阵-向量乘法即得到全部余弦相似度。
+    """
+
+    def __init__(self, entries, ngram_range=(2, 3)):
+        """
+        参数:
+            entries: FAQ 列表（同 FAQEngine）
+            ngram_range: 字符 n-gram 范围（不含单字：“怎”“么”“多”等常用字会让无关问题也得到较高相似度）
+        """
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=ngram_range,
+                                          lowercase=True, sublinear_tf=True)
+        self.matrix = self.vectorizer.fit_transform([self._document(e) for e in entries]).tocsr()
+
+    @staticmethod
+    def _document(entry):
+        parts = [entry.get('topic', '')]
+        parts.extend(entry.get('keywords', []))
+        parts.extend(entry.get('questions', []))
+        parts.append(entry.get('answer', ''))
+        return ' '.join(parts)
+
+    def search(self, query, min_score=0.0, limit=1):
+        """
+        检索最相似的 FAQ
+
+        参数:
+            query: 用户问题
+            min_score: 最低余弦相似度，低于此值的结果被丢弃
+            limit: 最多返回的条目数
+
+        返回:
+            list[tuple]: [(条目下标, 相似度)]，按相似度降序
+        """
+        vector = self.vectorizer.transform([query])
+        if not vector.nnz:
+            return []
+        scores = (self.matrix @ vector.T).toarray().ravel()
+        order = scores.argsort()[::-1][:limit]
+        return [(int(i), float(scores[i])) for i in order if scores[i] > 0 and scores[i] >= min_score]
@@ -0,0 +1,127 @@
+"""
+Ollama 健康监控 - 后台线程定期探测 /api/tags，配合熔断器判断 Ollama 是否可用
+
+服务启动时不再同步等待探测结果；Ollama 被判定不可用期间，推荐生成直接跳过模型调用。
+"""
+
+import threading
+import time
+
+from utils.concurrency import CircuitBreaker
+
+
+class OllamaHealthMonitor:
+    """Ollama 可用性监控"""
+
+    def __init__(self, session, ollama_url, model_name, interval=30.0, down_interval=5.0,
+                 probe_timeout=3.0, failure_threshold=3, recovery_timeout=30.0):
+        """
+        参数:
+            session: 访问 Ollama 的 requests.Session
+            ollama_url: Ollama服务地址
+            model_name: 模型名称（仅用于日志）
+            interval: 正常状态下的探测间隔（秒）
+            down_interval: 不可用状态下的探测间隔（秒，尽快发现恢复）
+            probe_timeout: 单次探测超时（秒）
+            failure_threshold: 实际调用连续失败多少次后熔断
+            recovery_timeout: 熔断后多久放行一个试探请求（秒）
+        """
+        self.session = session
+        self.ollama_url = ollama_url
+        self.model_name = model_name
+        self.interval = interval
+        self.down_interval = down_interval
+        self.probe_timeout = probe_timeout
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+
+        self.last_probe_at = None
+        self.last_probe_ok = None
+        self.last_probe_ms = None
+        self._probe_tripped = False  # 熔断是否由探测失败触发（而不是实际调用失败）
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # ==================== 状态 ====================
+
+    def allow_request(self):
+        """是否可以调用模型（不可用时立即返回 False）"""
+        return self.breaker.allow_request()
+
+    def record_success(self):
+        self._probe_tripped = False
+        self.breaker.record_success()
+
+    def record_failure(self):
+        self._probe_tripped = False
+        self.breaker.record_failure()
+
+    # ==================== 探测 ====================
+
+    def check_now(self):
+        """
+        同步探测一次
+
+        返回:
+            bool: Ollama 是否可用
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(f"{self.ollama_url}/api/tags", timeout=self.probe_timeout)
+            ok = response.status_code == 200
+            detail = f"响应异常: {response.status_code}"
+        except Exception as e:
+            ok = False
+            detail = f"连接失败: {e}"
+
+        previous = self.last_probe_ok
+        self.last_probe_at = time.time()
+        self.last_probe_ok = ok
+        self.last_probe_ms = (time.perf_counter() - start) * 1000
+
+        if ok:
+            # /api/tags 正常只说明服务在线：探测失败造成的熔断直接恢复；
+            # 实际调用失败造成的熔断只放行一个试探请求，由 /api/chat 的结果决定是否恢复
+            if self._probe_tripped:
+                self._probe_tripped = False
+                self.breaker.record_success()
+            else:
+                self.breaker.half_open()
+            if previous is not True:
+                print(f"✅ Ollama服务连接成功，模型: {self.model_name}")
+        else:
+            # 探测失败即确认不可用，直接熔断
+            self._probe_tripped = True
+            self.breaker.trip()
+            if previous is not False:
+                print(f"⚠️ Ollama服务{detail}")
+                print("💡 提示: 请确保Ollama已安装并运行 (ollama serve)")
+        return ok
+
+    def start(self):
+        """启动后台探测线程（立即进行第一次探测，不阻塞调用方）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='ollama-health', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台探测线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            ok = self.check_now()
+            self._stop_event.wait(self.interval if ok else self.down_interval)
+
+    def stats(self):
+        """健康状态统计"""
+        return {
+            'available': self.breaker.state != CircuitBreaker.OPEN,
+            'last_probe_ok': self.last_probe_ok,
+            'last_probe_ms': self.last_probe_ms,
+            'last_probe_at': self.last_probe_at,
+            'breaker': self.breaker.stats()
+        }
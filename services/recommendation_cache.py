@@ -0,0 +1,203 @@
+"""
+阿布扎比推荐缓存 - 按主题缓存推荐结果，过期后先返回旧数据再后台刷新（stale-while-revalidate）
+
+- 新鲜期（ttl）内：直接返回缓存
+- 过期但仍在可用期（ttl + stale_ttl）内：返回旧数据，同时在后台刷新该主题
+- 超出可用期或从未生成：不阻塞请求，返回其他主题的缓存或默认推荐，并在后台生成
+- 后台刷新线程定期预生成所有主题，接口始终从内存返回
+"""
+
+import random
+import threading
+import time
+
+
+class RecommendationCache:
+    """按主题缓存 AbuDhabiService 生成的推荐"""
+
+    def __init__(self, service, ttl=1800, stale_ttl=6 * 3600, refresh_interval=60):
+        """
+        参数:
+            service: AbuDhabiService 实例
+            ttl: 新鲜期（秒）
+            stale_ttl: 过期后仍可返回旧数据的时长（秒）
+            refresh_interval: 后台刷新线程的检查间隔（秒）
+        """
+        self.service = service
+        self.topics = list(service.TOPICS)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_interval = refresh_interval
+
+        self._entries = {}  # topic -> (recommendations, generated_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_success = 0
+        self.refresh_failures = 0
+
+    # ==================== 读取 ====================
+
+    def get(self, topic=None):
+        """
+        获取推荐（不会阻塞在搜索或模型调用上）
+
+        参数:
+            topic: 指定主题（默认随机选择一个可用主题）
+
+        返回:
+            list: 推荐列表
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            if topic is None:
+                # 优先在有可用缓存的主题中随机选择
+                usable = [t for t, (_, at) in self._entries.items() if now - at < self.ttl + self.stale_ttl]
+                topic = random.choice(usable) if usable else random.choice(self.topics)
+
+            entry = self._entries.get(topic)
+            age = now - entry[1] if entry else None
+
+            if entry and age < self.ttl:
+                self.hits += 1
+                return entry[0]
+
+            if entry and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                result = entry[0]
+            else:
+                self.misses += 1
+                result = None
+
+        # 过期或缺失：后台刷新，不阻塞当前请求
+        self.refresh_async(topic)
+        return result if result is not None else self.service._get_default_recommendations()
+
+    def get_cached(self, topic):
+        """
+        返回主题的缓存（供流式接口使用）
+
+        新鲜时直接返回；过期但仍在可用期内时返回旧数据并在后台刷新（与 get 相同）；
+        超出可用期或从未生成时返回 None，由调用方当场生成（不触发后台刷新，避免重复生成）
+
+        返回:
+            tuple: (推荐列表, 'fresh' / 'stale')，没有可用缓存时为 (None, None)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(topic)
+            age = now - entry[1] if entry else None
+            if entry and age < self.ttl:
+                self.hits += 1
+                return entry[0], 'fresh'
+            if not entry or age >= self.ttl + self.stale_ttl:
+                self.misses += 1
+                return None, None
+            self.stale_hits += 1
+            result = entry[0]
+
+        self.refresh_async(topic)
+        return result, 'stale'
+
+    def put(self, topic, recommendations):
+        """写入一个主题的推荐（如流式接口生成完毕后回填缓存）"""
+        if not recommendations:
+            return
+        with self._lock:
+            self._entries[topic] = (list(recommendations), time.monotonic())
+
+    # ==================== 刷新 ====================
+
+    def refresh_async(self, topic):
+        """在后台线程刷新一个主题（同一主题同时只刷新一次）"""
+        with self._lock:
+            if topic in self._refreshing:
+                return False
+            self._refreshing.add(topic)
+
+        threading.Thread(target=self._refresh_topic, args=(topic,), daemon=True).start()
+        return True
+
+    def refresh(self, topic):
+        """同步刷新一个主题，返回是否成功"""
+        with self._lock:
+            if topic in self._refreshing:
+                return False
+            self._refreshing.add(topic)
+        return self._refresh_topic(topic)
+
+    def _refresh_topic(self, topic):
+        """生成并写入缓存；失败时保留旧数据"""
+        try:
+            recommendations = self.service.generate_topic_recommendations(topic)
+            if not recommendations:
+                raise ValueError('搜索无结果')
+
+            with self._lock:
+                self._entries[topic] = (recommendations, time.monotonic())
+                self.refresh_success += 1
+            print(f"✅ 推荐缓存已刷新: {topic}")
+            return True
+
+        except Exception as e:
+            with self._lock:
+                self.refresh_failures += 1
+            print(f"⚠️ 推荐缓存刷新失败: {topic} - {str(e)}")
+            return False
+
+        finally:
+            with self._lock:
+                self._refreshing.discard(topic)
+
+    # ==================== 后台刷新线程 ====================
+
+    def start(self):
+        """启动后台刷新线程（预生成所有主题，并在接近过期时提前刷新）"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._refresh_loop, name='recommendation-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """停止后台刷新线程"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            for topic in self.topics:
+                if self._stop_event.is_set():
+                    break
+                if self._needs_refresh(topic):
+                    self.refresh(topic)
+            self._stop_event.wait(self.refresh_interval)
+
+    def _needs_refresh(self, topic):
+        """缺失或已度过新鲜期的 80% 时提前刷新"""
+        with self._lock:
+            entry = self._entries.get(topic)
+        return entry is None or time.monotonic() - entry[1] >= self.ttl * 0.8
+
+    # ==================== 统计 ====================
+
+    def stats(self):
+        """缓存统计"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'topics': {t: round(now - at, 1) for t, (_, at) in self._entries.items()},  # 各主题缓存年龄（秒）
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refresh_success': self.refresh_success,
+                'refresh_failures': self.refresh_failures,
+                'refreshing': sorted(self._refreshing)
+            }
@@ -1,8 +1,31 @@
 # register.py
 import sqlite3
-import random
 from datetime import datetime
-from utils.database import Database
+from services.card_allocator import CardPrefixAllocator
+from utils.database import Database, INCOME_PROFILE_DDL
+
+# 新用户初始WECoin与抽奖次数
+INITIAL_WECOIN = 50
+INITIAL_REDEEM_COUNT = 5
+
+
+def format_card_number(card_prefix, card_suffix):
+    """完整卡号：前8位(4+4) + 后8位(4+4)"""
+    return f"{card_prefix[:4]} {card_prefix[4:]} {card_suffix[:4]} {card_suffix[4:]}"
+
+
+def default_user_info(username):
+    """新用户的固定资料（使用传入的用户名）"""
+    return {
+        'username': username,
+        'region': 'United Arab Emirates',
+        'location_city': 'Abu Dhabi',
+        'avatar_initial': username[0].upper() if username else 'Y',
+        'landmark_image': 'halifata.png',
+        'phone': '+971-50-1234567',
+        'email': f'{username.lower()}@example.com'
+    }
+
 
 class RegistrationManager:
     """注册管理器，处理用户注册相关逻辑"""
@@ -10,23 +33,7 @@ class RegistrationManager:
     def __init__(self, db_path='instance/fintech.db'):
         self.db_path = db_path
         self.database = Database(db_path)
-    
-    def generate_card_prefix(self):
-        """生成不重复的8位卡号前缀"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        while True:
-            # 生成8位随机数字
-            prefix = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-            
-            # 检查是否已存在
-            cursor.execute('SELECT id FROM user WHERE card_number LIKE ?', (f"{prefix}%",))
-            if not cursor.fetchone():
-                conn.close()
-                return prefix
-        
-        conn.close()
+        self.card_allocator = CardPrefixAllocator(db_path)
     
     def get_next_user_id(self):
         """获取下一个可用的用户ID"""
@@ -41,7 +48,8 @@ class RegistrationManager:
         conn.close()
         return next_user_id
     
-    def complete_registration(self, card_suffix, expected_return_day, username='Yogurt', credit_limit=100000):
+    def complete_registration(self, card_suffix, expected_return_day, username='Yogurt', credit_limit=100000,
+                              total_income=None, balance=None):
         """
         完成注册流程，创建新用户
 
@@ -50,6 +58,8 @@ class RegistrationManager:
             expected_return_day: 返程日期 (YYYY-MM-DD格式)
             username: 用户名（默认为Yogurt）
             credit_limit: 预测的信用额度（默认100000）
+            total_income: 银行流水总收入（可选，保存后用于额度重评分）
+            balance: 余额证明金额（可选）
 
         Returns:
             dict: 包含注册结果的字典
@@ -64,29 +74,17 @@ class RegistrationManager:
                     'message': '卡号后缀必须是8位数字'
                 }
 
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            cursor = conn.cursor()
+            # 立即获取写锁：前缀分配与创建用户在同一事务中，注册失败时前缀一并回滚
+            cursor.execute('BEGIN IMMEDIATE')
+
             # 生成完整卡号 - 保持4+4格式
-            card_prefix = self.generate_card_prefix()
-            # 将前8位也格式化为4+4格式
-            formatted_prefix = f"{card_prefix[:4]} {card_prefix[4:]}"
-            # 将后8位格式化为4+4格式
-            formatted_suffix = f"{card_suffix_clean[:4]} {card_suffix_clean[4:]}"
-            # 完整卡号：前8位(4+4) + 后8位(4+4)
-            full_card_number = f"{formatted_prefix} {formatted_suffix}"
+            card_prefix = self.card_allocator.allocate(conn)
+            full_card_number = format_card_number(card_prefix, card_suffix_clean)
 
             # 用户信息（使用传入的用户名）
-            avatar_initial = username[0].upper() if username else 'Y'
-            fixed_user_info = {
-                'username': username,
-                'region': 'United Arab Emirates',
-                'location_city': 'Abu Dhabi',
-                'avatar_initial': avatar_initial,
-                'landmark_image': 'halifata.png',
-                'phone': '+971-50-1234567',
-                'email': f'{username.lower()}@example.com'
-            }
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            fixed_user_info = default_user_info(username)
             
             # 创建新用户 - 让数据库自动生成ID
             cursor.execute('''
@@ -103,14 +101,15 @@ class RegistrationManager:
                 fixed_user_info['landmark_image'],
                 fixed_user_info['phone'],
                 fixed_user_info['email'],
-                50,  # 初始WECoin
-                5,    # 初始抽奖次数
+                INITIAL_WECOIN,
+                INITIAL_REDEEM_COUNT,
                 expected_return_day,
                 datetime.now()
             ))
             
             # 获取新创建的用户ID
             new_user_id = cursor.lastrowid
+            self.card_allocator.assign(conn, card_prefix, new_user_id)
             
             # 创建授信额度记录（使用预测的额度）
             cursor.execute('''
@@ -118,6 +117,14 @@ class RegistrationManager:
                 VALUES (?, ?, ?, ?)
             ''', (new_user_id, credit_limit, credit_limit, datetime.now()))
             
+            # 保存收入画像（额度重评分时使用）
+            if total_income is not None and balance is not None:
+                cursor.execute(INCOME_PROFILE_DDL)
+                cursor.execute('''
+                    INSERT OR REPLACE INTO income_profile (user_id, total_income, balance, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (new_user_id, total_income, balance, datetime.now()))
+
             # 创建初始汇率记录
             cursor.execute('''
                 INSERT INTO exchange_rate (pair, value, updated_at)
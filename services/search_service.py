@@ -3,45 +3,62 @@
 使用百度搜索API（无需密钥）
 """
 
-import requests
 from datetime import datetime
-import re
+import threading
+import time
+
+from services.faq_engine import DEFAULT_FAQ_PATH, FAQEngine
+from utils.html_extract import extract_elements
+from utils.http import get_session
+from utils.metrics import track_external
 
 
 class SearchService:
     """搜索服务类 - 提供网络搜索功能"""
     
-    def __init__(self):
+    def __init__(self, base_url="https://www.baidu.com", faq_path=DEFAULT_FAQ_PATH, faq_min_score=0.15):
+        """
+        Args:
+            base_url: 百度搜索地址（压测时指向本地桩服务器）
+            faq_path: 常见问题文件（JSON），启动时加载并构建匹配自动机和向量索引
+            faq_min_score: 向量检索的最低相似度，达到即直接回答，不再进行网络搜索
+        """
         print(f"✅ 智能搜索服务初始化成功")
+        self.base_url = base_url.rstrip('/')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # 共享会话：复用到百度的 keep-alive 连接
+        self.session = get_session('search')
+        self.faq = FAQEngine.from_file(faq_path)
+        self.faq_min_score = faq_min_score
+
+        # 各回答来源的次数与耗时: keyword（关键词命中）/ vector（向量检索）/ web（网络搜索）
+        self._stats_lock = threading.Lock()
+        self._answer_counts = {'keyword': 0, 'vector': 0, 'web': 0}
+        self._answer_seconds = {'keyword': 0.0, 'vector': 0.0, 'web': 0.0}
     
     def search_baidu(self, query, num_results=5):
         """使用百度搜索"""
         try:
             # 使用百度搜索
-            search_url = f"https://www.baidu.com/s?wd={query}&rn={num_results}"
+            search_url = f"{self.base_url}/s?wd={query}&rn={num_results}"
             
-            response = requests.get(
-                search_url,
-                headers=self.headers,
-                timeout=5
-            )
+            with track_external('search'):
+                response = self.session.get(
+                    search_url,
+                    headers=self.headers,
+                    timeout=5
+                )
             
             if response.status_code == 200:
-                # 简单提取搜索结果标题
-                content = response.text
-                # 提取标题（简化版）
-                titles = re.findall(r'<h3[^>]*>(.*?)</h3>', content)
-                
+                # 只提取前 num_results 个结果标题（<h3> 及其中的链接）
                 results = []
-                for i, title in enumerate(titles[:num_results]):
-                    # 清理HTML标签
-                    clean_title = re.sub(r'<[^>]+>', '', title)
+                for item in extract_elements(response.text, 'h3', limit=num_results):
+                    href = item['href']
                     results.append({
-                        'title': clean_title,
-                        'url': f'https://www.baidu.com/s?wd={query}'
+                        'title': item['text'],
+                        'url': href if href.startswith(('http://', 'https://')) else f'https://www.baidu.com/s?wd={query}'
                     })
                 
                 return results
@@ -57,49 +74,38 @@ class SearchService:
         搜索Fintech2026相关信息
         返回预设的常见问题答案
         """
-        # 预设的常见问题答案
-        faq = {
-            '消费记录': {
-                'answer': '您可以在主页向下滚动查看"消费记录"部分，那里会显示您的所有交易记录。',
-                'keywords': ['消费', '记录', '交易', '流水', '账单']
-            },
-            '信用额度': {
-                'answer': '您的信用额度显示在主页的信用卡上。额度是根据您上传的银行流水和余额证明通过AI模型预测得出的。',
-                'keywords': ['额度', '信用', '授信', '限额']
-            },
-            '盲盒抽奖': {
-                'answer': '在主页下方有"盲盒抽奖"功能，消耗WECoin可以抽取各种奖品。点击"翻牌"按钮即可参与。',
-                'keywords': ['盲盒', '抽奖', '翻牌', '奖品', 'wecoin']
-            },
-            'WECoin': {
-                'answer': 'WECoin是系统的虚拟货币，可以通过消费获得，用于参与盲盒抽奖等活动。您的WECoin余额显示在主页顶部。',
-                'keywords': ['wecoin', '积分', '货币', '余额']
-            },
-            '修改信息': {
-                'answer': '点击主页右上角的设置图标（齿轮），可以修改用户名、密码，或退出登录。',
-                'keywords': ['修改', '设置', '用户名', '密码', '退出']
-            },
-            '注册': {
-                'answer': '注册需要上传护照、入关小票、银行流水、余额证明等文件，并录入Face ID。完成后系统会自动评估您的信用额度。',
-                'keywords': ['注册', '开户', '申请', '办理']
+        start = time.perf_counter()
+
+        # 常见问题：自动机一次扫描找出所有命中的主题，取命中次数最多的
+        matches = self.faq.match(query)
+        if matches:
+            self._record_answer('keyword', start)
+            return {
+                'success': True,
+                'response': matches[0]['answer'],
+                'source': 'Fintech2026 FAQ',
+                'search_results': [],
+                'related_topics': [m['topic'] for m in matches[1:]],
+                'timestamp': datetime.now().isoformat()
             }
-        }
-        
-        # 查找匹配的问题
-        query_lower = query.lower()
-        for topic, info in faq.items():
-            for keyword in info['keywords']:
-                if keyword in query_lower:
-                    return {
-                        'success': True,
-                        'response': info['answer'],
-                        'source': 'Fintech2026 FAQ',
-                        'search_results': [],
-                        'timestamp': datetime.now().isoformat()
-                    }
-        
+
+        # 没有命中关键词：向量检索近似问法，足够相似时直接回答
+        retrieved = self.faq.retrieve(query, min_score=self.faq_min_score)
+        if retrieved:
+            self._record_answer('vector', start)
+            return {
+                'success': True,
+                'response': retrieved[0]['answer'],
+                'source': 'Fintech2026 FAQ',
+                'search_results': [],
+                'related_topics': [],
+                'score': retrieved[0]['score'],
+                'timestamp': datetime.now().isoformat()
+            }
+
         # 如果没有匹配，进行网络搜索
         search_results = self.search_baidu(query)
+        self._record_answer('web', start)
 
         if search_results:
             response_text = f"关于「{query}」的搜索结果如下，请查看参考资料。"
@@ -114,6 +120,33 @@ class SearchService:
             'timestamp': datetime.now().isoformat()
         }
     
+    def _record_answer(self, source, start):
+        with self._stats_lock:
+            self._answer_counts[source] += 1
+            self._answer_seconds[source] += time.perf_counter() - start
+
+    def faq_stats(self):
+        """
+        FAQ 回答统计
+
+        Returns:
+            dict: {
+                'answers': 各来源次数 {'keyword', 'vector', 'web'},
+                'avg_ms': 各来源平均耗时,
+                'fallback_rate': 落到网络搜索的比例
+            }
+        """
+        with self._stats_lock:
+            total = sum(self._answer_counts.values())
+            return {
+                'answers': dict(self._answer_counts),
+                'avg_ms': {
+                    source: self._answer_seconds[source] / count * 1000 if count else 0.0
+                    for source, count in self._answer_counts.items()
+                },
+                'fallback_rate': self._answer_counts['web'] / total if total else 0.0
+            }
+
     def check_service_status(self):
         """检查服务状态"""
         return {
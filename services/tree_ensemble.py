@@ -0,0 +1,255 @@
+"""
+XGBoost 树模型的 NumPy 推理后端
+
+把 Booster 的所有树展开成扁平数组（分裂特征 / 阈值 / 左右子节点 / 缺失值方向 / 叶子值），
+对一批样本同时沿所有树逐层下降，一次向量化计算得到预测值，不依赖 xgboost 运行时。
+
+特征数很少时（如额度模型只有 收入、余额 两个特征），所有树的分裂阈值把特征空间切成有限个格子，
+同一格子内所有样本的预测值完全相同。compile_lookup_table() 预先计算每个格子的预测值，
+之后预测只需对每个特征做一次 searchsorted 再查表。
+
+仅支持数值特征、单目标、恒等输出变换的回归目标（如 reg:squarederror）。
+"""
+
+import json
+
+import numpy as np
+
+# 输出不做变换的目标函数（预测值 = base_score + 叶子值之和）
+IDENTITY_OBJECTIVES = {
+    'reg:squarederror',
+    'reg:squaredlogerror',
+    'reg:pseudohubererror',
+    'reg:absoluteerror',
+    'reg:linear',
+}
+
+
+class TreeEnsemble:
+    """扁平化的树集成模型（predict 接口与 XGBRegressor 一致）"""
+
+    def __init__(self, split_feature, threshold, left, right, default_left, value, roots, max_depth, base_score):
+        """
+        Args:
+            split_feature: 每个节点的分裂特征下标（叶子为0）
+            threshold: 每个节点的分裂阈值（float32，x < threshold 走左子树）
+            left / right: 左 / 右子节点的全局下标（叶子指向自身）
+            default_left: 特征缺失（NaN）时是否走左子树
+            value: 叶子节点的输出值（非叶子为0）
+            roots: 每棵树根节点的全局下标
+            max_depth: 所有树的最大深度（下降的迭代次数）
+            base_score: 全局偏置
+        """
+        self.split_feature = np.asarray(split_feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.base_score = float(base_score)
+
+        # 查表加速（compile_lookup_table 生成）
+        self.cut_points = None
+        self.lookup_table = None
+
+    @property
+    def num_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """
+        从 xgboost.Booster（或 XGBRegressor.get_booster()）构建
+
+        Raises:
+            ValueError: 模型包含不支持的结构（分类特征、多目标、非恒等目标函数等）
+        """
+        model = json.loads(booster.save_raw('json'))
+        return cls.from_json_model(model)
+
+    @classmethod
+    def from_json_model(cls, model):
+        """从 XGBoost JSON 模型（dict）构建"""
+        learner = model['learner']
+
+        objective = learner['objective']['name']
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f'不支持的目标函数: {objective}')
+
+        params = learner['learner_model_param']
+        if int(params.get('num_class', 0) or 0) > 0 or int(params.get('num_target', 1) or 1) > 1:
+            raise ValueError('只支持单目标回归模型')
+        base_score = float(str(params['base_score']).strip('[]'))
+
+        booster = learner['gradient_booster']
+        if booster['name'] != 'gbtree':
+            raise ValueError(f"不支持的 booster 类型: {booster['name']}")
+        trees = booster['model']['trees']
+
+        # 与 sklearn 接口一致：存在 best_iteration 时只使用前 best_iteration+1 轮
+        best_iteration = learner.get('attributes', {}).get('best_iteration')
+        if best_iteration is not None:
+            num_parallel = int(booster['model']['gbtree_model_param'].get('num_parallel_tree', 1))
+            trees = trees[:(int(best_iteration) + 1) * num_parallel]
+
+        split_feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+
+        for tree in trees:
+            if any(tree['split_type']):
+                raise ValueError('不支持分类特征分裂')
+
+            lc = np.asarray(tree['left_children'], dtype=np.int64)
+            rc = np.asarray(tree['right_children'], dtype=np.int64)
+            cond = np.asarray(tree['split_conditions'], dtype=np.float32)
+            n = len(lc)
+            is_leaf = lc == -1
+            own = np.arange(n)
+
+            split_feature.append(np.where(is_leaf, 0, tree['split_indices']))
+            threshold.append(np.where(is_leaf, 0.0, cond))
+            # 叶子节点指向自身，下降到叶子后保持不动
+            left.append(np.where(is_leaf, own, lc) + offset)
+            right.append(np.where(is_leaf, own, rc) + offset)
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            value.append(np.where(is_leaf, cond, 0.0))
+            roots.append(offset)
+
+            max_depth = max(max_depth, _tree_depth(lc, rc))
+            offset += n
+
+        if not trees:
+            empty = np.zeros(0)
+            return cls(empty, empty, empty, empty, empty, empty, [], 0, base_score)
+
+        return cls(
+            np.concatenate(split_feature), np.concatenate(threshold),
+            np.concatenate(left), np.concatenate(right),
+            np.concatenate(default_left), np.concatenate(value),
+            roots, max_depth, base_score
+        )
+
+    def compile_lookup_table(self, num_features, max_cells=1 << 20):
+        """
+        把整个模型编译为按阈值分格的查找表
+
+        每个特征的所有分裂阈值排序去重后得到 K 个切点，划分出 K+1 个区间，另加一个缺失值（NaN）格子。
+        在同一格子内，每个节点上 x < threshold 的判断结果都相同，所以查表结果与逐树计算逐位一致。
+
+        Args:
+            num_features: 特征数
+            max_cells: 查找表最大格子数，超出时不编译（仍使用逐树计算）
+
+        Returns:
+            bool: 是否编译成功
+        """
+        internal = self.left != np.arange(len(self.left))
+        cut_points = []
+        for f in range(num_features):
+            cuts = np.unique(self.threshold[internal & (self.split_feature == f)])
+            cut_points.append(cuts.astype(np.float32))
+
+        # 每个特征: K+1 个区间 + 1 个 NaN 格子
+        shape = tuple(len(cuts) + 2 for cuts in cut_points)
+        if int(np.prod(shape, dtype=np.int64)) > max_cells:
+            return False
+
+        # 每个格子的代表值：区间 0 用 -inf，区间 b 用第 b 个切点本身，NaN 格子用 NaN
+        representatives = [
+            np.concatenate(([-np.inf], cuts, [np.nan])).astype(np.float32)
+            for cuts in cut_points
+        ]
+        grid = np.stack([g.ravel() for g in np.meshgrid(*representatives, indexing='ij')], axis=1)
+
+        self.lookup_table = self._predict_traverse(grid).reshape(shape)
+        self.cut_points = cut_points
+        return True
+
+    def predict(self, features_array):
+        """
+        批量预测
+
+        Args:
+            features_array: (N, num_features) 数组，NaN 表示缺失
+
+        Returns:
+            np.ndarray: (N,) float32 预测值
+        """
+        x = np.asarray(features_array, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+
+        if self.lookup_table is not None:
+            return self._predict_lookup(x)
+        return self._predict_traverse(x)
+
+    def _predict_lookup(self, x):
+        """查表预测"""
+        bins = []
+        for f, cuts in enumerate(self.cut_points):
+            column = x[:, f]
+            b = np.searchsorted(cuts, column, side='right')
+            b[np.isnan(column)] = len(cuts) + 1
+            bins.append(b)
+        return self.lookup_table[tuple(bins)]
+
+    def _predict_traverse(self, x):
+        """沿所有树逐层下降的向量化预测"""
+        if self.num_trees == 0:
+            return np.full(len(x), self.base_score, dtype=np.float32)
+
+        rows = np.arange(len(x))[None, :]
+        # 每棵树中每个样本的当前节点 (num_trees, N)
+        node = np.repeat(self.roots[:, None], len(x), axis=1)
+
+        for _ in range(self.max_depth):
+            feature_value = x[rows, self.split_feature[node]]
+            go_left = np.where(np.isnan(feature_value),
+                               self.default_left[node],
+                               feature_value < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+
+        # 与 XGBoost 相同：从 base_score 开始按树的顺序以 float32 累加，保证结果逐位一致
+        margin = np.full(len(x), self.base_score, dtype=np.float32)
+        for leaf_values in self.value[node]:
+            margin += leaf_values
+        return margin
+
+    def save(self, path):
+        """保存为 .npz 文件"""
+        np.savez(
+            path,
+            split_feature=self.split_feature, threshold=self.threshold,
+            left=self.left, right=self.right, default_left=self.default_left,
+            value=self.value, roots=self.roots,
+            meta=np.array([self.max_depth, self.base_score], dtype=np.float64)
+        )
+
+    @classmethod
+    def load(cls, path):
+        """从 save() 生成的 .npz 文件加载（不需要 xgboost；查找表需重新编译）"""
+        with np.load(path) as data:
+            max_depth, base_score = data['meta']
+            return cls(
+                data['split_feature'], data['threshold'], data['left'], data['right'],
+                data['default_left'], data['value'], data['roots'], int(max_depth), base_score
+            )
+
+
+def _tree_depth(left_children, right_children):
+    """计算单棵树的深度（根到最深叶子的边数）"""
+    depth = 0
+    frontier = [0]
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            if left_children[node] != -1:
+                next_frontier.append(left_children[node])
+                next_frontier.append(right_children[node])
+        if next_frontier:
+            depth += 1
+        frontier = next_frontier
+    return depth
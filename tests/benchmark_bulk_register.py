@@ -0,0 +1,70 @@
+"""
+批量注册基准：逐个 complete_registration vs BulkRegistrationImporter
+
+- single: 逐个调用 RegistrationManager.complete_registration（每个用户一个事务，外加一条汇率记录）
+- bulk:   写出 CSV 后用 BulkRegistrationImporter.import_file 导入（每块一个事务，executemany）
+
+用法:
+    python tests/benchmark_bulk_register.py --users 50000 --single 1000 --chunk-size 5000
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.bulk_register import BulkRegistrationImporter
+from services.register import RegistrationManager
+from tests.helpers import create_registration_schema, make_applicants, write_csv
+
+
+def bench_single(tmp, applicants):
+    db_path = os.path.join(tmp, 'single.db')
+    create_registration_schema(db_path)
+    manager = RegistrationManager(db_path)
+    start = time.perf_counter()
+    for a in applicants:
+        result = manager.complete_registration(a['card_suffix'], a['expected_return_day'], username=a['username'],
+                                               credit_limit=a['credit_limit'], total_income=a['total_income'],
+                                               balance=a['balance'])
+        assert result['success'], result['message']
+    elapsed = time.perf_counter() - start
+    print(f"single  {len(applicants):>8} 个用户  {elapsed:>7.2f}s  {len(applicants) / elapsed:>10,.0f} 行/秒")
+
+
+def bench_bulk(tmp, applicants, chunk_size):
+    db_path = os.path.join(tmp, 'bulk.db')
+    csv_path = os.path.join(tmp, 'applicants.csv')
+    create_registration_schema(db_path)
+    write_csv(csv_path, applicants)
+
+    result = BulkRegistrationImporter(db_path, chunk_size=chunk_size).import_file(csv_path, progress=lambda s: None)
+    assert result['success'], result['message']
+
+    conn = sqlite3.connect(db_path)
+    users, distinct_cards = conn.execute('SELECT COUNT(*), COUNT(DISTINCT card_number) FROM user').fetchone()
+    conn.close()
+    print(f"bulk    {result['imported']:>8} 个用户  {result['elapsed']:>7.2f}s  {result['rows_per_second']:>10,.0f} 行/秒"
+          f"  （块大小 {chunk_size}，卡号不重复: {users == distinct_cards}）")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量注册基准')
+    parser.add_argument('--users', type=int, default=50000, help='批量导入的用户数')
+    parser.add_argument('--single', type=int, default=1000, help='逐个注册的用户数')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='每个事务导入的用户数')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.single:
+            bench_single(tmp, make_applicants(args.single))
+        bench_bulk(tmp, make_applicants(args.users), args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
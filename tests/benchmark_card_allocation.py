@@ -0,0 +1,114 @@
+"""
+卡号前缀分配基准：随机前缀 + LIKE 查重（旧实现） vs CardPrefixAllocator（Feistel 置换 + 分配表）
+
+- 旧实现每次尝试都执行 `SELECT id FROM user WHERE card_number LIKE 'xxxxxxxx%'`，没有可用索引，全表扫描
+- 新实现取 MAX(seq)（唯一索引）后插入一行，耗时与用户数无关
+
+用法:
+    python tests/benchmark_card_allocation.py --users 10000 100000 1000000 --allocations 200
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.card_allocator import CardPrefixAllocator
+
+
+def build_users(db_path, num_users, seed=7):
+    """生成只含卡号的 user 表，卡号前缀随机（模拟旧实现分配的存量用户）"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE IF NOT EXISTS user (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, card_number TEXT)')
+
+    def card_numbers():
+        for i in range(num_users):
+            digits = f'{rng.randrange(10 ** 8):08d}{rng.randrange(10 ** 8):08d}'
+            yield f'user{i}', ' '.join(digits[j:j + 4] for j in range(0, 16, 4))
+
+    conn.executemany('INSERT INTO user (username, card_number) VALUES (?, ?)', card_numbers())
+    conn.commit()
+    conn.close()
+
+
+def legacy_generate_card_prefix(conn):
+    """旧实现（逐字保留查询）"""
+    cursor = conn.cursor()
+    while True:
+        prefix = ''.join([str(random.randint(0, 9)) for _ in range(8)])
+        cursor.execute('SELECT id FROM user WHERE card_number LIKE ?', (f"{prefix}%",))
+        if not cursor.fetchone():
+            return prefix
+
+
+def bench_users(num_users, allocations, legacy_allocations):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cards.db')
+        build_users(db_path, num_users)
+
+        conn = sqlite3.connect(db_path)
+        start = time.perf_counter()
+        for _ in range(legacy_allocations):
+            legacy_generate_card_prefix(conn)
+        legacy_ms = (time.perf_counter() - start) / legacy_allocations * 1000
+        conn.close()
+
+        allocator = CardPrefixAllocator(db_path)
+        start = time.perf_counter()
+        allocator.allocate_one()  # 首次分配：建表并回填存量前缀
+        backfill_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(allocations):
+            allocator.allocate_one()
+        new_ms = (time.perf_counter() - start) / allocations * 1000
+
+        conn = sqlite3.connect(db_path)
+        stored, distinct = conn.execute('SELECT COUNT(*), COUNT(DISTINCT prefix) FROM card_prefix').fetchone()
+        conn.close()
+
+    print(f"{num_users:>10} {legacy_ms:>14.2f} {new_ms:>14.3f} {backfill_ms:>12.0f} {stored == distinct!s:>8}")
+
+
+def bench_bulk(count):
+    """单个事务内连续分配 count 个前缀，验证无碰撞"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bulk.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, card_number TEXT)')
+        allocator = CardPrefixAllocator(db_path)
+        start = time.perf_counter()
+        for _ in range(count):
+            allocator.allocate(conn)
+        conn.commit()
+        elapsed = time.perf_counter() - start
+        distinct = conn.execute('SELECT COUNT(DISTINCT prefix), MAX(seq) FROM card_prefix').fetchone()
+        conn.close()
+    print(f"\n📊 单事务连续分配 {count} 个前缀：{elapsed:.1f}s（{elapsed / count * 1e6:.1f} µs/个），"
+          f"不同前缀 {distinct[0]}，最大序号 {distinct[1]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='卡号前缀分配基准')
+    parser.add_argument('--users', type=int, nargs='+', default=[10000, 100000, 1000000], help='存量用户数')
+    parser.add_argument('--allocations', type=int, default=200, help='新实现的分配次数')
+    parser.add_argument('--legacy-allocations', type=int, default=20, help='旧实现的分配次数')
+    parser.add_argument('--bulk', type=int, default=1000000, help='单事务连续分配数（0 跳过）')
+    args = parser.parse_args(argv)
+
+    print(f"{'存量用户':>10} {'旧实现(ms/次)':>14} {'新实现(ms/次)':>14} {'回填(ms)':>12} {'无重复':>8}")
+    for num_users in args.users:
+        bench_users(num_users, args.allocations, args.legacy_allocations)
+    if args.bulk:
+        bench_bulk(args.bulk)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+信用额度模型加载方式对比：启动耗时与内存占用
+
+对比三种模式（每种在独立子进程中测量，避免互相影响）：
+- eager:  构造时立即 joblib.load pickle 模型（旧行为）
+- lazy:   构造时不加载，第一次预测时加载（默认）
+- native: 第一次预测时由 XGBoost 直接读取原生格式模型
+
+另外在 Linux 上测量 preload + fork 多 worker 时各 worker 的私有内存（Private）与共享内存（Shared）。
+
+用法:
+    python tests/benchmark_credit_model_loading.py --workers 4
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MEASURE_SCRIPT = r'''
+import json, os, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {root!r})
+
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return 0
+
+import numpy as np
+base_rss = rss_kb()
+t0 = time.perf_counter()
+from services.credit_limit_service import CreditLimitService
+service = CreditLimitService(model_path={model!r}, lazy={lazy!r}, native_model_path={native!r})
+t1 = time.perf_counter()
+startup_rss = rss_kb()
+service.predict_many([74707.66], [4204.74])
+t2 = time.perf_counter()
+print(json.dumps({{
+    'startup_ms': (t1 - t0) * 1000,
+    'first_predict_ms': (t2 - t1) * 1000,
+    'startup_rss_mb': (startup_rss - base_rss) / 1024,
+    'loaded_rss_mb': (rss_kb() - base_rss) / 1024,
+}}))
+'''
+
+
+def measure_mode(model_path, lazy, native_path):
+    """在子进程中测量一种加载模式"""
+    script = MEASURE_SCRIPT.format(root=ROOT, model=model_path, lazy=lazy, native=native_path)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=ROOT)
+    for line in reversed(output.stdout.strip().splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(output.stderr)
+
+
+def smaps_rollup_kb(pid):
+    """读取 /proc/<pid>/smaps_rollup 中的私有 / 共享内存（kB）"""
+    stats = {'private': 0, 'shared': 0}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Private_Clean', 'Private_Dirty'):
+                stats['private'] += int(rest.split()[0])
+            elif key in ('Shared_Clean', 'Shared_Dirty'):
+                stats['shared'] += int(rest.split()[0])
+    return stats
+
+
+def measure_fork_sharing(model_path, native_path, workers):
+    """主进程预加载后 fork 多个 worker，测量每个 worker 的私有 / 共享内存"""
+    from services.credit_limit_service import CreditLimitService
+
+    service = CreditLimitService(model_path=model_path, native_model_path=native_path)
+    service.preload()
+
+    results = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            service.predict_many([74707.66] * 1000, [4204.74] * 1000)
+            os.write(write_fd, json.dumps(smaps_rollup_kb(os.getpid())).encode())
+            os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as r:
+            results.append(json.loads(r.read()))
+        os.waitpid(pid, 0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='模型加载方式对比')
+    parser.add_argument('--model', default='models/xgboost_simple_model.pkl')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    from services.credit_limit_service import CreditLimitService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        native_path = os.path.join(tmp, 'model.ubj')
+        CreditLimitService(model_path=args.model).export_native_model(native_path)
+
+        modes = {
+            'eager': (False, None),
+            'lazy': (True, None),
+            'native': (True, native_path),
+        }
+
+        print("\n" + "=" * 72)
+        print(f"{'模式':<8}{'构造耗时(ms)':>14}{'首次预测(ms)':>14}{'构造后RSS(MB)':>16}{'加载后RSS(MB)':>16}")
+        print("-" * 72)
+        for name, (lazy, native) in modes.items():
+            m = measure_mode(args.model, lazy, native)
+            print(f"{name:<8}{m['startup_ms']:>14.1f}{m['first_predict_ms']:>14.1f}"
+                  f"{m['startup_rss_mb']:>16.1f}{m['loaded_rss_mb']:>16.1f}")
+        print("=" * 72)
+
+        if os.path.exists('/proc/self/smaps_rollup') and hasattr(os, 'fork'):
+            for name, native in (('pickle', None), ('native', native_path)):
+                stats = measure_fork_sharing(args.model, native, args.workers)
+                private = sum(s['private'] for s in stats) / len(stats) / 1024
+                shared = sum(s['shared'] for s in stats) / len(stats) / 1024
+                print(f"preload+fork [{name}] {args.workers} workers: "
+                      f"平均私有 {private:.1f} MB, 平均共享 {shared:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+额度重评分吞吐量基准测试
+
+在临时数据库中生成 N 个用户（含收入画像与消费记录），运行 CreditRescorePipeline，
+输出吞吐量并与目标值比较。
+
+用法:
+    python tests/benchmark_credit_rescore.py --users 200000 --chunk-size 5000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.credit_limit_service import CreditLimitService  # noqa: E402
+from services.credit_rescore import CreditRescorePipeline  # noqa: E402
+from tests.helpers import build_rescore_database  # noqa: E402
+
+# 吞吐量目标（用户/秒），见 docs/性能基准.md
+TARGET_USERS_PER_SECOND = 20000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='额度重评分吞吐量基准')
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--model', default='models/xgboost_simple_model.pkl')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+
+        print(f"生成 {args.users} 个用户...")
+        start = time.perf_counter()
+        build_rescore_database(db_path, args.users)
+        print(f"  数据准备耗时 {time.perf_counter() - start:.2f}s")
+
+        pipeline = CreditRescorePipeline(
+            db_path=db_path,
+            credit_service=CreditLimitService(model_path=args.model),
+            chunk_size=args.chunk_size
+        )
+        result = pipeline.run(progress=lambda stats: None)
+
+    print("\n" + "=" * 60)
+    print(f"用户数:      {args.users}")
+    print(f"块大小:      {args.chunk_size}")
+    print(f"更新/跳过:   {result['processed']} / {result['skipped']}")
+    print(f"耗时:        {result['elapsed']:.2f}s")
+    print(f"吞吐量:      {result['users_per_second']:,.0f} 用户/秒 (目标 ≥ {TARGET_USERS_PER_SECOND:,})")
+    print("=" * 60)
+    return 0 if result['users_per_second'] >= TARGET_USERS_PER_SECOND else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
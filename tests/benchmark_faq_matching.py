@@ -0,0 +1,119 @@
+"""
+FAQ 关键词匹配基准：逐关键词子串查找 vs 正则多选 vs Aho-Corasick 自动机
+
+用合成的大规模 FAQ（默认 5000 条，每条 5 个关键词）和一批随机问题，对比找出全部命中主题的耗时：
+- naive:     对每条 FAQ 的每个关键词做 `in` 子串查找（原 search_fintech_info 的做法，改为找全部主题）
+- regex:     所有关键词编译为一个多选正则，finditer 一遍（不能识别相互重叠的关键词，命中数可能偏少）
+- automaton: FAQEngine（Aho-Corasick），一遍扫描找出全部命中，包括重叠关键词
+
+用法:
+    python tests/benchmark_faq_matching.py --entries 5000 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.faq_engine import DEFAULT_FAQ_PATH, FAQEngine
+
+# 常用汉字区间，用于生成随机关键词和问题
+CJK_START, CJK_END = 0x4E00, 0x4E00 + 3000
+
+
+def random_word(rng, min_len=2, max_len=4):
+    return ''.join(chr(rng.randint(CJK_START, CJK_END)) for _ in range(rng.randint(min_len, max_len)))
+
+
+def synthetic_faq(count, keywords_per_entry, seed=0):
+    """生成合成 FAQ，前面保留真实的 FAQ 条目"""
+    rng = random.Random(seed)
+    entries = FAQEngine.from_file(DEFAULT_FAQ_PATH).entries
+    for i in range(count - len(entries)):
+        entries.append({
+            'topic': f'主题{i}',
+            'answer': f'合成答案{i}',
+            'keywords': [random_word(rng) for _ in range(keywords_per_entry)]
+        })
+    return entries
+
+
+def synthetic_queries(entries, count, seed=1):
+    """生成问题：一半包含 1-3 个已知关键词，一半为随机文本"""
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        parts = [random_word(rng, 2, 6) for _ in range(rng.randint(2, 5))]
+        if i % 2 == 0:
+            for _ in range(rng.randint(1, 3)):
+                parts.insert(rng.randrange(len(parts) + 1), rng.choice(rng.choice(entries)['keywords']))
+        queries.append(''.join(parts) + '？')
+    return queries
+
+
+class NaiveMatcher:
+    def __init__(self, entries):
+        self.entries = [(e['topic'], [k.lower() for k in e['keywords']]) for e in entries]
+
+    def match(self, query):
+        query = query.lower()
+        counts = {}
+        for topic, keywords in self.entries:
+            for keyword in keywords:
+                if keyword in query:
+                    counts[topic] = counts.get(topic, 0) + query.count(keyword)
+        return counts
+
+
+class RegexMatcher:
+    def __init__(self, entries):
+        self.owners = {}
+        for e in entries:
+            for keyword in e['keywords']:
+                self.owners.setdefault(keyword.lower(), []).append(e['topic'])
+        # 长关键词优先，避免被其前缀抢先匹配
+        alternation = '|'.join(re.escape(k) for k in sorted(self.owners, key=len, reverse=True))
+        self.pattern = re.compile(alternation)
+
+    def match(self, query):
+        counts = {}
+        for m in self.pattern.finditer(query.lower()):
+            for topic in self.owners[m.group()]:
+                counts[topic] = counts.get(topic, 0) + 1
+        return counts
+
+
+def bench(name, build, queries):
+    start = time.perf_counter()
+    matcher = build()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    hits = sum(len(matcher.match(q)) for q in queries)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} 构建 {build_ms:>8.1f} ms   每次查询 {elapsed / len(queries) * 1e6:>9.1f} µs   命中主题 {hits}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='FAQ 关键词匹配基准')
+    parser.add_argument('--entries', type=int, default=5000, help='FAQ 条目数')
+    parser.add_argument('--keywords', type=int, default=5, help='每条 FAQ 的关键词数')
+    parser.add_argument('--queries', type=int, default=2000, help='问题数')
+    args = parser.parse_args(argv)
+
+    entries = synthetic_faq(args.entries, args.keywords)
+    queries = synthetic_queries(entries, args.queries)
+    print(f"📊 {len(entries)} 条 FAQ，{sum(len(e['keywords']) for e in entries)} 个关键词，{len(queries)} 个问题")
+
+    bench('naive', lambda: NaiveMatcher(entries), queries)
+    bench('regex', lambda: RegexMatcher(entries), queries)
+    bench('automaton', lambda: FAQEngine(entries), queries)
+
+
+if __name__ == '__main__':
+    main()
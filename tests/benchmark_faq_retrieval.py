@@ -0,0 +1,114 @@
+"""
+FAQ 向量检索基准：近似问法的命中率、网络搜索回退率与耗时
+
+- 阈值扫描：用一组标注过的近似问法（不含任何关键词）和无关问题，统计不同 min_score 下
+  答对 / 答错 / 回退到网络搜索的比例
+- 端到端：SearchService.search_fintech_info 指向本地百度桩服务器，对比只用关键词匹配
+  （近似问法全部回退网络搜索）与加上向量检索的平均耗时
+- 规模：合成大规模 FAQ 时单次检索（一次稀疏矩阵-向量乘法）的耗时
+
+用法:
+    python tests/benchmark_faq_retrieval.py --search-latency 0.1 --entries 5000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.faq_engine import FAQEngine
+from tests.benchmark_faq_matching import synthetic_faq, synthetic_queries
+
+# 不含任何 FAQ 关键词的近似问法 -> 期望主题
+NEAR_MISS = {
+    '我花了多少钱': '消费记录',
+    '上月支出多少': '消费记录',
+    '付款明细': '消费记录',
+    '卡的上限': '信用额度',
+    '能透支多少': '信用额度',
+    '怎么改昵称': '修改信息',
+    '忘了口令': '修改信息',
+    '怎么登出': '修改信息',
+    'we币有什么用': 'WECoin',
+    '金币怎么赚': 'WECoin',
+    '新用户怎么开通': '注册',
+    '要准备什么材料': '注册',
+    '需要什么证件': '注册',
+    '抽卡怎么玩': '盲盒抽奖',
+    '礼物怎么领': '盲盒抽奖',
+}
+
+# 与 FAQ 无关、应当回退到网络搜索的问题
+OFF_TOPIC = ['今天天气怎么样', '阿布扎比有什么好玩的', '附近有什么餐厅', '汇率是多少',
+             '如何转账给朋友', '银行卡怎么绑定', '你是谁', '帮我写一首诗']
+
+
+def sweep(engine, thresholds):
+    print("📊 阈值扫描（近似问法 %d 条，无关问题 %d 条）" % (len(NEAR_MISS), len(OFF_TOPIC)))
+    print(f"{'min_score':>9} {'近似答对':>8} {'近似答错':>8} {'近似回退':>8} {'无关误答':>8}")
+    for threshold in thresholds:
+        right = wrong = fallback = 0
+        for query, topic in NEAR_MISS.items():
+            result = engine.retrieve(query, min_score=threshold)
+            if not result:
+                fallback += 1
+            elif result[0]['topic'] == topic:
+                right += 1
+            else:
+                wrong += 1
+        false_answers = sum(bool(engine.retrieve(q, min_score=threshold)) for q in OFF_TOPIC)
+        print(f"{threshold:>9.2f} {right:>8} {wrong:>8} {fallback:>8} {false_answers:>8}")
+
+
+def end_to_end(search_latency, repeat):
+    from services.search_service import SearchService
+    from tests.stub_servers import StubSearchServer
+
+    queries = list(NEAR_MISS) + OFF_TOPIC
+    with StubSearchServer(latency=search_latency) as stub:
+        print(f"\n📊 端到端（百度桩延迟 {search_latency * 1000:.0f} ms，{len(queries)} 个问题 × {repeat}）")
+        for name, min_score in (('仅关键词', float('inf')), ('关键词 + 向量', 0.15)):
+            service = SearchService(base_url=stub.url, faq_min_score=min_score)
+            latencies = []
+            for _ in range(repeat):
+                for query in queries:
+                    start = time.perf_counter()
+                    service.search_fintech_info(query)
+                    latencies.append((time.perf_counter() - start) * 1000)
+            stats = service.faq_stats()
+            print(f"{name:<12} 平均 {statistics.mean(latencies):>7.1f} ms   中位数 {statistics.median(latencies):>7.1f} ms   "
+                  f"回退率 {stats['fallback_rate']:.0%}   向量检索平均 {stats['avg_ms']['vector']:.2f} ms")
+
+
+def scale(entries, count):
+    faq = synthetic_faq(entries, 5)
+    queries = synthetic_queries(faq, count)
+    start = time.perf_counter()
+    engine = FAQEngine(faq)
+    build_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for query in queries:
+        engine.retrieve(query, limit=3)
+    per_query = (time.perf_counter() - start) / len(queries) * 1e6
+    print(f"\n📊 规模：{entries} 条 FAQ，矩阵 {engine.index.matrix.shape[0]}×{engine.index.matrix.shape[1]}，"
+          f"非零 {engine.index.matrix.nnz}；构建 {build_ms:.0f} ms，每次检索 {per_query:.0f} µs")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='FAQ 向量检索基准')
+    parser.add_argument('--search-latency', type=float, default=0.1, help='百度桩服务器响应延迟（秒）')
+    parser.add_argument('--repeat', type=int, default=3, help='端到端重复次数')
+    parser.add_argument('--entries', type=int, default=5000, help='规模测试的 FAQ 条目数')
+    args = parser.parse_args(argv)
+
+    sweep(FAQEngine.from_file(), [0.05, 0.10, 0.15, 0.20, 0.25])
+    end_to_end(args.search_latency, args.repeat)
+    scale(args.entries, 1000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+搜索结果页解析对比：BeautifulSoup 全量 DOM / 正则 vs HTMLParser 事件提取（提前停止）
+
+使用 tests/data 下保存的示例页面（DuckDuckGo HTML 版、百度结果页），
+分别用旧实现和 utils.html_extract.extract_elements 提取前 N 条结果，输出每页解析耗时。
+
+用法:
+    python tests/benchmark_html_extract.py --num-results 5 --repeat 200
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'tests', 'data')
+sys.path.insert(0, ROOT)
+
+from utils.html_extract import extract_elements  # noqa: E402
+
+
+def load_page(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def duckduckgo_bs4(html, num_results):
+    """旧实现：构建完整 BeautifulSoup 树后查找 div.result 中的 a.result__a"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    titles = []
+    for result_div in soup.find_all('div', class_='result')[:num_results]:
+        title_tag = result_div.find('a', class_='result__a')
+        if title_tag:
+            titles.append(title_tag.get_text(strip=True))
+    return titles
+
+
+def duckduckgo_extract(html, num_results):
+    return [link['text'] for link in extract_elements(html, 'a', class_name='result__a', limit=num_results)]
+
+
+def baidu_regex(html, num_results):
+    """旧实现：正则匹配 <h3> 后去掉标签"""
+    titles = re.findall(r'<h3[^>]*>(.*?)</h3>', html)
+    return [re.sub(r'<[^>]+>', '', title) for title in titles[:num_results]]
+
+
+def baidu_extract(html, num_results):
+    return [item['text'] for item in extract_elements(html, 'h3', limit=num_results)]
+
+
+def timeit(func, html, num_results, repeat):
+    """返回每次调用耗时的中位数（微秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html, num_results)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='搜索结果页解析对比')
+    parser.add_argument('--num-results', type=int, default=5, help='提取的结果数')
+    parser.add_argument('--repeat', type=int, default=200, help='每种方式重复次数')
+    args = parser.parse_args(argv)
+
+    pages = [
+        ('DuckDuckGo', 'duckduckgo_results.html', [
+            ('BeautifulSoup 全量解析', duckduckgo_bs4),
+            ('HTMLParser 提取', duckduckgo_extract),
+        ]),
+        ('百度', 'baidu_results.html', [
+            ('正则', baidu_regex),
+            ('HTMLParser 提取', baidu_extract),
+        ]),
+    ]
+
+    print(f"📊 提取前 {args.num_results} 条结果，每种方式重复 {args.repeat} 次（中位数）")
+    for page_name, filename, methods in pages:
+        html = load_page(filename)
+        print(f"\n{page_name}（{len(html.encode('utf-8')) / 1024:.0f} KB）")
+        for name, func in methods:
+            try:
+                elapsed = timeit(func, html, args.num_results, args.repeat)
+            except ImportError as e:
+                print(f"  {name:<24}跳过（{e}）")
+                continue
+            print(f"  {name:<24}{elapsed:>10.0f} µs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+"""
+Flask 接口端到端基准 - 在合成数据库上驱动真实路由，输出每个路由的吞吐量与 p50/p95/p99，并写入 JSON
+
+客户端:
+- flask: Flask test client，单线程，不经过网络（只测路由处理本身）
+- http:  以多线程 WSGI 服务器在进程内运行 app.py，多个线程各用一个 requests.Session 并发请求
+- 指定 --url 时直接请求已启动的应用（只运行 http 客户端）
+
+数据库默认用 utils/synthetic_data.py 在临时目录生成（--users / --seed），也可用 --db 指定已生成的合成数据库
+（会被写入：翻卡、Face ID 登录日志）。Ollama / DuckDuckGo 由 tests/stub_servers.py 中的桩服务器模拟。
+
+/api/login_with_face 需要 --face-image 指定一张含人脸的照片：基准开始前把它的人脸编码写给用户1，
+之后每次登录都要与库中全部人脸编码比对。
+
+用法:
+    python tests/benchmark_http_api.py --users 100000 -c 8 -n 500 --output results.json
+    python tests/benchmark_http_api.py --db instance/fintech_synthetic.db --baseline results.json
+    python tests/benchmark_http_api.py --url http://127.0.0.1:5000 --db instance/fintech.db --client http
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.helpers import percentile  # noqa: E402
+from tests.stub_servers import StubOllamaServer, StubSearchServer  # noqa: E402
+
+ROUTES = ['home', 'generate_blind_box', 'flip_card', 'get_user_rewards', 'get_blind_box_history', 'login_with_face']
+
+
+class Scenario:
+    """
+    为每个路由生成请求 (method, path, json)
+
+    用户ID在 [1, 最大用户ID] 内随机选取，合成数据中消费和抽奖记录多的用户也会被选到
+    """
+
+    def __init__(self, db_path, seed=0, face_image=None):
+        conn = sqlite3.connect(db_path)
+        self.max_user_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM user').fetchone()[0]
+        self.reward_ids = [row[0] for row in conn.execute('SELECT id FROM reward')]
+        conn.close()
+        if not self.max_user_id or not self.reward_ids:
+            raise ValueError(f'数据库中没有用户或奖品: {db_path}')
+        self.seed = seed
+        self.face_payload = None
+        if face_image:
+            with open(face_image, 'rb') as f:
+                self.face_payload = base64.b64encode(f.read()).decode('ascii')
+
+    def routes(self, selected=None):
+        """可运行的路由（没有人脸照片时跳过 login_with_face）"""
+        routes = [r for r in ROUTES if not selected or r in selected]
+        if self.face_payload is None and 'login_with_face' in routes:
+            print("⚠️ 未指定 --face-image，跳过 /api/login_with_face")
+            routes.remove('login_with_face')
+        return routes
+
+    def rng(self, route, worker):
+        return random.Random(f'{self.seed}:{route}:{worker}')
+
+    def request(self, route, rng):
+        user_id = rng.randint(1, self.max_user_id)
+        if route == 'home':
+            return 'GET', '/', None
+        if route == 'generate_blind_box':
+            return 'POST', '/api/generate_blind_box', {'user_id': user_id}
+        if route == 'flip_card':
+            card_id = f'{user_id}_{int(time.time() * 1000)}_{rng.randrange(4)}'
+            return 'POST', '/api/flip_card', {'user_id': user_id, 'card_id': card_id,
+                                              'reward_id': rng.choice(self.reward_ids)}
+        if route == 'get_user_rewards':
+            return 'GET', f'/api/get_user_rewards/{user_id}', None
+        if route == 'get_blind_box_history':
+            return 'GET', f'/api/get_blind_box_history/{user_id}', None
+        if route == 'login_with_face':
+            return 'POST', '/api/login_with_face', {'image': self.face_payload}
+        raise ValueError(f'未知路由: {route}')
+
+
+class FlaskTestClient:
+    """Flask test client（每个线程一个）"""
+
+    name = 'flask'
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._local = threading.local()
+
+    def request(self, method, path, payload):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=payload)
+        response.get_data()
+        return response.status_code
+
+
+class HTTPClient:
+    """真实 HTTP 客户端（每个线程一个 requests.Session，复用连接）"""
+
+    name = 'http'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+
+    def request(self, method, path, payload):
+        import requests
+
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.request(method, self.base_url + path, json=payload, timeout=60)
+        return response.status_code
+
+
+def run_route(client, scenario, route, requests_count, concurrency, warmup):
+    """
+    以 concurrency 个线程向一个路由发送 requests_count 个请求
+
+    Returns:
+        dict: 吞吐量、延迟分位数、状态码计数
+    """
+    rng = scenario.rng(route, 'warmup')
+    for _ in range(warmup):
+        client.request(*scenario.request(route, rng))
+
+    latencies = []
+    status = {}
+    lock = threading.Lock()
+    per_worker = [requests_count // concurrency + (1 if i < requests_count % concurrency else 0)
+                  for i in range(concurrency)]
+
+    def worker(index):
+        rng = scenario.rng(route, index)
+        local_latencies = []
+        local_status = {}
+        for _ in range(per_worker[index]):
+            method, path, payload = scenario.request(route, rng)
+            start = time.perf_counter()
+            try:
+                code = str(client.request(method, path, payload))
+            except Exception:
+                code = 'error'
+            local_latencies.append(time.perf_counter() - start)
+            local_status[code] = local_status.get(code, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for code, count in local_status.items():
+                status[code] = status.get(code, 0) + count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': requests_count,
+        'concurrency': concurrency,
+        'wall_seconds': round(wall, 4),
+        'throughput': round(requests_count / wall, 2) if wall > 0 else 0.0,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        'status': dict(sorted(status.items()))
+    }
+
+
+def print_table(client_name, results):
+    print(f"\n📊 {client_name} 客户端")
+    print(f"  {'路由':<24}{'请求/秒':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  状态码")
+    for route, r in results.items():
+        codes = ' '.join(f'{code}×{count}' for code, count in r['status'].items())
+        print(f"  {route:<24}{r['throughput']:>10,.1f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"  {codes}")
+
+
+def compare(results, baseline):
+    """打印与基线结果的差异（延迟为正表示变慢，吞吐量为负表示下降）"""
+    print(f"\n🔍 与基线对比（{baseline.get('meta', {}).get('timestamp', '未知时间')}）")
+    for client_name, routes in results['results'].items():
+        base_routes = baseline.get('results', {}).get(client_name, {})
+        for route, r in routes.items():
+            base = base_routes.get(route)
+            if not base:
+                continue
+            deltas = [
+                f"{key[:-3]} {(r[key] / base[key] - 1) * 100:+.1f}%"
+                for key in ('p50_ms', 'p95_ms', 'p99_ms') if base[key] > 0
+            ]
+            if base['throughput'] > 0:
+                deltas.append(f"吞吐量 {(r['throughput'] / base['throughput'] - 1) * 100:+.1f}%")
+            print(f"  {client_name:<6}{route:<24}{'  '.join(deltas)}")
+
+
+def prepare_database(args, tmp):
+    """返回被测数据库路径（未指定 --db 时生成合成数据库）"""
+    if args.db:
+        return args.db
+    from utils.synthetic_data import SyntheticDataGenerator
+
+    db_path = os.path.join(tmp, 'fintech_synthetic.db')
+    print(f"⏳ 生成合成数据库: {args.users} 个用户 (seed={args.seed})")
+    result = SyntheticDataGenerator(db_path, seed=args.seed).generate(args.users, progress=lambda s: None)
+    if not result['success']:
+        raise RuntimeError(result['message'])
+    print(f"✅ {result['message']}")
+    return db_path
+
+
+def load_app(db_path, ollama, search):
+    """在进程内导入 app.py（需要其全部依赖）"""
+    os.environ.update({
+        'FINTECH_DB_PATH': db_path,
+        'OLLAMA_URL': ollama.url,
+        'DUCKDUCKGO_URL': search.duckduckgo_url,
+        'ABU_DHABI_USE_PROXY': '0'
+    })
+    try:
+        import app as flask_app
+    except ImportError as e:
+        print(f"❌ 无法导入 app.py: {e}")
+        print("💡 请安装全部依赖，或先手动启动应用后用 --url 指定地址")
+        return None
+    return flask_app
+
+
+def register_benchmark_face(flask_app, face_image):
+    """把照片的人脸编码写给用户1，使 Face ID 登录能匹配成功"""
+    from PIL import Image
+
+    result = flask_app.face_service.extract_face_encoding(Image.open(face_image))
+    if not result['success']:
+        raise RuntimeError(f"无法从 {face_image} 提取人脸: {result['message']}")
+    flask_app.db.update_user_face_encoding(1, result['encoding'], face_image)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flask 接口端到端基准')
+    parser.add_argument('--db', default=None, help='合成数据库路径（默认在临时目录生成）')
+    parser.add_argument('--users', type=int, default=100000, help='生成合成数据库时的用户数')
+    parser.add_argument('--seed', type=int, default=42, help='合成数据与请求序列的随机种子')
+    parser.add_argument('--client', choices=['flask', 'http', 'both'], default='both')
+    parser.add_argument('--url', default=None, help='已启动应用的地址（只运行 http 客户端，需同时指定 --db）')
+    parser.add_argument('--routes', nargs='+', choices=ROUTES, default=None, help='只测这些路由')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='http 客户端并发数')
+    parser.add_argument('-n', '--requests', type=int, default=500, help='每个路由的请求数')
+    parser.add_argument('--warmup', type=int, default=20, help='每个路由正式计时前的预热请求数')
+    parser.add_argument('--face-image', default=None, help='含一张人脸的照片（用于 /api/login_with_face）')
+    parser.add_argument('--output', default=None, help='把结果写入此 JSON 文件')
+    parser.add_argument('--baseline', default=None, help='与此 JSON 结果对比')
+    args = parser.parse_args(argv)
+
+    if args.url and not args.db:
+        parser.error('--url 需要同时指定应用使用的 --db（用于选取用户和奖品ID）')
+
+    with tempfile.TemporaryDirectory() as tmp, StubOllamaServer() as ollama, StubSearchServer() as search:
+        db_path = prepare_database(args, tmp)
+        scenario = Scenario(db_path, seed=args.seed, face_image=args.face_image)
+        routes = scenario.routes(args.routes)
+
+        clients = []
+        server = None
+        if args.url:
+            clients.append(HTTPClient(args.url))
+        else:
+            flask_app = load_app(db_path, ollama, search)
+            if flask_app is None:
+                return 1
+            if args.face_image:
+                register_benchmark_face(flask_app, args.face_image)
+            if args.client in ('flask', 'both'):
+                clients.append(FlaskTestClient(flask_app.app))
+            if args.client in ('http', 'both'):
+                from werkzeug.serving import WSGIRequestHandler, make_server
+
+                class QuietHandler(WSGIRequestHandler):
+                    # 逐条打印访问日志会拖慢服务器并淹没结果
+                    def log_request(self, *args, **kwargs):
+                        pass
+
+                server = make_server('127.0.0.1', 0, flask_app.app, threaded=True, request_handler=QuietHandler)
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                clients.append(HTTPClient(f'http://127.0.0.1:{server.server_port}'))
+
+        results = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'db': args.db or f'synthetic:{args.users}:{args.seed}',
+                'max_user_id': scenario.max_user_id,
+                'requests_per_route': args.requests,
+                'concurrency': args.concurrency,
+                'warmup': args.warmup
+            },
+            'results': {}
+        }
+        try:
+            for client in clients:
+                # test client 只测路由处理本身，单线程运行
+                concurrency = 1 if client.name == 'flask' else args.concurrency
+                results['results'][client.name] = {
+                    route: run_route(client, scenario, route, args.requests, concurrency, args.warmup)
+                    for route in routes
+                }
+                print_table(f"{client.name}（并发 {concurrency}）", results['results'][client.name])
+        finally:
+            if server:
+                server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已写入 {args.output}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
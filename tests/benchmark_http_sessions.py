@@ -0,0 +1,64 @@
+"""
+HTTP 连接复用对比：每次 requests.get 新建连接 vs 共享 Session 连接池
+
+在本地启动一个支持 keep-alive 的桩 HTTP 服务器，统计服务器接受的 TCP 连接数与请求耗时。
+--connect-delay-ms 在服务器每次接受新连接时额外等待，用于模拟经代理建立 TLS 连接的握手开销。
+
+用法:
+    python tests/benchmark_http_sessions.py --requests 500 --threads 8 --connect-delay-ms 20
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.stub_servers import StubHTMLServer  # noqa: E402
+from utils.http import create_session  # noqa: E402
+
+
+def run(get, url, total, threads):
+    """用 threads 个线程发出 total 个 GET 请求，返回耗时（秒）"""
+    def one(_):
+        response = get(url, timeout=10)
+        response.raise_for_status()
+        return len(response.content)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP 连接复用对比')
+    parser.add_argument('--requests', type=int, default=500, help='请求总数')
+    parser.add_argument('--threads', type=int, default=8, help='并发线程数')
+    parser.add_argument('--connect-delay-ms', type=float, default=0.0, help='模拟每次建立连接的额外耗时（毫秒）')
+    args = parser.parse_args(argv)
+
+    with StubHTMLServer(connect_delay=args.connect_delay_ms / 1000) as server:
+        session = create_session(pool_maxsize=args.threads)
+        modes = [
+            ('requests.get（每次新连接）', requests.get),
+            ('共享 Session 连接池', session.get),
+        ]
+
+        print(f"📊 {args.requests} 个请求，{args.threads} 线程，建连额外耗时 {args.connect_delay_ms:g} ms")
+        print(f"{'方式':<24}{'TCP连接数':>10}{'总耗时(s)':>12}{'平均(ms)':>10}")
+        for name, get in modes:
+            server.reset()
+            elapsed = run(get, server.url, args.requests, args.threads)
+            print(f"{name:<24}{server.connections:>10}{elapsed:>12.3f}{elapsed / args.requests * 1000:>10.2f}")
+
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
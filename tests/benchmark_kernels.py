@@ -0,0 +1,236 @@
+"""
+服务热点路径微基准 - 单独计时各计算内核，并可与基线对比（回归时返回非零退出码）
+
+内核:
+- lottery_prob.compute_weights / draw_four_with_reduction（普通用户与消费笔数最多的用户）
+- Database.aggregate_transactions
+- FaceRecognitionService.search_face 中与全部已注册人脸逐个比对的循环（需要 face_recognition）
+- PDFService._extract_number（需要 pdfplumber）
+- CreditLimitService.predict_credit_limit（xgboost / numpy 后端，不走缓存；以及缓存命中）
+
+数据来自 utils/synthetic_data.py 在临时目录生成的合成数据库（--users / --seed）。
+缺少依赖的内核会被跳过并在结果中注明。
+
+用法:
+    python tests/benchmark_kernels.py --save kernels_baseline.json
+    python tests/benchmark_kernels.py --compare kernels_baseline.json --threshold 0.1
+    python tests/benchmark_kernels.py --filter lottery --repeat 30
+"""
+
+import argparse
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.microbench import (  # noqa: E402
+    DEFAULT_THRESHOLD, compare, format_time, load_meta, load_results, measure, save_results
+)
+
+# PDF 流水中常见的金额写法
+AMOUNT_SAMPLES = ['RMB 12,345.67', '¥ 8,000', 'AED 1,234.5', '$ 99.99', '  3 200 ', '', '余额不足', '-1,024.00']
+
+
+class KernelContext:
+    """各内核共享的数据：合成数据库、典型用户与重度用户"""
+
+    def __init__(self, db_path):
+        from utils.database import Database
+
+        self.db_path = db_path
+        self.db = Database(db_path)
+        conn = sqlite3.connect(db_path)
+        counts = conn.execute('''
+            SELECT user_id, COUNT(*) AS n FROM transactions GROUP BY user_id ORDER BY n
+        ''').fetchall()
+        conn.close()
+        self.typical_user, self.typical_tx = counts[len(counts) // 2]
+        self.heavy_user, self.heavy_tx = counts[-1]
+        # 内核名称固定（不含数据相关的数量），数据规模记录在结果的 meta.data 中，便于不同数据集的结果互相对比
+        self.info = {'typical_tx': self.typical_tx, 'heavy_tx': self.heavy_tx}
+
+
+def _lottery_kernels(ctx):
+    from services import lottery_prob
+
+    def draw():
+        # 固定随机序列，每次调用走相同的分支
+        random.seed(0)
+        return lottery_prob.draw_four_with_reduction(ctx.db, ctx.typical_user)
+
+    return {
+        'lottery_prob.compute_weights[typical]': lambda: lottery_prob.compute_weights(ctx.db, ctx.typical_user),
+        'lottery_prob.compute_weights[heavy]': lambda: lottery_prob.compute_weights(ctx.db, ctx.heavy_user),
+        'lottery_prob.draw_four_with_reduction[typical]': draw,
+    }
+
+
+def _database_kernels(ctx):
+    return {
+        'Database.aggregate_transactions[typical]': lambda: ctx.db.aggregate_transactions(ctx.typical_user),
+        'Database.aggregate_transactions[heavy]': lambda: ctx.db.aggregate_transactions(ctx.heavy_user),
+    }
+
+
+def _face_kernels(ctx):
+    from services.face_service import FaceRecognitionService
+
+    service = FaceRecognitionService()
+    encodings = ctx.db.get_all_face_encodings()
+    probe = encodings[0]['encoding']
+
+    ctx.info['faces'] = len(encodings)
+    # search_face 提取特征之后的比对部分（解码图片与提取特征依赖真实照片，不在此测量）
+    return {'FaceRecognitionService.search_face[distance]': lambda: service.find_best_match(probe, encodings)}
+
+
+def _pdf_kernels(ctx):
+    from services.pdf_service import PDFService
+
+    service = PDFService()
+
+    def extract_all():
+        for text in AMOUNT_SAMPLES:
+            service._extract_number(text)
+
+    ctx.info['amount_strings'] = len(AMOUNT_SAMPLES)
+    return {'PDFService._extract_number[amount strings]': extract_all}
+
+
+def _credit_kernels(ctx):
+    from services.credit_limit_service import CreditLimitService
+
+    rng = random.Random(0)
+    inputs = [(round(rng.uniform(5000, 300000), 2), round(rng.uniform(500, 50000), 2)) for _ in range(64)]
+    kernels = {}
+    for backend in ('xgboost', 'numpy'):
+        service = CreditLimitService(cache_size=0, backend=backend, lazy=False)
+        cycle = iter(())
+
+        def predict(service=service):
+            nonlocal cycle
+            try:
+                income, balance = next(cycle)
+            except StopIteration:
+                cycle = iter(inputs)
+                income, balance = next(cycle)
+            return service.predict_credit_limit(income, balance)
+
+        kernels[f'CreditLimitService.predict_credit_limit[{backend}]'] = predict
+
+    cached = CreditLimitService(backend='numpy', lazy=False)
+    kernels['CreditLimitService.predict_credit_limit[cache hit]'] = \
+        lambda: cached.predict_credit_limit(*inputs[0])
+    return kernels
+
+
+KERNEL_GROUPS = [
+    ('lottery', _lottery_kernels),
+    ('database', _database_kernels),
+    ('face', _face_kernels),
+    ('pdf', _pdf_kernels),
+    ('credit', _credit_kernels),
+]
+
+
+def collect_kernels(ctx, name_filter=None):
+    """
+    构建所有内核
+
+    Returns:
+        tuple: ({名称: 函数}, {分组: 跳过原因})
+    """
+    kernels, skipped = {}, {}
+    for group, build in KERNEL_GROUPS:
+        try:
+            built = build(ctx)
+        except ImportError as e:
+            skipped[group] = f'缺少依赖: {e}'
+            continue
+        kernels.update((name, func) for name, func in built.items()
+                       if not name_filter or name_filter.lower() in name.lower())
+    return kernels, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='服务热点路径微基准')
+    parser.add_argument('--users', type=int, default=10000, help='合成数据库的用户数')
+    parser.add_argument('--seed', type=int, default=42, help='合成数据的随机种子')
+    parser.add_argument('--filter', default=None, help='只运行名称包含此字符串的内核')
+    parser.add_argument('--warmup', type=int, default=3, help='每个内核的预热调用次数')
+    parser.add_argument('--repeat', type=int, default=15, help='计时轮数')
+    parser.add_argument('--min-time', type=float, default=0.05, help='每轮最短耗时（秒），据此确定每轮调用次数')
+    parser.add_argument('--save', default=None, help='把结果写入此 JSON 文件（作为基线）')
+    parser.add_argument('--compare', default=None, help='与此基线 JSON 对比，有回归时返回 1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值（中位数相对变化）')
+    args = parser.parse_args(argv)
+
+    from utils.synthetic_data import SyntheticDataGenerator
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'kernels.db')
+        generated = SyntheticDataGenerator(db_path, seed=args.seed).generate(args.users, progress=lambda s: None)
+        if not generated['success']:
+            print(f"❌ {generated['message']}")
+            return 1
+        ctx = KernelContext(db_path)
+        kernels, skipped = collect_kernels(ctx, args.filter)
+        for group, reason in skipped.items():
+            print(f"⚠️ 跳过 {group}: {reason}")
+        print(f"📊 数据规模: {ctx.info}")
+
+        results = {}
+        print(f"\n📊 微基准（{args.users} 个用户，预热 {args.warmup} 次，{args.repeat} 轮）")
+        print(f"  {'内核':<58}{'中位数':>12}{'最小值':>12}{'IQR':>12}{'每轮次数':>10}")
+        for name, func in kernels.items():
+            stats = measure(func, warmup=args.warmup, repeat=args.repeat, min_time=args.min_time)
+            results[name] = stats
+            print(f"  {name:<58}{format_time(stats['median']):>12}{format_time(stats['min']):>12}"
+                  f"{format_time(stats['q3'] - stats['q1']):>12}{stats['number']:>10}")
+
+    if args.save:
+        save_results(args.save, results, meta={
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'users': args.users,
+            'seed': args.seed,
+            'data': ctx.info,
+            'skipped': skipped
+        })
+        print(f"\n💾 结果已写入 {args.save}")
+
+    if args.compare:
+        baseline = {name: stats for name, stats in load_results(args.compare).items()
+                    if not args.filter or args.filter.lower() in name.lower()}
+        baseline_meta = load_meta(args.compare)
+        if (baseline_meta.get('users'), baseline_meta.get('seed')) != (args.users, args.seed):
+            print(f"⚠️ 基线使用 {baseline_meta.get('users')} 个用户 / seed {baseline_meta.get('seed')}，"
+                  f"本次为 {args.users} / {args.seed}，数据规模不同: {baseline_meta.get('data')} → {ctx.info}")
+        report = compare(results, baseline, args.threshold)
+        marks = {'regressed': '❌', 'improved': '✅', 'unchanged': '  ', 'new': '🆕', 'missing': '❓'}
+        print(f"\n🔍 与基线对比（阈值 {args.threshold:.0%}）")
+        for row in report:
+            ratio = f"{(row['ratio'] - 1) * 100:+.1f}%" if row['ratio'] is not None else ''
+            print(f"  {marks[row['status']]} {row['name']:<58}{format_time(row['baseline']):>12} → "
+                  f"{format_time(row['current']):<12}{ratio:>8}")
+        regressed = [row['name'] for row in report if row['status'] == 'regressed']
+        missing = [row['name'] for row in report if row['status'] == 'missing']
+        if missing:
+            print(f"❌ {len(missing)} 个基线内核本次没有运行（被跳过或已改名）: {', '.join(missing)}")
+        if regressed:
+            print(f"❌ {len(regressed)} 个内核回归超过 {args.threshold:.0%}")
+        if regressed or missing:
+            return 1
+        print("✅ 没有内核回归")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+请求指标开销基准 - 对比启用 utils/metrics.py 前后的单个请求耗时与单条语句耗时
+
+- 请求: 最小 Flask 应用的 /ping（无数据库）与 /user/<id>（5 条主键查询，模拟普通接口），Flask test client 调用
+- 语句: 主键查询 execute + fetchone，原生 sqlite3.Connection vs InstrumentedConnection
+
+用法:
+    python tests/benchmark_metrics_overhead.py --repeat 15
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.microbench import format_time, measure  # noqa: E402
+from utils import db_instrument, metrics  # noqa: E402
+
+
+def create_app(db_path, instrumented):
+    import flask
+
+    app = flask.Flask(__name__)
+
+    @app.route('/ping')
+    def ping():
+        return flask.jsonify({'success': True})
+
+    @app.route('/user/<int:user_id>')
+    def user(user_id):
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        rows = []
+        for offset in range(5):
+            cursor.execute('SELECT id, name, wecoin FROM user WHERE id = ?', (user_id + offset,))
+            rows.append(dict(cursor.fetchone()))
+        conn.close()
+        return flask.jsonify({'success': True, 'data': rows})
+
+    if instrumented:
+        metrics.init_app(app)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='请求指标开销基准')
+    parser.add_argument('--repeat', type=int, default=15, help='计时轮数')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'overhead.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT, wecoin INTEGER)')
+        conn.executemany('INSERT INTO user (name, wecoin) VALUES (?, ?)', ((f'user{i}', i) for i in range(1000)))
+        conn.commit()
+        conn.close()
+
+        results = {}
+        for instrumented in (False, True):
+            label = '启用指标' if instrumented else '未启用'
+            client = create_app(db_path, instrumented).test_client()
+            results[('ping', label)] = measure(lambda: client.get('/ping'), repeat=args.repeat)
+            results[('user', label)] = measure(lambda: client.get('/user/10'), repeat=args.repeat)
+
+            statement_conn = sqlite3.connect(db_path)
+
+            def statement():
+                statement_conn.execute('SELECT id, name, wecoin FROM user WHERE id = ?', (10,)).fetchone()
+
+            results[('statement', label)] = measure(statement, repeat=args.repeat)
+            statement_conn.close()
+
+        db_instrument.remove_observer(metrics._on_statement)
+        db_instrument.uninstall()
+
+    print(f"\n📊 {'场景':<32}{'未启用':>12}{'启用指标':>12}{'增加':>12}")
+    for name, title in (('ping', 'GET /ping（无数据库）'), ('user', 'GET /user/<id>（5 条查询）'),
+                        ('statement', '单条查询 execute + fetchone')):
+        plain = results[(name, '未启用')]['median']
+        instrumented = results[(name, '启用指标')]['median']
+        print(f"  {title:<32}{format_time(plain):>12}{format_time(instrumented):>12}"
+              f"{format_time(instrumented - plain):>12}")
+
+
+if __name__ == '__main__':
+    main()
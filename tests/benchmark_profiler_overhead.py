@@ -0,0 +1,91 @@
+"""
+剖析开销基准 - 同一段工作在不剖析 / 栈采样 / cProfile 下的耗时
+
+工作负载:
+- python: 大量小函数调用（类似抽奖权重计算的纯 Python 代码，cProfile 开销最大的情况）
+- sqlite: 对 5 万行的表做一次无索引的聚合查询（时间花在 C 代码里）
+
+每次调用都完整地执行 RequestProfiler.start / finish（min_duration 设得很大，不写文件）。
+
+用法:
+    python tests/benchmark_profiler_overhead.py --repeat 10
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.microbench import format_time, measure  # noqa: E402
+from utils.profiling import RequestProfiler  # noqa: E402
+
+
+def _weight(base, hits):
+    multiplier = 1.0
+    for hit in hits:
+        if hit:
+            multiplier *= 1.3
+    return base * min(multiplier, 2.0)
+
+
+def python_workload():
+    total = 0.0
+    for i in range(20000):
+        total += _weight(i % 7 / 10, (i % 2 == 0, i % 3 == 0, i % 5 == 0))
+    return total
+
+
+def make_sqlite_workload():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.execute('CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER, amount REAL)')
+    conn.executemany('INSERT INTO transactions (user_id, amount) VALUES (?, ?)',
+                     ((i % 5000, i * 0.37 % 500) for i in range(50000)))
+
+    def workload():
+        return conn.execute('SELECT SUM(amount), COUNT(*) FROM transactions WHERE user_id = ?', (42,)).fetchone()
+
+    return workload
+
+
+def profiled(workload, profiler):
+    if profiler is None:
+        return workload
+
+    def run():
+        state = profiler.start()
+        try:
+            workload()
+        finally:
+            profiler.finish(state, 'benchmark')
+
+    return run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='剖析开销基准')
+    parser.add_argument('--repeat', type=int, default=10, help='计时轮数')
+    args = parser.parse_args(argv)
+
+    modes = [
+        ('不剖析', None),
+        ('栈采样 5ms', RequestProfiler(mode='sample', interval=0.005, min_duration=1e9)),
+        ('栈采样 1ms', RequestProfiler(mode='sample', interval=0.001, min_duration=1e9)),
+        ('cProfile', RequestProfiler(mode='cprofile', min_duration=1e9)),
+    ]
+    workloads = [('python（小函数调用）', python_workload), ('sqlite（无索引聚合）', make_sqlite_workload())]
+
+    print(f"\n📊 {'工作负载':<24}" + ''.join(f'{name:>20}' for name, _ in modes))
+    for title, workload in workloads:
+        medians = [measure(profiled(workload, profiler), repeat=args.repeat, min_time=0.2)['median']
+                   for _, profiler in modes]
+        base = medians[0]
+        cells = [f'{format_time(m)} ({(m / base - 1) * 100:+.0f}%)' if i else format_time(m)
+                 for i, m in enumerate(medians)]
+        print(f"  {title:<24}" + ''.join(f'{cell:>20}' for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
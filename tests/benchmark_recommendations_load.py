@@ -0,0 +1,185 @@
+"""
+阿布扎比推荐接口压测 - 以指定并发驱动推荐接口，输出吞吐量与尾延迟
+
+目标:
+- http（默认）: 请求 --url 指定的接口；不指定 --url 时启动桩服务器，并在进程内以多线程 WSGI 服务器运行 app.py
+- service: 不经过 Flask，直接并发调用 AbuDhabiService.generate_recommendations（验证合并、限流与降级）
+
+Ollama / DuckDuckGo 均由 tests/stub_servers.py 中的桩服务器模拟，不访问外网。
+
+用法:
+    python tests/benchmark_recommendations_load.py --target service --concurrency 16 --requests 200
+    python tests/benchmark_recommendations_load.py --url http://127.0.0.1:5000/api/abu_dhabi_recommendations -c 32 -n 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.helpers import percentile  # noqa: E402
+from tests.stub_servers import StubOllamaServer, StubSearchServer  # noqa: E402
+
+
+def drive(call, total, concurrency):
+    """
+    以 concurrency 个线程执行 total 次 call()
+
+    call() 返回 'ok' / 'default'（降级为默认推荐）或抛出异常
+
+    Returns:
+        dict: 吞吐量、延迟分位数、各结果计数
+    """
+    latencies = []
+    outcomes = {'ok': 0, 'default': 0, 'error': 0}
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        try:
+            outcome = call()
+        except Exception:
+            outcome = 'error'
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            outcomes[outcome] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'wall_seconds': wall,
+        'throughput': total / wall if wall > 0 else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p90_ms': percentile(latencies, 90) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        **outcomes
+    }
+
+
+def print_report(title, report):
+    print(f"\n📊 {title}")
+    print(f"  请求数 {report['requests']}，耗时 {report['wall_seconds']:.2f}s，吞吐量 {report['throughput']:.1f} 请求/秒")
+    print(f"  延迟 p50 {report['p50_ms']:.1f} ms / p90 {report['p90_ms']:.1f} ms / "
+          f"p99 {report['p99_ms']:.1f} ms / max {report['max_ms']:.1f} ms")
+    print(f"  成功 {report['ok']}，降级为默认推荐 {report['default']}，错误 {report['error']}")
+
+
+def run_service(args, ollama, search):
+    """直接并发调用 AbuDhabiService"""
+    from services.abu_dhabi_service import AbuDhabiService
+
+    cache_dir = tempfile.mkdtemp(prefix='completion-cache-') if args.completion_cache else None
+    service = AbuDhabiService(
+        use_proxy=False,
+        ollama_url=ollama.url,
+        search_url=search.duckduckgo_url,
+        search_cache_path=None,
+        completion_cache_dir=cache_dir,
+        max_concurrent_generations=args.max_concurrent,
+        queue_timeout=args.queue_timeout
+    )
+    defaults = service._get_default_recommendations()
+
+    def call():
+        return 'default' if service.generate_recommendations() == defaults else 'ok'
+
+    report = drive(call, args.requests, args.concurrency)
+    print_report(f"AbuDhabiService.generate_recommendations，并发 {args.concurrency}", report)
+    limiter = service.ollama_stats()['limiter']
+    coalescing = service.ollama_stats()['coalescing']
+    print(f"  Ollama 生成 {coalescing['executed']} 次，合并 {coalescing['coalesced']} 次；"
+          f"最大排队 {limiter['max_queue_depth']}，平均等待 {limiter['avg_wait_ms']:.0f} ms，"
+          f"排队超时 {limiter['rejected']} 次")
+    print(f"  桩服务器请求数: Ollama {ollama.requests}，搜索 {search.requests}")
+    return report
+
+
+def run_http(args, ollama, search):
+    """并发请求 HTTP 接口"""
+    import requests
+
+    url = args.url
+    server = None
+    if url is None:
+        # 在进程内启动 app.py（需要其全部依赖）
+        os.environ.update({
+            'OLLAMA_URL': ollama.url,
+            'DUCKDUCKGO_URL': search.duckduckgo_url,
+            'ABU_DHABI_USE_PROXY': '0'
+        })
+        try:
+            import app as flask_app
+        except ImportError as e:
+            print(f"❌ 无法导入 app.py: {e}")
+            print("💡 请安装全部依赖，或先手动启动应用后用 --url 指定接口，或使用 --target service")
+            return None
+
+        flask_app.start_background_tasks()  # 推荐缓存预生成（导入 app 时不会自动启动）
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', 0, flask_app.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_port}{args.path}'
+        if args.warmup > 0:
+            print(f"⏳ 等待推荐缓存预热 {args.warmup:g}s ...")
+            time.sleep(args.warmup)
+
+    local = threading.local()
+
+    def call():
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return 'ok' if response.json().get('success') else 'default'
+
+    report = drive(call, args.requests, args.concurrency)
+    print_report(f"GET {url}，并发 {args.concurrency}", report)
+    if server:
+        server.shutdown()
+        flask_app.stop_background_tasks(timeout=1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='阿布扎比推荐接口压测')
+    parser.add_argument('--target', choices=['http', 'service'], default='http')
+    parser.add_argument('--url', default=None, help='被测接口完整地址（http 目标）')
+    parser.add_argument('--path', default='/api/abu_dhabi_recommendations', help='进程内启动应用时请求的路径')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='并发数')
+    parser.add_argument('-n', '--requests', type=int, default=200, help='请求总数')
+    parser.add_argument('--warmup', type=float, default=5.0, help='进程内启动应用后等待缓存预热的秒数')
+    parser.add_argument('--first-token-latency', type=float, default=0.2, help='桩 Ollama 首 token 延迟（秒）')
+    parser.add_argument('--tokens-per-second', type=float, default=200.0, help='桩 Ollama 生成速度')
+    parser.add_argument('--search-latency', type=float, default=0.05, help='桩搜索延迟（秒）')
+    parser.add_argument('--max-concurrent', type=int, default=2, help='service 目标：Ollama 并发上限')
+    parser.add_argument('--queue-timeout', type=float, default=5.0, help='service 目标：排队超时（秒）')
+    parser.add_argument('--completion-cache', action='store_true', help='service 目标：启用模型输出缓存')
+    args = parser.parse_args(argv)
+
+    with StubOllamaServer(first_token_latency=args.first_token_latency,
+                          tokens_per_second=args.tokens_per_second) as ollama, \
+            StubSearchServer(latency=args.search_latency) as search:
+        if args.target == 'service':
+            report = run_service(args, ollama, search)
+        else:
+            report = run_http(args, ollama, search)
+
+    return 0 if report is not None else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+AbuDhabiService 冷启动耗时：启动时同步检查 Ollama（旧行为） vs 后台健康检查（当前行为）
+
+每次在独立子进程中导入并构造 AbuDhabiService（相当于一个 worker 导入 app.py 时的这部分开销），
+分别在三种 Ollama 状态下测量：
+- hung:    端口在监听但从不响应（Ollama 卡死 / 网络黑洞），旧行为要等到读超时
+- refused: 端口没有服务（Ollama 未启动）
+- up:      本地 Ollama 桩服务器
+
+blocking 模式在构造后同步执行一次 5 秒超时的 /api/tags 探测，复现旧的启动检查，
+deferred 模式在构造后调用 start_health_check 启动后台探测（与 app.py 的 start_background_tasks 一致）；
+同时测量 Ollama 不可用时第一次 generate_recommendations 的耗时（熔断后应立即返回默认推荐）。
+
+用法:
+    python tests/benchmark_service_cold_start.py --repeat 3
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.stub_servers import StubOllamaServer
+
+MEASURE_SCRIPT = r'''
+import json, sys, time
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+from services.abu_dhabi_service import AbuDhabiService
+service = AbuDhabiService(use_proxy=False, ollama_url={url!r}, search_cache_path=None, completion_cache_dir=None)
+if {blocking!r}:
+    service.ollama_health.probe_timeout = 5
+    service.ollama_health.check_now()
+else:
+    service.start_health_check()
+t1 = time.perf_counter()
+
+# 等后台第一次探测完成，再测量一次推荐生成（搜索替换为空操作，只看模型调用部分）
+deadline = time.time() + 15
+while service.ollama_health.last_probe_ok is None and time.time() < deadline:
+    time.sleep(0.01)
+service._search_for_topic = lambda topic: [{{'title': topic, 'url': 'https://example.com'}}]
+t2 = time.perf_counter()
+recommendations = service.generate_recommendations('阿布扎比美食推荐')
+t3 = time.perf_counter()
+print(json.dumps({{
+    'startup_ms': (t1 - t0) * 1000,
+    'generate_ms': (t3 - t2) * 1000,
+    'available': service.ollama_health.stats()['available'],
+}}))
+'''
+
+
+def measure(url, blocking):
+    """在子进程中测量一次冷启动"""
+    script = MEASURE_SCRIPT.format(root=ROOT, url=url, blocking=blocking)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            timeout=120, cwd=ROOT)
+    lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+    if not lines:
+        raise RuntimeError(output.stderr or output.stdout)
+    return json.loads(lines[-1])
+
+
+def blackhole_server():
+    """只 listen 不 accept 的套接字：连接能建立，但请求永远得不到响应"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(64)
+    return sock
+
+
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='AbuDhabiService 冷启动耗时基准')
+    parser.add_argument('--repeat', type=int, default=3, help='每种组合重复次数')
+    args = parser.parse_args(argv)
+
+    hole = blackhole_server()
+    ollama = StubOllamaServer(first_token_latency=0.0, tokens_per_second=0).start()
+    scenarios = [
+        ('hung', f'http://127.0.0.1:{hole.getsockname()[1]}'),
+        ('refused', f'http://127.0.0.1:{closed_port()}'),
+        ('up', ollama.url),
+    ]
+
+    print(f"{'Ollama':<8} {'模式':<10} {'启动(ms)':>10} {'首次推荐(ms)':>14} {'可用':>6}")
+    try:
+        for name, url in scenarios:
+            for blocking in (True, False):
+                runs = [measure(url, blocking) for _ in range(args.repeat)]
+                print(f"{name:<8} {'blocking' if blocking else 'deferred':<10} "
+                      f"{statistics.median(r['startup_ms'] for r in runs):>10.1f} "
+                      f"{statistics.median(r['generate_ms'] for r in runs):>14.1f} "
+                      f"{str(runs[-1]['available']):>6}")
+    finally:
+        ollama.stop()
+        hole.close()
+
+
+if __name__ == '__main__':
+    main()
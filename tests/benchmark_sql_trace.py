@@ -0,0 +1,100 @@
+"""
+SQL 追踪基准 - 追踪开销，以及服务层读路径在合成数据库上的语句汇总（哪些语句占了大部分时间、哪些在全表扫描）
+
+- 开销: 主键查询 execute + fetchone，原生 sqlite3 vs SQLTracer vs SQLTracer(explain='all')
+- 汇总: 对 --sample 个用户依次调用 Database / LotteryMachine 的读方法（首页、奖品包、消息、额度、盲盒历史、
+  消费汇总），用 explain='all' 追踪并打印按总耗时排序的语句表
+
+数据来自 utils/synthetic_data.py 在临时目录生成的合成数据库（--users / --seed）。
+
+用法:
+    python tests/benchmark_sql_trace.py --users 20000 --sample 200
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests.microbench import format_time, measure  # noqa: E402
+from utils import db_instrument  # noqa: E402
+from utils.sql_trace import SQLTracer  # noqa: E402
+from utils.synthetic_data import SyntheticDataGenerator  # noqa: E402
+
+
+def measure_overhead(db_path, repeat):
+    def statement(conn):
+        return lambda: conn.execute('SELECT id, username, wecoin FROM user WHERE id = ?', (10,)).fetchone()
+
+    results = {}
+    conn = sqlite3.connect(db_path)
+    results['未追踪'] = measure(statement(conn), repeat=repeat)
+    conn.close()
+    for label, explain in (('追踪', None), ("追踪 + explain='all'", 'all')):
+        tracer = SQLTracer(slow_threshold=10, explain=explain).install()
+        conn = sqlite3.connect(db_path)
+        results[label] = measure(statement(conn), repeat=repeat)
+        conn.close()
+        tracer.uninstall()
+    db_instrument.uninstall()
+
+    base = results['未追踪']['median']
+    print("\n📊 单条主键查询 execute + fetchone")
+    for label, stats in results.items():
+        extra = f"（+{format_time(stats['median'] - base)}）" if label != '未追踪' else ''
+        print(f"  {label:<24}{format_time(stats['median']):>12}{extra}")
+
+
+def trace_read_paths(db_path, sample, seed):
+    from services.lottery import LotteryMachine
+    from utils.database import Database
+
+    conn = sqlite3.connect(db_path)
+    user_ids = [row[0] for row in conn.execute('SELECT id FROM user').fetchall()]
+    conn.close()
+    users = random.Random(seed).sample(user_ids, min(sample, len(user_ids)))
+
+    tracer = SQLTracer(slow_threshold=0.005, explain='all').install()
+    try:
+        db = Database(db_path)
+        lottery = LotteryMachine(db_path)
+        for user_id in users:
+            db.get_user_wecoin(user_id)
+            db.get_user_rewards(user_id)
+            db.get_user_messages(user_id)
+            db.get_credit_info(user_id)
+            db.list_transactions(user_id)
+            db.aggregate_transactions(user_id)
+            lottery.get_blind_box_data(user_id)
+        tracer.print_report(limit=15)
+        stats = tracer.stats()
+        print(f"\n  共 {stats['traced']} 条语句，{stats['statements']} 种，慢查询（≥ 5 ms）{stats['slow']} 条")
+    finally:
+        tracer.uninstall()
+        db_instrument.uninstall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='SQL 追踪基准')
+    parser.add_argument('--users', type=int, default=20000, help='合成数据库的用户数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--sample', type=int, default=200, help='汇总时调用读方法的用户数')
+    parser.add_argument('--repeat', type=int, default=15, help='开销计时轮数')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'trace.db')
+        print(f"⏳ 生成 {args.users} 个用户的合成数据库...")
+        SyntheticDataGenerator(db_path, seed=args.seed).generate(args.users)
+
+        measure_overhead(db_path, args.repeat)
+        trace_read_paths(db_path, args.sample, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+信用额度模型推理后端延迟对比
+
+对比批量大小 1 / 100 / 100000 下：
+- sklearn: XGBRegressor.predict（原有调用方式）
+- booster: Booster.inplace_predict（原生 Booster，无 sklearn 包装）
+- numpy:   TreeEnsemble 逐树下降的向量化推理
+- table:   TreeEnsemble 编译为查找表后的推理（CreditLimitService(backend='numpy') 的实际路径）
+
+用法:
+    python tests/benchmark_tree_backend.py --repeat 50
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.tree_ensemble import TreeEnsemble  # noqa: E402
+
+BATCH_SIZES = (1, 100, 100000)
+
+
+def time_call(fn, x, repeat):
+    """返回中位数耗时（秒）"""
+    fn(x)  # 预热
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(x)
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='推理后端延迟对比')
+    parser.add_argument('--model', default='models/xgboost_simple_model.pkl')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    import joblib
+    warnings.filterwarnings('ignore')
+    model = joblib.load(args.model)
+    booster = model.get_booster()
+    ensemble = TreeEnsemble.from_booster(booster)
+    table = TreeEnsemble.from_booster(booster)
+    table.compile_lookup_table(num_features=2)
+
+    backends = {
+        'sklearn': model.predict,
+        'booster': booster.inplace_predict,
+        'numpy': ensemble.predict,
+        'table': table.predict,
+    }
+
+    rng = np.random.default_rng(0)
+    print("\n" + "=" * 82)
+    print(f"{'批量大小':<10}" + "".join(f"{name:>18}" for name in backends))
+    print("-" * 82)
+    for batch in BATCH_SIZES:
+        x = np.column_stack((rng.uniform(0, 300000, batch), rng.uniform(0, 50000, batch)))
+        repeat = max(3, args.repeat // 10) if batch >= 100000 else args.repeat
+        cells = []
+        for name, fn in backends.items():
+            seconds = time_call(fn, x, repeat)
+            cells.append(f"{seconds * 1e6:>15,.0f} µs")
+        print(f"{batch:<10}" + "".join(f"{c:>18}" for c in cells))
+    print("=" * 82)
+    print(f"模型: {ensemble.num_trees} 棵树, 最大深度 {ensemble.max_depth}, "
+          f"查找表 {'x'.join(str(n) for n in table.lookup_table.shape)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+测试与基准脚本共用的数据辅助函数（测试不应从 benchmark_*.py 脚本中导入）
+
+- 注册相关：create_registration_schema / make_applicants / write_csv
+- 额度重评分：build_rescore_database
+- 统计：percentile
+- 阿布扎比推荐服务：FakeResponse / FakeSession（替代共享 HTTP 会话）与 make_service
+"""
+
+import csv
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from utils.database import INCOME_PROFILE_DDL
+
+REGISTRATION_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS user (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, card_number TEXT, region TEXT, location_city TEXT,
+    avatar_initial TEXT, landmark_image TEXT, phone TEXT, email TEXT, wecoin INTEGER DEFAULT 0,
+    redeem_today_count INTEGER DEFAULT 5, expected_return_day TEXT, created_at DATETIME,
+    face_encoding TEXT, face_image_path TEXT, face_registered_at DATETIME
+);
+CREATE TABLE IF NOT EXISTS credit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, total_limit REAL, available_limit REAL, updated_at DATETIME
+);
+CREATE TABLE IF NOT EXISTS exchange_rate (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, pair TEXT, value REAL, updated_at DATETIME
+);
+'''
+
+APPLICANT_FIELDS = ['card_suffix', 'expected_return_day', 'username', 'credit_limit', 'total_income', 'balance']
+
+
+def create_registration_schema(db_path):
+    """创建注册用到的表（与 utils/init_db.py 一致的列）"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(REGISTRATION_SCHEMA)
+    conn.commit()
+    conn.close()
+
+
+def make_applicants(count, seed=0):
+    """生成申请人"""
+    rng = random.Random(seed)
+    return [
+        {
+            'card_suffix': f'{rng.randrange(10 ** 8):08d}',
+            'expected_return_day': f'2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+            'username': f'traveller{i}',
+            'credit_limit': rng.randrange(5000, 200000, 1000),
+            'total_income': round(rng.uniform(5000, 300000), 2),
+            'balance': round(rng.uniform(500, 50000), 2),
+        }
+        for i in range(count)
+    ]
+
+
+def write_csv(path, applicants):
+    """把申请人写成批量注册导入用的 CSV"""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=APPLICANT_FIELDS)
+        writer.writeheader()
+        writer.writerows(applicants)
+
+
+def build_rescore_database(db_path, num_users, tx_per_user=3, seed=42):
+    """生成额度重评分用的数据库（约 10% 的用户没有收入画像）"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute('CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT)')
+    cursor.execute('''
+        CREATE TABLE credit (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+                             total_limit REAL, available_limit REAL, updated_at DATETIME)
+    ''')
+    cursor.execute('''
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, amount REAL,
+                                   currency TEXT, converted_amount REAL, rate REAL,
+                                   wecoin_earned INTEGER, spend_time DATETIME)
+    ''')
+    cursor.execute(INCOME_PROFILE_DDL)
+
+    now = datetime.now()
+    cursor.executemany('INSERT INTO user (id, username) VALUES (?, ?)',
+                       ((i, f'user{i}') for i in range(1, num_users + 1)))
+    # 约 10% 的用户没有收入画像（应被跳过）
+    cursor.executemany('INSERT INTO income_profile VALUES (?, ?, ?, ?)',
+                       ((i, rng.uniform(5000, 300000), rng.uniform(500, 50000), now)
+                        for i in range(1, num_users + 1) if rng.random() > 0.1))
+    cursor.executemany('INSERT INTO transactions (user_id, amount, currency, converted_amount, rate, '
+                       'wecoin_earned, spend_time) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       ((i, rng.uniform(10, 800), 'UAE', 0.0, 1.97, 0, now)
+                        for i in range(1, num_users + 1) for _ in range(tx_per_user)))
+    conn.commit()
+    conn.close()
+
+
+def percentile(sorted_values, p):
+    """已排序数据的第 p 百分位（最近秩，空列表返回 0.0）"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(p / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class FakeResponse:
+    """模拟 requests 响应：json() 返回完整的 Ollama 输出，iter_lines() 按 token 逐行返回流式片段"""
+
+    def __init__(self, text='', status_code=200, token_size=4):
+        self.text = text
+        self.status_code = status_code
+        self.lines = [
+            json.dumps({'message': {'content': text[i:i + token_size]}, 'done': False}).encode()
+            for i in range(0, len(text), token_size)
+        ]
+        self.lines.append(json.dumps({'message': {'content': ''}, 'done': True}).encode())
+        self.consumed = 0
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f'HTTP {self.status_code}')
+
+    def json(self):
+        return {'message': {'content': self.text}, 'done': True}
+
+    def iter_lines(self):
+        for line in self.lines:
+            self.consumed += 1
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """
+    替代 utils.http.get_session 返回的共享会话（Ollama 与搜索共用）
+
+    - get: /api/tags 探测与搜索请求，tags_ok=False 时连接失败
+    - post: /api/chat，返回 completion（字符串，或 completion(payload) 计算出的字符串），chat_ok=False 时连接失败
+    """
+
+    def __init__(self, completion='[]', delay=0.0, get_delay=0.0, tags_ok=True, chat_ok=True, token_size=4):
+        self.completion = completion
+        self.delay = delay
+        self.get_delay = get_delay
+        self.tags_ok = tags_ok
+        self.chat_ok = chat_ok
+        self.token_size = token_size
+        self.gets = 0
+        self.posts = 0
+        self.responses = []
+        self.probed = threading.Event()
+        self._lock = threading.Lock()
+
+    def get(self, *args, **kwargs):
+        with self._lock:
+            self.gets += 1
+        time.sleep(self.get_delay)
+        self.probed.set()
+        if not self.tags_ok:
+            raise ConnectionError('connection refused')
+        return FakeResponse()
+
+    def post(self, url, json=None, stream=False, timeout=None):
+        with self._lock:
+            self.posts += 1
+        time.sleep(self.delay)
+        if not self.chat_ok:
+            raise ConnectionError('connection refused')
+        text = self.completion(json) if callable(self.completion) else self.completion
+        response = FakeResponse(text, token_size=self.token_size)
+        self.responses.append(response)
+        return response
+
+
+def make_service(monkeypatch, session=None, search_results=None, **overrides):
+    """
+    构造使用 FakeSession 的 AbuDhabiService（不使用代理、搜索缓存和输出缓存，除非 overrides 指定）
+
+    Args:
+        session: 替代所有共享会话的假会话（默认新建 FakeSession）
+        search_results: 替代 _search_for_topic 的结果列表，或 topic -> 结果列表 的函数（None 表示不替换）
+        overrides: 传给 AbuDhabiService 的其他参数
+    """
+    import pytest
+
+    pytest.importorskip('requests')
+    from services import abu_dhabi_service
+
+    session = session or FakeSession()
+    monkeypatch.setattr(abu_dhabi_service, 'get_session', lambda name, **kwargs: session)
+    options = {'use_proxy': False, 'search_cache_path': None, 'completion_cache_dir': None}
+    options.update(overrides)
+    service = abu_dhabi_service.AbuDhabiService(**options)
+    if search_results is not None:
+        search = search_results if callable(search_results) else (lambda topic: search_results)
+        monkeypatch.setattr(service, '_search_for_topic', search)
+    return service
@@ -0,0 +1,183 @@
+"""
+微基准工具 - 预热、自动确定每轮循环次数、多轮重复、统计汇总与基线对比
+
+被 tests/benchmark_kernels.py 使用，也可以单独计时任意无参函数:
+
+    from tests.microbench import measure, format_time
+    stats = measure(lambda: sorted(data), repeat=20)
+    print(format_time(stats['median']))
+
+所有时间都是单次调用的秒数。
+"""
+
+import contextlib
+import gc
+import json
+import os
+import statistics
+import time
+
+# 判定回归的默认阈值：中位数变慢超过 10%
+DEFAULT_THRESHOLD = 0.10
+
+
+def _time_loops(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return time.perf_counter() - start
+
+
+def calibrate(func, min_time=0.05, max_number=10 ** 7):
+    """
+    确定每轮循环次数，使一轮耗时不少于 min_time（避免计时器精度影响微秒级函数）
+
+    Returns:
+        int: 每轮调用次数
+    """
+    number = 1
+    while number < max_number:
+        elapsed = _time_loops(func, number)
+        if elapsed >= min_time:
+            break
+        # 按已测耗时估算，每次最多放大 10 倍
+        estimate = int(number * min_time / elapsed * 1.2) if elapsed > 0 else number * 10
+        number = min(max(number + 1, min(estimate, number * 10)), max_number)
+    return number
+
+
+def summarize(samples, number=1):
+    """
+    汇总每轮的单次耗时
+
+    Args:
+        samples: 每轮的单次调用耗时（秒）
+        number: 每轮调用次数
+
+    Returns:
+        dict: {'repeat', 'number', 'min', 'q1', 'median', 'mean', 'q3', 'max', 'stdev'}
+    """
+    ordered = sorted(samples)
+    if len(ordered) >= 2:
+        q1, _, q3 = statistics.quantiles(ordered, n=4, method='inclusive')
+        stdev = statistics.stdev(ordered)
+    else:
+        q1 = q3 = ordered[0]
+        stdev = 0.0
+    return {
+        'repeat': len(ordered),
+        'number': number,
+        'min': ordered[0],
+        'q1': q1,
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'q3': q3,
+        'max': ordered[-1],
+        'stdev': stdev
+    }
+
+
+def measure(func, warmup=3, repeat=15, min_time=0.05, number=None, quiet=True, disable_gc=True):
+    """
+    测量无参函数的单次耗时
+
+    Args:
+        func: 被测函数
+        warmup: 正式计时前的调用次数（填充缓存、触发延迟加载）
+        repeat: 计时轮数
+        min_time: 自动确定循环次数时，每轮的最短耗时（秒）
+        number: 每轮调用次数（默认自动确定）
+        quiet: 丢弃被测函数的 print 输出
+        disable_gc: 计时期间暂停垃圾回收（与 timeit 一致）
+
+    Returns:
+        dict: 见 summarize
+    """
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        for _ in range(warmup):
+            func()
+        number = number or calibrate(func, min_time)
+
+        gc_was_enabled = gc.isenabled()
+        if disable_gc:
+            gc.disable()
+        try:
+            samples = [_time_loops(func, number) / number for _ in range(repeat)]
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return summarize(samples, number)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    与基线结果对比
+
+    中位数变慢超过 threshold，且本次的下四分位数高于基线的上四分位数（两次分布不重叠）时判定为回归，
+    以免把单纯的测量噪声当作回归；变快的判定与之对称。
+    基线中有、本次没有的条目标为 'missing'（改名或被跳过的内核不会悄悄逃过对比）。
+
+    Args:
+        results: {名称: summarize 的结果}
+        baseline: 同结构的基线结果
+        threshold: 相对变化阈值
+
+    Returns:
+        list[dict]: [{'name', 'baseline', 'current', 'ratio', 'status'}]，
+            status 为 'regressed' / 'improved' / 'unchanged' / 'new' / 'missing'
+    """
+    report = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            report.append({'name': name, 'baseline': None, 'current': current['median'], 'ratio': None,
+                           'status': 'new'})
+            continue
+        ratio = current['median'] / base['median'] if base['median'] > 0 else float('inf')
+        if ratio > 1 + threshold and current['q1'] > base['q3']:
+            status = 'regressed'
+        elif ratio < 1 / (1 + threshold) and current['q3'] < base['q1']:
+            status = 'improved'
+        else:
+            status = 'unchanged'
+        report.append({'name': name, 'baseline': base['median'], 'current': current['median'], 'ratio': ratio,
+                       'status': status})
+    for name, base in baseline.items():
+        if name not in results:
+            report.append({'name': name, 'baseline': base['median'], 'current': None, 'ratio': None,
+                           'status': 'missing'})
+    return report
+
+
+def format_time(seconds):
+    """按量级格式化耗时"""
+    if seconds is None:
+        return '-'
+    if seconds < 0:
+        return '-' + format_time(-seconds)
+    if seconds >= 1:
+        return f'{seconds:.2f} s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.2f} ms'
+    if seconds >= 1e-6:
+        return f'{seconds * 1e6:.2f} µs'
+    return f'{seconds * 1e9:.0f} ns'
+
+
+def save_results(path, results, meta=None):
+    """把结果写入 JSON（可作为之后运行的基线）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta or {}, 'results': results}, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path):
+    """读取 save_results 写入的结果，返回 {名称: 统计}"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['results']
+
+
+def load_meta(path):
+    """读取 save_results 写入的 meta"""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('meta', {})
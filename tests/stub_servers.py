@@ -0,0 +1,256 @@
+"""
+本地桩服务器 - 模拟 Ollama、DuckDuckGo、百度，用于压测和 CI 中的基准测试
+
+- StubOllamaServer: /api/tags、/api/chat（流式 NDJSON 与非流式 JSON），可配置首 token 延迟和生成速度
+- StubSearchServer: /html/（DuckDuckGo HTML 版）与 /s（百度），返回 tests/data 下保存的示例页面，可配置延迟
+- StubHTMLServer: 任意路径返回固定 HTML，可配置每次建立连接的额外耗时（连接复用测试）
+
+单独运行（启动后按提示设置环境变量再启动 app.py）:
+    python tests/stub_servers.py --ollama-port 11500 --search-port 11501 --tokens-per-second 40
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# 默认模型输出：3条推荐的 JSON 数组
+DEFAULT_COMPLETION = '''[
+  {"title": "谢赫扎耶德大清真寺", "description": "世界最大的清真寺之一，白色大理石建筑令人震撼"},
+  {"title": "阿布扎比卢浮宫", "description": "海上博物馆，穹顶下的光之雨不可错过"},
+  {"title": "亚斯岛法拉利世界", "description": "全球最快过山车，适合亲子游玩"}
+]'''
+
+
+class _StubServer:
+    """桩服务器基类：后台线程运行、统计请求数"""
+
+    connect_delay = 0.0  # 每次接受新连接时的额外等待（秒）
+
+    def __init__(self, handler_class, port=0):
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        # 每个实例使用自己的处理器子类，多个桩服务器可以同时运行
+        handler = type(handler_class.__name__, (handler_class,), {'stub': self})
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def reset(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    disable_nagle_algorithm = True
+    stub = None
+
+    def setup(self):
+        super().setup()
+        with self.stub._lock:
+            self.stub.connections += 1
+        if self.stub.connect_delay:
+            time.sleep(self.stub.connect_delay)
+
+    def send_body(self, body, content_type, status=200):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubOllamaServer(_StubServer):
+    """模拟 Ollama HTTP 接口"""
+
+    def __init__(self, port=0, first_token_latency=0.2, tokens_per_second=40.0,
+                 completion=DEFAULT_COMPLETION, chars_per_token=4, model='llama3.2:3b'):
+        """
+        Args:
+            first_token_latency: 收到请求到输出第一个 token 的延迟（秒，模拟提示词处理）
+            tokens_per_second: 生成速度
+            completion: 模型输出文本
+            chars_per_token: 每个 token 对应的字符数（用于切分流式输出）
+            model: /api/tags 返回的模型名
+        """
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.completion = completion
+        self.chars_per_token = chars_per_token
+        self.model = model
+        # 模拟单个 Ollama 实例：同一时间只生成一个请求
+        self.generation_lock = threading.Lock()
+        super().__init__(_OllamaHandler, port)
+
+    def tokens(self):
+        text, size = self.completion, self.chars_per_token
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class _OllamaHandler(_Handler):
+    def do_GET(self):
+        self.stub.count_request()
+        if self.path.startswith('/api/tags'):
+            self.send_body(json.dumps({'models': [{'name': self.stub.model}]}), 'application/json')
+        else:
+            self.send_body('not found', 'text/plain', status=404)
+
+    def do_POST(self):
+        self.stub.count_request()
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not self.path.startswith('/api/chat'):
+            self.send_body('not found', 'text/plain', status=404)
+            return
+
+        stub = self.stub
+        tokens = stub.tokens()
+        interval = 1.0 / stub.tokens_per_second if stub.tokens_per_second > 0 else 0.0
+
+        with stub.generation_lock:
+            time.sleep(stub.first_token_latency)
+
+            if not request.get('stream', True):
+                time.sleep(interval * len(tokens))
+                self.send_body(json.dumps({
+                    'model': request.get('model'),
+                    'message': {'role': 'assistant', 'content': stub.completion},
+                    'done': True
+                }, ensure_ascii=False), 'application/json')
+                return
+
+            # 流式：分块传输，每个 token 一行 JSON
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            try:
+                for token in tokens:
+                    self._write_chunk({'message': {'role': 'assistant', 'content': token}, 'done': False})
+                    time.sleep(interval)
+                self._write_chunk({'message': {'role': 'assistant', 'content': ''}, 'done': True})
+                self.wfile.write(b'0\r\n\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                # 客户端提前断开（如已取得3条推荐）
+                self.close_connection = True
+
+    def _write_chunk(self, obj):
+        data = (json.dumps(obj, ensure_ascii=False) + '\n').encode('utf-8')
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+
+class StubSearchServer(_StubServer):
+    """模拟 DuckDuckGo HTML 搜索（/html/）和百度搜索（/s）"""
+
+    def __init__(self, port=0, latency=0.1,
+                 duckduckgo_page='duckduckgo_results.html', baidu_page='baidu_results.html'):
+        """
+        Args:
+            latency: 每个搜索请求的响应延迟（秒）
+            duckduckgo_page / baidu_page: tests/data 下的示例页面文件名
+        """
+        self.latency = latency
+        with open(os.path.join(DATA_DIR, duckduckgo_page), encoding='utf-8') as f:
+            self.duckduckgo_html = f.read()
+        with open(os.path.join(DATA_DIR, baidu_page), encoding='utf-8') as f:
+            self.baidu_html = f.read()
+        super().__init__(_SearchHandler, port)
+
+    @property
+    def duckduckgo_url(self):
+        return f'{self.url}/html/'
+
+
+class _SearchHandler(_Handler):
+    def do_GET(self):
+        self.stub.count_request()
+        time.sleep(self.stub.latency)
+        if self.path.startswith('/html'):
+            self.send_body(self.stub.duckduckgo_html, 'text/html; charset=utf-8')
+        elif self.path.startswith('/s'):
+            self.send_body(self.stub.baidu_html, 'text/html; charset=utf-8')
+        else:
+            self.send_body('not found', 'text/plain', status=404)
+
+
+class StubHTMLServer(_StubServer):
+    """任意 GET/POST 都返回固定 HTML，统计连接数与请求数"""
+
+    def __init__(self, port=0, connect_delay=0.0, body=b'<html><h3>stub</h3></html>'):
+        """
+        Args:
+            connect_delay: 每次接受新连接时额外等待（秒，模拟经代理建立 TLS 连接的握手开销）
+            body: 响应内容
+        """
+        self.connect_delay = connect_delay
+        self.body = body
+        super().__init__(_HTMLHandler, port)
+
+
+class _HTMLHandler(_Handler):
+    def do_GET(self):
+        self.stub.count_request()
+        self.send_body(self.stub.body, 'text/html')
+
+    do_POST = do_GET
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='启动本地 Ollama / 搜索桩服务器')
+    parser.add_argument('--ollama-port', type=int, default=11500)
+    parser.add_argument('--search-port', type=int, default=11501)
+    parser.add_argument('--first-token-latency', type=float, default=0.2, help='首 token 延迟（秒）')
+    parser.add_argument('--tokens-per-second', type=float, default=40.0, help='生成速度')
+    parser.add_argument('--search-latency', type=float, default=0.1, help='搜索响应延迟（秒）')
+    args = parser.parse_args(argv)
+
+    ollama = StubOllamaServer(args.ollama_port, args.first_token_latency, args.tokens_per_second).start()
+    search = StubSearchServer(args.search_port, args.search_latency).start()
+
+    print(f"🤖 Ollama 桩服务器: {ollama.url}")
+    print(f"🔍 搜索桩服务器: {search.url}")
+    print("💡 启动 app.py 前设置:")
+    print(f"   export OLLAMA_URL={ollama.url} DUCKDUCKGO_URL={search.duckduckgo_url} ABU_DHABI_USE_PROXY=0")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        ollama.stop()
+        search.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+阿布扎比推荐并行搜索测试 - 总时限 / 结果合并
+运行: python -m pytest tests/test_abu_dhabi_search.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+pytest.importorskip('requests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import abu_dhabi_service as module  # noqa: E402
+from tests.helpers import make_service  # noqa: E402
+
+# 查询 -> (耗时秒数, 结果URL列表)
+SEARCH_PLAN = {
+    'fast': (0.01, ['https://a.example', 'https://shared.example']),
+    'medium': (0.05, ['https://shared.example', 'https://b.example']),
+    'slow': (2.0, ['https://slow.example']),
+    'broken': (0.01, None),
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    svc = make_service(monkeypatch, fan_out=3, search_deadline=0.3)
+    calls = []
+
+    def fake_search(query, num_results=3, timeout=10, fallback=True, retry=True):
+        calls.append((query, timeout, fallback))
+        assert retry is (timeout == 10)
+        delay, urls = SEARCH_PLAN.get(query, (0.01, [f'https://{len(calls)}.example']))
+        time.sleep(delay)
+        if urls is None:
+            raise RuntimeError('search engine error')
+        return [{'title': url, 'url': url} for url in urls]
+
+    monkeypatch.setattr(svc, 'search_duckduckgo', fake_search)
+    svc.calls = calls
+    return svc
+
+
+def test_search_many_respects_deadline_and_merges_in_query_order(service):
+    start = time.monotonic()
+    results = service.search_many(['fast', 'slow', 'broken', 'medium'])
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0
+    assert [r['url'] for r in results] == ['https://a.example', 'https://shared.example', 'https://b.example']
+    # 并行搜索不做串行的通用查询重试，单个请求超时不超过总时限
+    assert all(fallback is False and 0 < timeout <= 0.3 for _, timeout, fallback in service.calls)
+
+
+def test_abandoned_searches_finish_near_deadline():
+    from tests.stub_servers import StubSearchServer
+
+    with StubSearchServer(latency=5.0) as server:
+        svc = module.AbuDhabiService(use_proxy=False, fan_out=3, search_deadline=0.3, search_url=server.duckduckgo_url,
+                                     search_cache_path=None, completion_cache_dir=None, health_check_interval=None)
+        search = svc.search_duckduckgo
+        finished = []
+        svc.search_duckduckgo = lambda *args, **kwargs: (search(*args, **kwargs), finished.append(time.monotonic()))[0]
+
+        start = time.monotonic()
+        assert svc.search_many(['q1', 'q2', 'q3']) == []
+        deadline = time.monotonic() + 3
+        while len(finished) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # 请求超时取剩余时限且不重试：每个查询只请求一次，线程在时限后不久就结束
+        assert len(finished) == 3
+        assert max(finished) - start < 0.8
+        assert server.requests == 3
+
+
+def test_topic_search_fans_out_to_other_topics_and_generic_query(service):
+    results = service._search_for_topic(module.AbuDhabiService.TOPICS[0])
+
+    queries = [query for query, _, _ in service.calls]
+    assert len(queries) == 3
+    assert queries[0] == module.AbuDhabiService.TOPICS[0]
+    assert queries[1] in module.AbuDhabiService.TOPICS[1:]
+    assert queries[2] == 'Abu Dhabi'
+    assert len(results) == 3
+
+
+def test_fan_out_of_one_searches_serially(service):
+    service.fan_out = 1
+    service._search_for_topic('fast')
+    assert service.calls == [('fast', 10, True)]
@@ -0,0 +1,71 @@
+"""
+阿布扎比推荐流式生成测试 - JSON 增量解析 / Ollama 流式响应
+运行: python -m pytest tests/test_abu_dhabi_stream.py
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('requests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import make_service  # noqa: E402
+from utils.json_stream import JSONObjectStreamParser  # noqa: E402
+
+MODEL_OUTPUT = ('好的，以下是推荐：\n```json\n[\n'
+                '  {"title": "谢赫扎耶德{大}清真寺", "description": "白色大理石\\"奇迹\\""},\n'
+                '  {"title": "卢浮宫", "description": "海上博物馆"},\n'
+                '  {"title": "法拉利世界", "description": "刺激过山车"}\n'
+                ']\n```')
+
+
+def test_parser_emits_each_object_as_it_completes():
+    parser = JSONObjectStreamParser()
+    emitted = []
+    for i in range(0, len(MODEL_OUTPUT), 3):
+        emitted.append(parser.feed(MODEL_OUTPUT[i:i + 3]))
+
+    objects = [obj for batch in emitted for obj in batch]
+    assert [o['title'] for o in objects] == ['谢赫扎耶德{大}清真寺', '卢浮宫', '法拉利世界']
+    assert objects[0]['description'] == '白色大理石"奇迹"'
+
+    # 第一个对象在整段文本结束之前就已产出
+    first_batch = next(i for i, batch in enumerate(emitted) if batch)
+    assert first_batch < len(emitted) // 2
+
+
+def test_parser_skips_malformed_objects():
+    parser = JSONObjectStreamParser()
+    assert parser.feed('[{"title": oops}, {"title": "ok"}]') == [{'title': 'ok'}]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    return make_service(monkeypatch, search_results=[
+        {'title': f'result {i}', 'url': f'https://example.com/{i}'} for i in range(3)
+    ])
+
+
+def test_stream_yields_recommendations_before_generation_finishes(service):
+    service.ollama_session.completion = MODEL_OUTPUT
+
+    stream = service.stream_topic_recommendations('阿布扎比必去景点')
+    first = next(stream)
+    response = service.ollama_session.responses[-1]
+
+    assert first['title'] == '谢赫扎耶德{大}清真寺'
+    assert first['url'] == 'https://example.com/0'
+    assert response.consumed < len(response.lines) // 2
+
+    rest = list(stream)
+    assert [r['title'] for r in rest] == ['卢浮宫', '法拉利世界']
+
+
+def test_stream_falls_back_to_search_results(service):
+    service.ollama_session.completion = '抱歉，我无法回答。'
+
+    recommendations = list(service.stream_topic_recommendations('阿布扎比美食推荐'))
+    assert [r['url'] for r in recommendations] == [f'https://example.com/{i}' for i in range(3)]
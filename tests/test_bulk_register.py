@@ -0,0 +1,93 @@
+"""
+批量注册测试 - CSV / JSONL 导入、无效行跳过、卡号前缀关联、命令行入口
+运行: python -m pytest tests/test_bulk_register.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.bulk_register import BulkRegistrationImporter, main  # noqa: E402
+from services.card_allocator import permute_prefix  # noqa: E402
+from tests.helpers import create_registration_schema, make_applicants, write_csv  # noqa: E402
+
+
+def _query(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(sql).fetchall()
+    conn.close()
+    return rows
+
+
+def test_csv_import_across_chunks(tmp_path):
+    db_path = str(tmp_path / 'bulk.db')
+    csv_path = str(tmp_path / 'applicants.csv')
+    create_registration_schema(db_path)
+    applicants = make_applicants(25)
+    write_csv(csv_path, applicants)
+
+    result = BulkRegistrationImporter(db_path, chunk_size=10).import_file(csv_path, progress=lambda s: None)
+
+    assert result['success'] and result['imported'] == 25 and result['invalid'] == 0
+    assert result['user_ids'] == (1, 25)
+
+    users = _query(db_path, 'SELECT id, username, card_number, wecoin FROM user ORDER BY id')
+    assert [u[1] for u in users] == [a['username'] for a in applicants]
+    assert users[0][2] == f"{permute_prefix(1)[:4]} {permute_prefix(1)[4:]} " \
+                          f"{applicants[0]['card_suffix'][:4]} {applicants[0]['card_suffix'][4:]}"
+    assert _query(db_path, 'SELECT COUNT(*) FROM card_prefix WHERE user_id IS NOT NULL') == [(25,)]
+    assert _query(db_path, 'SELECT total_limit FROM credit WHERE user_id = 3') == [(applicants[2]['credit_limit'],)]
+    assert _query(db_path, 'SELECT COUNT(*) FROM income_profile') == [(25,)]
+    # 批量导入不再逐个插入汇率记录
+    assert _query(db_path, 'SELECT COUNT(*) FROM exchange_rate') == [(0,)]
+
+
+def test_jsonl_import_skips_invalid_lines(tmp_path):
+    db_path = str(tmp_path / 'bulk.db')
+    path = tmp_path / 'applicants.jsonl'
+    create_registration_schema(db_path)
+    lines = [
+        json.dumps({'card_suffix': '1234 5678', 'expected_return_day': '2026-12-31', 'username': 'Alice'}),
+        json.dumps({'card_suffix': '123', 'expected_return_day': '2026-12-31'}),
+        '{not json',
+        '',
+        json.dumps({'card_suffix': '87654321', 'expected_return_day': '20261231'}),
+        json.dumps({'card_suffix': '87654321', 'expected_return_day': '2026-01-15', 'credit_limit': 'abc'}),
+        json.dumps({'card_suffix': '11112222', 'expected_return_day': '2026-02-01', 'total_income': 50000}),
+    ]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    result = BulkRegistrationImporter(db_path).import_file(str(path), progress=lambda s: None)
+
+    assert result['success'] and result['imported'] == 2 and result['invalid'] == 4
+    assert [e['line'] for e in result['errors']] == [2, 3, 5, 6]
+    assert _query(db_path, 'SELECT username FROM user ORDER BY id') == [('Alice',), ('Yogurt',)]
+    assert _query(db_path, 'SELECT total_limit FROM credit ORDER BY user_id') == [(100000.0,), (100000.0,)]
+    # 缺少余额时不写收入画像
+    assert _query(db_path, 'SELECT COUNT(*) FROM income_profile') == [(0,)]
+
+
+def test_bulk_import_continues_after_single_registrations(tmp_path):
+    from services.register import RegistrationManager
+
+    db_path = str(tmp_path / 'bulk.db')
+    create_registration_schema(db_path)
+    assert RegistrationManager(db_path).complete_registration('12345678', '2026-12-31')['success']
+
+    result = BulkRegistrationImporter(db_path).import_records(make_applicants(3), progress=lambda s: None)
+
+    assert result['user_ids'] == (2, 4)
+    assert _query(db_path, 'SELECT seq, user_id FROM card_prefix ORDER BY seq') == [(1, 1), (2, 2), (3, 3), (4, 4)]
+
+
+def test_cli(tmp_path, capsys):
+    db_path = str(tmp_path / 'bulk.db')
+    csv_path = str(tmp_path / 'applicants.csv')
+    create_registration_schema(db_path)
+    write_csv(csv_path, make_applicants(5))
+
+    assert main([csv_path, '--db', db_path, '--chunk-size', '2']) == 0
+    assert '导入5个用户' in capsys.readouterr().out
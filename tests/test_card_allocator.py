@@ -0,0 +1,114 @@
+"""
+卡号前缀分配测试 - 置换无碰撞 / 回填旧前缀 / 并发分配 / 注册失败时回滚
+运行: python -m pytest tests/test_card_allocator.py
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.card_allocator import CardPrefixAllocator, permute_prefix  # noqa: E402
+from services.register import RegistrationManager  # noqa: E402
+
+
+def _create_schema(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript('''
+        CREATE TABLE user (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, card_number TEXT, region TEXT,
+                           location_city TEXT, avatar_initial TEXT, landmark_image TEXT, phone TEXT, email TEXT,
+                           wecoin INTEGER, redeem_today_count INTEGER, expected_return_day TEXT, created_at DATETIME);
+        CREATE TABLE credit (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, total_limit REAL,
+                             available_limit REAL, updated_at DATETIME);
+        CREATE TABLE exchange_rate (id INTEGER PRIMARY KEY AUTOINCREMENT, pair TEXT, value REAL, updated_at DATETIME);
+    ''')
+    conn.commit()
+    conn.close()
+
+
+def _prefixes(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT prefix, seq, user_id FROM card_prefix ORDER BY prefix').fetchall()
+    conn.close()
+    return rows
+
+
+def test_permutation_is_collision_free():
+    prefixes = [permute_prefix(seq) for seq in range(50000)]
+    assert len(set(prefixes)) == len(prefixes)
+    assert all(len(p) == 8 and p.isdigit() for p in prefixes)
+    assert permute_prefix(1, key=b'other') != permute_prefix(1)
+
+
+def test_allocation_skips_backfilled_legacy_prefix(tmp_path):
+    db_path = str(tmp_path / 'cards.db')
+    _create_schema(db_path)
+    legacy = permute_prefix(1)
+    conn = sqlite3.connect(db_path)
+    conn.execute('INSERT INTO user (card_number) VALUES (?)', (f'{legacy[:4]} {legacy[4:]} 1111 2222',))
+    conn.commit()
+    conn.close()
+
+    prefix = CardPrefixAllocator(db_path).allocate_one()
+
+    assert prefix == permute_prefix(2)
+    assert _prefixes(db_path) == sorted([(legacy, 1, 1), (prefix, 2, None)])
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    db_path = str(tmp_path / 'cards.db')
+    _create_schema(db_path)
+    allocator = CardPrefixAllocator(db_path)
+    results = []
+
+    def worker():
+        for _ in range(10):
+            results.append(allocator.allocate_one())
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(results)) == 40
+    assert sorted(seq for _, seq, _ in _prefixes(db_path)) == list(range(1, 41))
+
+
+def test_registration_links_prefix_and_rolls_back_on_failure(tmp_path):
+    db_path = str(tmp_path / 'cards.db')
+    _create_schema(db_path)
+    manager = RegistrationManager(db_path)
+
+    result = manager.complete_registration('1234 5678', '2026-12-31', username='Alice')
+    assert result['success']
+    user_id = result['data']['user_id']
+    assert result['data']['card_number'].replace(' ', '').startswith(permute_prefix(1))
+    assert _prefixes(db_path) == [(permute_prefix(1), 1, user_id)]
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('DROP TABLE exchange_rate')
+    conn.commit()
+    conn.close()
+
+    assert not manager.complete_registration('1234 5678', '2026-12-31')['success']
+    assert _prefixes(db_path) == [(permute_prefix(1), 1, user_id)]
+
+
+def test_allocate_many_skips_legacy_prefixes(tmp_path):
+    db_path = str(tmp_path / 'cards.db')
+    _create_schema(db_path)
+    conn = sqlite3.connect(db_path)
+    for seq in (2, 3):
+        legacy = permute_prefix(seq)
+        conn.execute('INSERT INTO user (card_number) VALUES (?)', (f'{legacy[:4]} {legacy[4:]} 0000 0000',))
+    conn.commit()
+
+    prefixes = CardPrefixAllocator(db_path).allocate_many(conn, 3)
+    conn.commit()
+    conn.close()
+
+    assert prefixes == [permute_prefix(1), permute_prefix(4), permute_prefix(5)]
+    assert sorted(seq for _, seq, _ in _prefixes(db_path)) == [1, 2, 3, 4, 5]
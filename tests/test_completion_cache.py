@@ -0,0 +1,96 @@
+"""
+Ollama 输出缓存测试 - 内容寻址键 / 内存 + 磁盘两级 / 服务集成
+运行: python -m pytest tests/test_completion_cache.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import FakeSession, make_service  # noqa: E402
+from utils.completion_cache import CompletionCache  # noqa: E402
+
+MESSAGES = [{'role': 'system', 'content': '你是阿布扎比旅游专家'}, {'role': 'user', 'content': '推荐3个景点'}]
+MODEL_OUTPUT = '[{"title": "卢浮宫", "description": "海上博物馆"}, {"title": "法拉利世界", "description": "过山车"}]'
+SEARCH_RESULTS = [{'title': f'result {i}', 'url': f'https://example.com/{i}'} for i in range(3)]
+
+
+def test_key_is_content_addressed():
+    key = CompletionCache.make_key('llama3.2:3b', MESSAGES, {'temperature': 0.7, 'num_predict': 500})
+
+    assert key == CompletionCache.make_key('llama3.2:3b', MESSAGES, {'num_predict': 500, 'temperature': 0.7})
+    assert key != CompletionCache.make_key('llama3.2:3b', MESSAGES, {'temperature': 0.2, 'num_predict': 500})
+    assert key != CompletionCache.make_key('qwen2.5:7b', MESSAGES, {'temperature': 0.7, 'num_predict': 500})
+
+
+def test_disk_tier_survives_restart_and_memory_eviction(tmp_path):
+    cache = CompletionCache(str(tmp_path), memory_size=1)
+    cache.set('a' * 64, 'first')
+    cache.set('b' * 64, 'second')  # 'a' 被挤出内存
+
+    assert cache.get('a' * 64) == 'first'
+    assert cache.stats()['disk_hits'] == 1
+
+    restarted = CompletionCache(str(tmp_path))
+    assert restarted.get('b' * 64) == 'second'
+    assert restarted.get('c' * 64) is None
+    assert restarted.stats()['misses'] == 1
+
+
+def test_identical_prompts_do_not_rerun_model(tmp_path, monkeypatch):
+    session = FakeSession(MODEL_OUTPUT, delay=0.05, token_size=5)
+    service = make_service(monkeypatch, session, search_results=SEARCH_RESULTS,
+                           completion_cache_dir=str(tmp_path / 'completions'))
+
+    first = service.generate_topic_recommendations('阿布扎比必去景点')
+    second = service.generate_topic_recommendations('阿布扎比必去景点')
+    streamed = list(service.stream_topic_recommendations('阿布扎比必去景点'))
+
+    assert session.posts == 1
+    assert first == second == streamed
+    assert [r['title'] for r in first] == ['卢浮宫', '法拉利世界']
+
+    stats = service.completion_cache.stats()
+    assert stats['memory_hits'] == 2 and stats['misses'] == 1
+    assert stats['avg_hit_ms'] < stats['avg_model_ms']
+
+
+def test_expired_entries_are_misses_in_both_tiers(tmp_path):
+    cache = CompletionCache(str(tmp_path), max_age=0.05)
+    cache.set('a' * 64, 'old')
+    assert cache.get('a' * 64) == 'old'
+
+    time.sleep(0.06)
+    assert cache.get('a' * 64) is None
+    restarted = CompletionCache(str(tmp_path), max_age=0.05)
+    cache.set('b' * 64, 'old')
+    time.sleep(0.06)
+    assert restarted.get('b' * 64) is None
+    # 过期的磁盘文件在读取时删除
+    assert not os.path.exists(os.path.join(str(tmp_path), 'bb', 'b' * 64 + '.json'))
+
+    stats = cache.stats()
+    assert stats['memory_hits'] == 1 and stats['expired'] == 1 and stats['misses'] == 1
+    assert restarted.stats()['expired'] == 1
+
+    # 重新生成后再次命中
+    cache.set('a' * 64, 'new')
+    assert cache.get('a' * 64) == 'new'
+
+
+def test_disk_tier_prunes_oldest_files(tmp_path):
+    cache = CompletionCache(str(tmp_path), max_files=10)
+    keys = [f'{i:02d}' * 32 for i in range(12)]
+    for i, key in enumerate(keys):
+        cache.set(key, f'output {i}')
+        os.utime(cache._path(key), (1000 + i, 1000 + i))
+
+    files = sorted(name for _, _, names in os.walk(str(tmp_path)) for name in names)
+    # 第 11 个文件写入后删除最旧的 2 个，剩 9 个；第 12 个写入后为 10 个
+    assert files == sorted(key + '.json' for key in keys[2:])
+    assert cache.stats()['pruned'] == 2
+
+    restarted = CompletionCache(str(tmp_path), memory_size=1, max_files=10)
+    assert restarted.get(keys[0]) is None and restarted.get(keys[-1]) == 'output 11'
@@ -0,0 +1,119 @@
+"""
+Ollama 并发控制测试 - 请求合并 / 排队超时降级 / 统计
+运行: python -m pytest tests/test_concurrency.py
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import FakeSession, make_service  # noqa: E402
+from utils.concurrency import ConcurrencyLimiter, SingleFlight  # noqa: E402
+
+
+def test_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do('key', slow), range(8)))
+
+    assert results == ['result'] * 8
+    assert len(calls) == 1
+    assert flight.stats() == {'in_flight': 0, 'executed': 1, 'coalesced': 7}
+
+
+def test_single_flight_shares_errors_and_does_not_cache_them():
+    flight = SingleFlight()
+    barrier = threading.Event()
+
+    def failing():
+        barrier.wait(1)
+        raise ValueError('boom')
+
+    errors = []
+
+    def call():
+        try:
+            flight.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    barrier.set()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 3
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_limiter_rejects_after_queue_timeout():
+    limiter = ConcurrencyLimiter(max_concurrent=1, queue_timeout=0.05)
+    assert limiter.acquire()
+    assert not limiter.acquire()
+    limiter.release()
+    assert limiter.acquire()
+    limiter.release()
+
+    stats = limiter.stats()
+    assert stats['acquired'] == 2 and stats['rejected'] == 1
+    assert stats['max_queue_depth'] == 1 and stats['active'] == 0
+    assert stats['max_wait_ms'] >= 50
+
+
+def _completion(payload):
+    # 输出随提示词变化，不同主题生成不同推荐
+    return '[{"title": "%s", "description": ""}]' % payload['messages'][1]['content'][-1]
+
+
+@pytest.fixture
+def service_factory(monkeypatch):
+    def build(delay=0.1, **kwargs):
+        session = FakeSession(_completion, delay=delay)
+        service = make_service(monkeypatch, session,
+                               search_results=lambda topic: [{'title': topic, 'url': f'https://example.com/{topic}'}],
+                               **kwargs)
+        return service, session
+
+    return build
+
+
+def test_concurrent_identical_requests_share_one_generation(service_factory):
+    service, session = service_factory()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda _: service.generate_topic_recommendations('阿布扎比美食推荐'), range(6)))
+
+    assert session.posts == 1
+    assert all(r == results[0] for r in results)
+    assert service.ollama_stats()['coalescing']['coalesced'] == 5
+
+
+def test_saturated_model_returns_default_recommendations(service_factory):
+    service, session = service_factory(delay=0.3, max_concurrent_generations=1, queue_timeout=0.05)
+    topics = service.TOPICS[:2]
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = list(pool.map(service.generate_recommendations, topics))
+
+    defaults = service._get_default_recommendations()
+    assert session.posts == 1
+    assert sorted(r == defaults for r in results) == [False, True]
+
+    stats = service.ollama_stats()['limiter']
+    assert stats['rejected'] == 1 and stats['queue_depth'] == 0
@@ -0,0 +1,143 @@
+"""
+信用额度服务测试 - 批量预测与单条预测结果一致性
+运行: python -m pytest tests/test_credit_limit_service.py
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('joblib')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.credit_limit_service import CreditLimitService  # noqa: E402
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'models', 'xgboost_simple_model.pkl')
+
+SAMPLES = [
+    (74707.66, 4204.74),
+    (1000.0, 500.0),
+    (50000.0, 0.0),
+    (120000.0, 8000.0),
+    (3000.0, 2500.0),
+]
+
+
+def _rule_service():
+    """不加载模型的服务（只走规则计算）"""
+    return CreditLimitService(model_path='models/__missing__.pkl')
+
+
+def test_rule_batch_matches_single():
+    service = _rule_service()
+    incomes, balances = zip(*SAMPLES)
+
+    batch = service.predict_many(incomes, balances)
+    assert batch['success']
+    assert batch['source'] == 'rule'
+
+    for i, (income, balance) in enumerate(SAMPLES):
+        single = service.predict_credit_limit(income, balance)
+        assert batch['credit_limit'][i] == pytest.approx(single['credit_limit'])
+        assert batch['risk_level'][i] == single['risk_level']
+
+
+def test_model_batch_matches_single():
+    pytest.importorskip('xgboost')
+    service = CreditLimitService(model_path=MODEL_PATH)
+    if service.model is None:
+        pytest.skip('模型不可用')
+
+    incomes, balances = zip(*SAMPLES)
+    batch = service.predict_many(incomes, balances)
+    assert batch['source'] == 'model'
+
+    for i, (income, balance) in enumerate(SAMPLES):
+        single = service.predict_credit_limit(income, balance)
+        assert batch['credit_limit'][i] == pytest.approx(single['credit_limit'])
+        assert batch['risk_level'][i] == single['risk_level']
+
+
+def test_predict_many_rejects_mismatched_lengths():
+    result = _rule_service().predict_many([1.0, 2.0], [1.0])
+    assert not result['success']
+
+
+def test_write_predictions_streams_csv_in_chunks():
+    service = _rule_service()
+    rows = [{'total_income': income, 'balance': balance} for income, balance in SAMPLES]
+
+    output = io.StringIO()
+    count = service.write_predictions(rows, output, fmt='csv', chunk_size=2)
+
+    lines = output.getvalue().strip().splitlines()
+    assert count == len(SAMPLES)
+    assert lines[0] == 'total_income,balance,credit_limit,risk_level'
+    assert len(lines) == len(SAMPLES) + 1
+
+
+def test_model_is_loaded_lazily():
+    service = CreditLimitService(model_path=MODEL_PATH)
+    assert not service._loaded
+
+    service.predict_many([74707.66], [4204.74])
+    assert service._loaded
+
+
+def test_native_model_matches_pickle(tmp_path):
+    pytest.importorskip('xgboost')
+    pickled = CreditLimitService(model_path=MODEL_PATH)
+    if pickled.model is None:
+        pytest.skip('模型不可用')
+
+    native_path = str(tmp_path / 'model.ubj')
+    assert pickled.export_native_model(native_path)
+    native = CreditLimitService(model_path=MODEL_PATH, native_model_path=native_path)
+
+    incomes, balances = zip(*SAMPLES)
+    expected = pickled.predict_many(incomes, balances)['credit_limit']
+    actual = native.predict_many(incomes, balances)['credit_limit']
+    np.testing.assert_allclose(actual, expected)
+
+
+def test_repeated_prediction_hits_cache():
+    service = _rule_service()
+    first = service.predict_credit_limit(74707.66, 4204.74)
+    second = service.predict_credit_limit(74707.66, 4204.74)
+
+    assert first == second
+    stats = service.cache_stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+
+
+def test_cache_is_bounded():
+    service = CreditLimitService(model_path='models/__missing__.pkl', cache_size=2)
+    for balance in (100.0, 200.0, 300.0):
+        service.predict_credit_limit(10000.0, balance)
+
+    stats = service.cache_stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+
+
+def test_cache_invalidates_when_model_file_changes(tmp_path):
+    pytest.importorskip('xgboost')
+    import shutil
+
+    model_path = tmp_path / 'model.pkl'
+    service = CreditLimitService(model_path=str(model_path))
+
+    before = service.predict_credit_limit(1000.0, 500.0)  # 模型不存在，走规则
+    assert before['credit_limit'] == pytest.approx(750.0)
+
+    shutil.copy(MODEL_PATH, model_path)
+    after = service.predict_credit_limit(1000.0, 500.0)
+
+    assert service.model is not None
+    assert after['credit_limit'] != before['credit_limit']
+    assert service.cache_stats()['hits'] == 0
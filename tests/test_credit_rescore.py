@@ -0,0 +1,102 @@
+"""
+额度重评分流水线测试 - 分块写入、中断恢复、重复执行与最新授信记录
+运行: python -m pytest tests/test_credit_rescore.py
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('joblib')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.credit_limit_service import CreditLimitService  # noqa: E402
+from services.credit_rescore import CreditRescorePipeline  # noqa: E402
+from tests.helpers import build_rescore_database  # noqa: E402
+
+
+def _pipeline(db_path, chunk_size=10):
+    # 不加载模型，走规则计算，结果确定
+    service = CreditLimitService(model_path='models/__missing__.pkl')
+    return CreditRescorePipeline(db_path=db_path, credit_service=service, chunk_size=chunk_size)
+
+
+def _credit_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute('SELECT user_id, total_limit, available_limit FROM credit ORDER BY user_id').fetchall()
+    conn.close()
+    return rows
+
+
+def test_rescore_writes_one_row_per_scorable_user(tmp_path):
+    db_path = str(tmp_path / 'rescore.db')
+    build_rescore_database(db_path, 35)
+
+    result = _pipeline(db_path).run(progress=lambda stats: None)
+
+    assert result['success']
+    assert result['processed'] + result['skipped'] == 35
+    rows = _credit_rows(db_path)
+    assert len(rows) == result['processed']
+    assert len({r[0] for r in rows}) == len(rows)
+    assert all(0 <= available <= total for _, total, available in rows)
+
+
+def test_rescore_resumes_after_interruption(tmp_path):
+    db_path = str(tmp_path / 'rescore.db')
+    build_rescore_database(db_path, 35)
+
+    def interrupt(stats):
+        if stats['done'] >= 20:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _pipeline(db_path).run(progress=interrupt)
+
+    partial = _credit_rows(db_path)
+    assert partial and max(r[0] for r in partial) <= 20
+
+    result = _pipeline(db_path).run(progress=lambda stats: None)
+    assert result['success']
+
+    rows = _credit_rows(db_path)
+    assert result['processed'] == len(rows)
+    assert len({r[0] for r in rows}) == len(rows)  # 没有重复写入
+
+
+def test_rerunning_finished_run_is_a_no_op(tmp_path):
+    db_path = str(tmp_path / 'rescore.db')
+    build_rescore_database(db_path, 15)
+
+    first = _pipeline(db_path).run(run_id='nightly', progress=lambda stats: None)
+    again = _pipeline(db_path).run(run_id='nightly', progress=lambda stats: None)
+
+    assert first['success'] and not first['already_finished']
+    assert again['success'] and again['already_finished']
+    assert '已完成' in again['message']
+    assert (again['processed'], again['skipped']) == (first['processed'], first['skipped'])
+    assert len(_credit_rows(db_path)) == first['processed']
+
+
+def test_available_limit_update_touches_only_latest_credit_row(tmp_path):
+    from utils.database import Database
+
+    db_path = str(tmp_path / 'rescore.db')
+    build_rescore_database(db_path, 3)
+    conn = sqlite3.connect(db_path)
+    # 同一时间戳的两条授信记录（如注册后立即重评分），id 大的为最新
+    conn.executemany('INSERT INTO credit (user_id, total_limit, available_limit, updated_at) VALUES (?, ?, ?, ?)',
+                     [(1, 1000.0, 1000.0, '2026-01-01 00:00:00'), (1, 2000.0, 2000.0, '2026-01-01 00:00:00')])
+    conn.commit()
+    conn.close()
+
+    db = Database(db_path)
+    assert db.get_credit_info(1) == {'total_limit': 2000.0, 'available_limit': 2000.0}
+
+    assert db.update_available_limit(1, 1500.0)
+    assert db.get_credit_info(1) == {'total_limit': 2000.0, 'available_limit': 1500.0}
+    assert [r[2] for r in _credit_rows(db_path)] == [1000.0, 1500.0]
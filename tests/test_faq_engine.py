@@ -0,0 +1,101 @@
+"""
+FAQ 匹配测试 - Aho-Corasick 自动机 / FAQ 排序 / 向量检索 / search_fintech_info 走 FAQ 文件
+运行: python -m pytest tests/test_faq_engine.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('sklearn')
+
+from services.faq_engine import FAQEngine  # noqa: E402
+from utils.keyword_matcher import KeywordAutomaton  # noqa: E402
+
+
+def test_automaton_finds_overlapping_keywords():
+    automaton = KeywordAutomaton([('he', 1), ('she', 2), ('his', 3), ('hers', 4)]).build()
+    matches = [(end, keyword) for end, keyword, _ in automaton.iter_matches('ushers')]
+    assert matches == [(4, 'she'), (4, 'he'), (6, 'hers')]
+
+
+def test_automaton_counts_repeated_and_nested_keywords():
+    automaton = KeywordAutomaton([('信用', 'credit'), ('信用额度', 'limit'), ('额度', 'limit')]).build()
+    assert automaton.count('信用额度和信用') == {'credit': 2, 'limit': 2}
+    assert automaton.count('你好') == {}
+
+
+def test_automaton_matches_naive_search():
+    keywords = ['ab', 'abc', 'bca', 'c', 'caa', 'aab']
+    text = 'aabcaabcaacab'
+    automaton = KeywordAutomaton((k, k) for k in keywords).build()
+    expected = {k: sum(text.startswith(k, i) for i in range(len(text))) for k in keywords}
+    expected = {k: n for k, n in expected.items() if n}
+    assert automaton.count(text) == expected
+
+
+ENTRIES = [
+    {'topic': '消费记录', 'answer': 'A', 'keywords': ['消费', '记录', '账单'], 'questions': ['我花了多少钱', '付款历史']},
+    {'topic': '信用额度', 'answer': 'B', 'keywords': ['额度', '信用'], 'questions': ['卡的上限是多少']},
+    {'topic': 'WECoin', 'answer': 'C', 'keywords': ['WECoin', '余额']},
+]
+
+
+def test_match_ranks_topics_by_hits():
+    engine = FAQEngine(ENTRIES)
+    matches = engine.match('我的信用额度和消费')
+    assert [(m['topic'], m['hits']) for m in matches] == [('信用额度', 2), ('消费记录', 1)]
+    assert [m['answer'] for m in engine.match('wecoin 余额', limit=1)] == ['C']
+    assert engine.match('天气') == []
+
+
+def test_ties_keep_faq_order():
+    engine = FAQEngine(ENTRIES)
+    assert [m['topic'] for m in engine.match('余额 账单')] == ['消费记录', 'WECoin']
+
+
+def test_from_file(tmp_path):
+    path = tmp_path / 'faq.json'
+    path.write_text(json.dumps({'faqs': ENTRIES}, ensure_ascii=False), encoding='utf-8')
+    assert len(FAQEngine.from_file(str(path))) == 3
+
+
+def test_search_fintech_info_uses_default_faq_file():
+    pytest.importorskip('requests')
+    from services.search_service import SearchService
+
+    result = SearchService().search_fintech_info('怎么查看我的信用额度？')
+    assert result['source'] == 'Fintech2026 FAQ'
+    assert '信用额度' in result['response']
+
+
+def test_retrieve_finds_near_miss_questions():
+    engine = FAQEngine(ENTRIES)
+    assert engine.retrieve('上个月花了多少钱')[0]['topic'] == '消费记录'
+    assert engine.retrieve('信用卡上限')[0]['topic'] == '信用额度'
+    assert engine.retrieve('今天天气怎么样', min_score=0.15) == []
+    assert engine.retrieve('') == []
+
+
+def test_confident_retrieval_skips_web_search(monkeypatch):
+    pytest.importorskip('requests')
+    from services.search_service import SearchService
+
+    service = SearchService()
+    searches = []
+    monkeypatch.setattr(service, 'search_baidu', lambda query, num_results=5: searches.append(query) or [])
+
+    result = service.search_fintech_info('我花了多少钱')
+    assert result['source'] == 'Fintech2026 FAQ' and result['score'] >= service.faq_min_score
+    assert searches == []
+
+    assert service.search_fintech_info('帮我写一首诗')['source'] == 'Web Search'
+    assert searches == ['帮我写一首诗']
+
+    stats = service.faq_stats()
+    assert stats['answers'] == {'keyword': 0, 'vector': 1, 'web': 1}
+    assert stats['fallback_rate'] == 0.5
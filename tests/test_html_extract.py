@@ -0,0 +1,79 @@
+"""
+搜索结果HTML提取测试 - 示例页面结果与旧实现一致 / 提前停止
+运行: python -m pytest tests/test_html_extract.py
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.html_extract import _first_candidate, extract_elements  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def _load(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def test_duckduckgo_matches_beautifulsoup():
+    bs4 = pytest.importorskip('bs4')
+    html = _load('duckduckgo_results.html')
+
+    soup = bs4.BeautifulSoup(html, 'html.parser')
+    expected = [(a.get_text(' ', strip=True), a['href']) for a in soup.find_all('a', class_='result__a')[:5]]
+    actual = [(link['text'], link['href']) for link in extract_elements(html, 'a', class_name='result__a', limit=5)]
+
+    assert actual == expected
+    assert actual[0][1].startswith('//duckduckgo.com/l/?uddg=')
+
+
+def test_baidu_titles_match_regex_and_include_links():
+    html = _load('baidu_results.html')
+    expected = [re.sub(r'<[^>]+>', '', t) for t in re.findall(r'<h3[^>]*>(.*?)</h3>', html)[:5]]
+
+    items = extract_elements(html, 'h3', limit=5)
+    assert [item['text'] for item in items] == expected
+    assert all(item['href'].startswith('http://www.baidu.com/link?url=') for item in items)
+
+
+def test_nested_markup_entities_and_class_tokens():
+    html = ('<div><a class="result__a-wrap" href="/x">skip</a>'
+            '<a class="big result__a" href="/1">Louvre <b>Abu&nbsp;Dhabi</b> &amp; more<br></a>'
+            '<a class="result__a" href="/2"><span><img src="i.png">Second</span></a></div>')
+
+    links = extract_elements(html, 'a', class_name='result__a')
+    assert links == [
+        {'text': 'Louvre Abu Dhabi & more', 'href': '/1'},
+        {'text': 'Second', 'href': '/2'},
+    ]
+
+
+def test_limit_stops_early_and_missing_class_returns_nothing():
+    html = '<h3>one</h3><h3>two</h3><h3>three</h3><h3 unterminated'
+    assert [item['text'] for item in extract_elements(html, 'h3', limit=2)] == ['one', 'two']
+    assert extract_elements(html, 'a', class_name='result__a') == []
+
+
+def test_markup_inside_script_and_style_is_not_a_starting_point():
+    html = ('<style>.hint:after { content: "<a href=/fake>" }</style>'
+            '<script>var tpl = \'<abbr><a class="result__a" href="/fake">Fake</a>\';</script>'
+            '<abbr title="Abu Dhabi">AD</abbr><a class="result__a" href="/1">Real</a>')
+
+    assert extract_elements(html, 'a', class_name='result__a') == [{'text': 'Real', 'href': '/1'}]
+    assert extract_elements(html, 'a') == [{'text': 'Real', 'href': '/1'}]
+    assert _first_candidate(html, 'a', class_name='result__a') == 0  # class 先出现在脚本里，之前没有真正的 <a
+    assert _first_candidate(html, 'a') == html.index('<a class="result__a" href="/1">')
+
+
+def test_first_candidate_skips_prefix_tags():
+    html = '<abbr>AD</abbr><A\nclass="result__a" href="/1">Real</A>'
+
+    assert _first_candidate(html, 'a') == html.index('<A')
+    assert _first_candidate('<abbr>result__a</abbr><a class="result__a">x</a>', 'a', class_name='result__a') == 0
+    assert _first_candidate(html, 'a', class_name='result__a') == html.index('<A')
@@ -0,0 +1,41 @@
+"""
+共享 HTTP 会话测试 - 连接池复用 / 按代理区分会话
+运行: python -m pytest tests/test_http_session.py
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('requests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http import close_sessions, get_session  # noqa: E402
+from tests.stub_servers import StubHTMLServer  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _clean_sessions():
+    yield
+    close_sessions()
+
+
+def test_sessions_are_shared_per_name_and_proxy():
+    proxy = {'http': 'http://127.0.0.1:7890', 'https': 'http://127.0.0.1:7890'}
+
+    assert get_session('search', proxies=proxy) is get_session('search', proxies=dict(proxy))
+    assert get_session('search', proxies=proxy) is not get_session('search')
+    assert get_session('search') is not get_session('ollama')
+    assert get_session('search', proxies=proxy).proxies['https'] == proxy['https']
+
+
+def test_session_reuses_keep_alive_connection():
+    with StubHTMLServer() as server:
+        session = get_session('stub')
+        for _ in range(5):
+            assert session.get(server.url, timeout=5).status_code == 200
+
+    assert server.requests == 5
+    assert server.connections == 1
@@ -0,0 +1,165 @@
+"""
+请求指标测试 - 路由延迟与状态码、每个请求的数据库语句数、外部调用计时、流式响应、/metrics 文本格式
+运行: python -m pytest tests/test_metrics.py
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+flask = pytest.importorskip('flask')
+
+from tests.helpers import FakeSession, make_service  # noqa: E402
+from utils import db_instrument, metrics  # noqa: E402
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    fresh = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, 'registry', fresh)
+    yield fresh
+    db_instrument.remove_observer(metrics._on_statement)
+    db_instrument.uninstall()
+
+
+@pytest.fixture
+def client(tmp_path, registry):
+    db_path = str(tmp_path / 'app.db')
+    conn = sqlite3.connect(db_path)
+    conn.executescript('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT);'
+                       'INSERT INTO item (name) VALUES ("a"), ("b"), ("c");')
+    conn.commit()
+    conn.close()
+
+    app = flask.Flask(__name__)
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        cursor.execute('SELECT name FROM item WHERE id = ?', (item_id,))
+        row = cursor.fetchone()
+        count = conn.execute('SELECT COUNT(*) FROM item').fetchone()[0]
+        conn.close()
+        if row is None:
+            return flask.jsonify({'success': False}), 404
+        return flask.jsonify({'success': True, 'name': row['name'], 'count': count})
+
+    @app.route('/external')
+    def external():
+        with metrics.track_external('ollama'):
+            time.sleep(0.02)
+        return 'ok'
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            yield 'a'
+            time.sleep(0.05)
+            yield 'b'
+        return flask.Response(generate())
+
+    @app.route('/boom')
+    def boom():
+        raise RuntimeError('boom')
+
+    metrics.init_app(app)
+    return app.test_client()
+
+
+def test_records_latency_status_and_db_statements(client, registry):
+    assert client.get('/items/1').get_json() == {'success': True, 'name': 'a', 'count': 3}
+    assert client.get('/items/2').status_code == 200
+    assert client.get('/items/9').status_code == 404
+
+    route = '/items/<int:item_id>'
+    assert registry.request_duration.snapshot('GET', route)['count'] == 3
+    assert registry.requests_total.value('GET', route, '200') == 2
+    assert registry.requests_total.value('GET', route, '404') == 1
+    assert registry.in_flight.value(route) == 0
+
+    # 每个请求两条语句
+    statements = registry.request_db_statements.snapshot(route)
+    assert statements['count'] == 3 and statements['sum'] == 6
+    assert registry.request_db_seconds.snapshot(route)['sum'] > 0
+    assert registry.db_statements.value('execute') >= 6
+
+
+def test_external_calls_and_streaming(client, registry):
+    assert client.get('/external').status_code == 200
+    assert registry.request_external_seconds.snapshot('/external', 'ollama')['sum'] >= 0.02
+    assert registry.external_duration.snapshot('ollama', 'ok')['count'] == 1
+
+    response = client.get('/stream')
+    assert response.get_data(as_text=True) == 'ab'
+    response.close()
+    # 流式响应的延迟包含整个输出过程
+    assert registry.request_duration.snapshot('GET', '/stream')['sum'] >= 0.05
+
+
+def test_unhandled_error_and_unmatched_route(client, registry):
+    client.application.testing = False
+    assert client.get('/boom').status_code == 500
+    response = client.get('/missing')
+    assert response.status_code == 404
+    # 错误页的响应体是 ClosingIterator，与流式响应一样在关闭时记录（WSGI 服务器总会调用 close）
+    response.close()
+
+    assert registry.requests_total.value('GET', '/boom', '500') == 1
+    assert registry.in_flight.value('/boom') == 0
+    assert registry.requests_total.value('GET', '<unmatched>', '404') == 1
+
+
+def test_metrics_endpoint_prometheus_text(client):
+    client.get('/items/1')
+    response = client.get('/metrics')
+
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert '# TYPE fintech_http_request_duration_seconds histogram' in text
+    assert 'fintech_http_request_duration_seconds_bucket{method="GET",route="/items/<int:item_id>",le="+Inf"} 1' \
+           in text
+    assert 'fintech_http_request_db_statements_sum{route="/items/<int:item_id>"} 2' in text
+    assert 'fintech_http_requests_total{method="GET",route="/items/<int:item_id>",status="200"} 1' in text
+
+
+def test_instrumentation_uninstall_restores_connect(registry):
+    events = []
+    db_instrument.install()
+    db_instrument.add_observer(events.append)
+    try:
+        conn = sqlite3.connect(':memory:')
+        assert isinstance(conn, db_instrument.InstrumentedConnection)
+        conn.execute('SELECT 1').fetchall()
+        conn.close()
+    finally:
+        db_instrument.remove_observer(events.append)
+        db_instrument.uninstall()
+
+    assert [(e['kind'], e['sql'], e['rows']) for e in events] == [('execute', 'SELECT 1', None),
+                                                                  ('fetch', 'SELECT 1', 1)]
+    assert type(sqlite3.connect(':memory:')) is sqlite3.Connection
+
+
+def test_fan_out_search_time_counts_toward_request(registry, monkeypatch):
+    service = make_service(monkeypatch, FakeSession(get_delay=0.02), fan_out=3, search_deadline=2.0)
+    app = flask.Flask(__name__)
+
+    @app.route('/recommend')
+    def recommend():
+        service._search_for_topic(service.TOPICS[0])
+        return 'ok'
+
+    metrics.init_app(app)
+    assert app.test_client().get('/recommend').status_code == 200
+
+    # 三个查询在搜索线程池中并行执行，耗时都计入该请求
+    snapshot = registry.request_external_seconds.snapshot('/recommend', 'search')
+    assert snapshot['count'] == 1 and snapshot['sum'] >= 0.06
+    assert registry.external_duration.snapshot('search', 'ok')['count'] == 3
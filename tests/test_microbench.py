@@ -0,0 +1,78 @@
+"""
+微基准工具测试 - 统计汇总、自动确定循环次数、基线对比的回归判定、结果读写
+运行: python -m pytest tests/test_microbench.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.microbench import (  # noqa: E402
+    compare, format_time, load_meta, load_results, measure, save_results, summarize
+)
+
+
+def _stats(median, spread=0.01):
+    return summarize([median * (1 - spread), median, median * (1 + spread)])
+
+
+def test_summarize():
+    stats = summarize([4.0, 1.0, 3.0, 2.0, 5.0], number=10)
+
+    assert stats['repeat'] == 5 and stats['number'] == 10
+    assert (stats['min'], stats['q1'], stats['median'], stats['q3'], stats['max']) == (1.0, 2.0, 3.0, 4.0, 5.0)
+    assert stats['mean'] == 3.0
+    assert summarize([2.0])['stdev'] == 0.0
+
+
+def test_measure_calibrates_loop_count():
+    calls = []
+    stats = measure(lambda: calls.append(1), warmup=2, repeat=3, min_time=0.01)
+
+    assert stats['repeat'] == 3
+    # 空函数一轮至少要调用很多次才能达到 min_time
+    assert stats['number'] > 100
+    assert len(calls) >= 2 + 3 * stats['number']
+    assert 0 < stats['median'] < 1e-3
+
+
+def test_measure_discards_output(capsys):
+    measure(lambda: print('noise'), warmup=1, repeat=2, number=5)
+    assert capsys.readouterr().out == ''
+
+
+def test_compare_requires_change_beyond_threshold_and_noise():
+    baseline = {'slow': _stats(1.0), 'noisy': _stats(1.0), 'fast': _stats(1.0), 'same': _stats(1.0),
+                'removed': _stats(1.0)}
+    results = {
+        'slow': _stats(1.5),
+        # 中位数变慢 30%，但分布与基线重叠，视为噪声
+        'noisy': summarize([0.7, 1.3, 1.9]),
+        'fast': _stats(0.5),
+        'same': _stats(1.05),
+        'added': _stats(1.0),
+    }
+
+    status = {row['name']: row['status'] for row in compare(results, baseline, threshold=0.1)}
+
+    assert status == {'slow': 'regressed', 'noisy': 'unchanged', 'fast': 'improved', 'same': 'unchanged',
+                      'added': 'new', 'removed': 'missing'}
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    path = str(tmp_path / 'baseline.json')
+    results = {'kernel': _stats(0.002)}
+
+    save_results(path, results, meta={'users': 10})
+
+    assert load_results(path) == results
+    assert load_meta(path) == {'users': 10}
+
+
+def test_format_time():
+    assert format_time(2.5) == '2.50 s'
+    assert format_time(0.0125) == '12.50 ms'
+    assert format_time(3.2e-6) == '3.20 µs'
+    assert format_time(-4.5e-5) == '-45.00 µs'
+    assert format_time(None) == '-'
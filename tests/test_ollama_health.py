@@ -0,0 +1,153 @@
+"""
+Ollama 健康检查测试 - 熔断器状态转换 / 后台探测不阻塞启动 / 不可用时立即降级 / 探测成功不掩盖调用失败
+运行: python -m pytest tests/test_ollama_health.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import FakeSession, make_service  # noqa: E402
+from utils.concurrency import CircuitBreaker  # noqa: E402
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.05)
+    breaker.trip()
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def _down_session(delay=0.0):
+    """/api/tags 迟迟不返回，然后连接失败；/api/chat 连接失败"""
+    return FakeSession(get_delay=delay, tags_ok=False, chat_ok=False)
+
+
+def _topic_results(topic):
+    return [{'title': topic, 'url': f'https://example.com/{topic}'}]
+
+
+def test_startup_does_not_wait_for_health_check(monkeypatch):
+    session = _down_session(delay=0.5)
+    service = make_service(monkeypatch, session)
+    # 构造时不启动探测线程，也不访问网络
+    assert service.ollama_health._thread is None and not session.probed.is_set()
+
+    start = time.perf_counter()
+    service.start_health_check()
+    try:
+        assert time.perf_counter() - start < 0.3
+
+        assert session.probed.wait(2)
+        deadline = time.time() + 2
+        while service.ollama_health.last_probe_ok is None and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        service.stop_health_check(timeout=1)
+
+    assert not service.ollama_health._thread.is_alive()
+    assert service.ollama_stats()['health']['available'] is False
+
+
+def test_unavailable_model_skips_generation(monkeypatch):
+    session = _down_session()
+    searches = []
+
+    def search(topic):
+        searches.append(topic)
+        return _topic_results(topic)
+
+    service = make_service(monkeypatch, session, search_results=search)
+    from services.abu_dhabi_service import OllamaUnavailableError
+
+    assert not service.ollama_health.check_now()
+
+    start = time.perf_counter()
+    assert service.generate_recommendations('阿布扎比美食推荐') == service._get_default_recommendations()
+    assert time.perf_counter() - start < 0.05
+    with pytest.raises(OllamaUnavailableError):
+        list(service.stream_topic_recommendations('阿布扎比美食推荐'))
+    # 搜索照常进行（用于查询输出缓存），但不调用模型
+    assert len(searches) == 2 and session.posts == 0
+
+
+def test_cached_completion_served_while_ollama_down(monkeypatch, tmp_path):
+    session = _down_session()
+    results = [{'title': 'Louvre Abu Dhabi', 'url': 'https://example.com/louvre'}]
+    service = make_service(monkeypatch, session, search_results=results,
+                           completion_cache_dir=str(tmp_path / 'completions'))
+
+    key = service._completion_key(service._build_chat_payload(results))
+    service.completion_cache.set(key, '[{"title": "卢浮宫", "description": "海上博物馆"}]', model=service.model_name)
+    assert not service.ollama_health.check_now()
+
+    assert service.generate_recommendations('阿布扎比文化体验')[0]['title'] == '卢浮宫'
+    assert [r['title'] for r in service.stream_topic_recommendations('阿布扎比文化体验')] == ['卢浮宫']
+    assert session.posts == 0
+    # 缓存命中不消耗 HALF_OPEN 试探名额，也不记录成功或失败
+    assert service.ollama_stats()['health']['breaker']['state'] == CircuitBreaker.OPEN
+
+
+def test_model_failures_trip_breaker(monkeypatch):
+    session = _down_session()
+    service = make_service(monkeypatch, session, search_results=_topic_results)
+
+    for topic in service.TOPICS:
+        service.generate_recommendations(topic)
+
+    # 默认连续失败 3 次后熔断，之后的请求不再调用模型
+    assert session.posts == service.ollama_health.breaker.failure_threshold
+    assert service.ollama_stats()['health']['breaker']['state'] == CircuitBreaker.OPEN
+
+
+def test_tags_probe_does_not_close_breaker_opened_by_chat_failures(monkeypatch):
+    session = FakeSession(chat_ok=False)
+    service = make_service(monkeypatch, session, search_results=_topic_results)
+    health = service.ollama_health
+
+    for topic in service.TOPICS[:3]:
+        service.generate_recommendations(topic)
+    assert health.breaker.state == CircuitBreaker.OPEN
+
+    # /api/tags 正常只放行一个试探请求；试探的 /api/chat 失败后重新熔断
+    for topic in service.TOPICS[3:5]:
+        assert health.check_now()
+        assert health.breaker.state == CircuitBreaker.HALF_OPEN
+        service.generate_recommendations(topic)
+        assert health.breaker.state == CircuitBreaker.OPEN
+    assert session.posts == 5
+    assert health.breaker.stats()['consecutive_failures'] == 5
+
+    # 服务一度完全不可用（探测失败熔断），探测恢复后直接恢复
+    session.tags_ok = False
+    assert not health.check_now()
+    session.tags_ok = session.chat_ok = True
+    assert health.check_now()
+    assert health.breaker.state == CircuitBreaker.CLOSED
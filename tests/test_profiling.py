@@ -0,0 +1,161 @@
+"""
+按需剖析测试 - 栈采样、请求头令牌与随机抽样、cProfile 输出、慢请求过滤、结果轮换
+运行: python -m pytest tests/test_profiling.py
+"""
+
+import os
+import pstats
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+flask = pytest.importorskip('flask')
+
+from utils.profiling import RequestProfiler, StackSampler  # noqa: E402
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += 1
+    return total
+
+
+def _client(profiler):
+    app = flask.Flask(__name__)
+
+    @app.route('/slow')
+    def slow():
+        busy_loop(0.1)
+        return 'ok'
+
+    @app.route('/fast')
+    def fast():
+        return 'ok'
+
+    profiler.init_app(app)
+    return app.test_client()
+
+
+def _files(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+
+def test_stack_sampler_sees_busy_function():
+    sampler = StackSampler(interval=0.002).start()
+    busy_loop(0.1)
+    stacks = sampler.stop()
+
+    assert sampler.samples > 10
+    busy = sum(count for stack, count in stacks.items() if stack.split(';')[-1].startswith('busy_loop'))
+    assert busy / sampler.samples > 0.8
+    # 折叠栈从外到内排列，最外层是本测试函数的调用者
+    assert any('test_stack_sampler_sees_busy_function' in stack for stack in stacks)
+
+
+def test_header_token_triggers_profile(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    client = _client(RequestProfiler(output_dir=directory, token='secret', interval=0.002))
+
+    assert 'X-Profile-File' not in client.get('/slow').headers
+    assert 'X-Profile-File' not in client.get('/slow', headers={'X-Profile': 'wrong'}).headers
+    response = client.get('/slow', headers={'X-Profile': 'secret'})
+
+    name = response.headers['X-Profile-File']
+    assert _files(directory) == [name]
+    assert '_GET_slow_' in name and name.endswith('.folded')
+    with open(os.path.join(directory, name), encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('busy_loop' in line for line in lines)
+
+
+def test_header_ignored_without_token(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    client = _client(RequestProfiler(output_dir=directory))
+
+    assert 'X-Profile-File' not in client.get('/slow', headers={'X-Profile': ''}).headers
+    assert _files(directory) == []
+
+
+def test_sampling_limited_to_routes_and_min_duration(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    profiler = RequestProfiler(output_dir=directory, sample_rate=1.0, routes=['/slow', '/fast'], min_duration=0.05)
+    client = _client(profiler)
+
+    client.get('/fast')
+    client.get('/slow')
+
+    # 两个请求都被剖析，但只保存了慢请求
+    assert profiler.stats() == {'profiled': 2, 'saved': 1, 'skipped_busy': 0}
+    assert [name for name in _files(directory) if '_GET_slow_' in name]
+
+    profiler.routes = {'/fast'}
+    client.get('/slow')
+    assert profiler.stats()['profiled'] == 2
+
+
+def test_cprofile_mode_writes_pstats(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    client = _client(RequestProfiler(output_dir=directory, token='t', mode='cprofile'))
+
+    name = client.get('/slow', headers={'X-Profile': 't'}).headers['X-Profile-File']
+
+    assert name.endswith('.prof')
+    stats = pstats.Stats(os.path.join(directory, name))
+    assert any(func[2] == 'busy_loop' for func in stats.stats)
+
+
+def test_rotation_keeps_newest_files(tmp_path):
+    directory = str(tmp_path / 'profiles')
+    profiler = RequestProfiler(output_dir=directory, token='t', max_files=3)
+    client = _client(profiler)
+
+    names = [client.get('/fast', headers={'X-Profile': 't'}).headers['X-Profile-File'] for _ in range(5)]
+
+    assert _files(directory) == sorted(names[-3:])
+
+
+def test_busy_profiler_skips_request():
+    profiler = RequestProfiler(max_concurrent=1, interval=0.002)
+    state = profiler.start()
+
+    assert profiler.start() is None
+    assert profiler.stats()['skipped_busy'] == 1
+
+    profiler.min_duration = 10
+    assert profiler.finish(state, 'GET /x') is None
+    state = profiler.start()
+    assert state is not None
+    profiler.finish(state, 'GET /x')
+
+
+def test_cprofile_mode_allows_one_profile_at_a_time():
+    profiler = RequestProfiler(mode='cprofile', max_concurrent=4, min_duration=10)
+    state = profiler.start()
+
+    assert profiler.start() is None
+    profiler.finish(state, 'GET /x')
+    assert profiler.stats() == {'profiled': 1, 'saved': 0, 'skipped_busy': 1}
+
+
+def test_cprofile_enable_failure_releases_slot(monkeypatch):
+    import utils.profiling as profiling
+
+    class ActiveElsewhere(profiling.cProfile.Profile):
+        def enable(self, *args, **kwargs):
+            raise ValueError('Another profiling tool is already active')
+
+    profiler = RequestProfiler(mode='cprofile', min_duration=10)
+    monkeypatch.setattr(profiling.cProfile, 'Profile', ActiveElsewhere)
+    assert profiler.start() is None
+    assert profiler.stats()['skipped_busy'] == 1
+
+    monkeypatch.undo()
+    state = profiler.start()
+    assert state is not None
+    profiler.finish(state, 'GET /x')
@@ -0,0 +1,127 @@
+"""
+推荐缓存测试 - 新鲜期 / 过期返回旧数据 / 后台刷新
+运行: python -m pytest tests/test_recommendation_cache.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.recommendation_cache import RecommendationCache  # noqa: E402
+
+DEFAULT = [{'title': 'default', 'description': '', 'url': '#', 'icon': ''}]
+
+
+class FakeService:
+    """替代 AbuDhabiService，记录生成次数"""
+
+    TOPICS = ['topic-a', 'topic-b']
+
+    def __init__(self, fail=False, delay=0.0):
+        self.calls = []
+        self.fail = fail
+        self.delay = delay
+        self.version = 0
+
+    def generate_topic_recommendations(self, topic):
+        self.calls.append(topic)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('ollama down')
+        self.version += 1
+        return [{'title': f'{topic}-{self.version}', 'description': '', 'url': '#', 'icon': ''}]
+
+    def _get_default_recommendations(self):
+        return DEFAULT
+
+
+def _wait_idle(cache, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while cache.stats()['refreshing'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_cold_cache_returns_default_and_refreshes_in_background():
+    service = FakeService()
+    cache = RecommendationCache(service, ttl=60)
+
+    assert cache.get('topic-a') == DEFAULT
+    _wait_idle(cache)
+    assert cache.get('topic-a')[0]['title'] == 'topic-a-1'
+    assert service.calls == ['topic-a']
+
+
+def test_stale_entry_is_served_while_revalidating():
+    service = FakeService()
+    cache = RecommendationCache(service, ttl=0.05, stale_ttl=60)
+    assert cache.refresh('topic-a')
+
+    time.sleep(0.06)
+    assert cache.get('topic-a')[0]['title'] == 'topic-a-1'  # 旧数据
+    _wait_idle(cache)
+    assert cache.get('topic-a')[0]['title'] == 'topic-a-2'
+    assert cache.stats()['stale_hits'] == 1
+
+
+def test_failed_refresh_keeps_previous_entry():
+    service = FakeService()
+    cache = RecommendationCache(service, ttl=0.01, stale_ttl=60)
+    cache.refresh('topic-a')
+
+    service.fail = True
+    time.sleep(0.02)
+    assert not cache.refresh('topic-a')
+    assert cache.get('topic-a')[0]['title'] == 'topic-a-1'
+
+
+def test_concurrent_misses_trigger_single_refresh():
+    service = FakeService(delay=0.1)
+    cache = RecommendationCache(service, ttl=60)
+
+    threads = [threading.Thread(target=cache.get, args=('topic-b',)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _wait_idle(cache)
+
+    assert service.calls == ['topic-b']
+
+
+def test_background_thread_pregenerates_all_topics():
+    service = FakeService()
+    cache = RecommendationCache(service, ttl=60, refresh_interval=0.01)
+    cache.start()
+    try:
+        deadline = time.monotonic() + 2
+        while len(cache.stats()['topics']) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        cache.stop(timeout=1)
+
+    assert set(cache.stats()['topics']) == {'topic-a', 'topic-b'}
+
+
+def test_get_cached_serves_stale_entry_and_refreshes_in_background():
+    service = FakeService()
+    cache = RecommendationCache(service, ttl=0.05, stale_ttl=60)
+
+    # 从未生成：返回 None，由调用方当场生成，不触发后台刷新
+    assert cache.get_cached('topic-a') == (None, None)
+    assert cache.stats()['refreshing'] == [] and service.calls == []
+
+    cache.refresh('topic-a')
+    assert cache.get_cached('topic-a') == ([{'title': 'topic-a-1', 'description': '', 'url': '#', 'icon': ''}],
+                                           'fresh')
+
+    time.sleep(0.06)
+    service.fail = True
+    recommendations, state = cache.get_cached('topic-a')
+    assert state == 'stale' and recommendations[0]['title'] == 'topic-a-1'
+    _wait_idle(cache)
+    # Ollama 故障时刷新失败，旧数据仍然可用
+    assert service.calls == ['topic-a', 'topic-a']
+    assert cache.get_cached('topic-a')[0][0]['title'] == 'topic-a-1'
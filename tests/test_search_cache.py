@@ -0,0 +1,77 @@
+"""
+搜索结果缓存测试 - TTL / 负缓存 / 容量上限 / 服务集成
+运行: python -m pytest tests/test_search_cache.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.helpers import make_service  # noqa: E402
+from utils.search_cache import SearchResultCache  # noqa: E402
+
+RESULTS = [{'title': 'Louvre Abu Dhabi', 'url': 'https://louvreabudhabi.ae'}]
+
+
+def test_results_persist_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SearchResultCache(path).set('Abu Dhabi  Top Attractions', RESULTS)
+
+    cache = SearchResultCache(path)
+    assert cache.get('abu dhabi top attractions') == RESULTS
+    assert cache.stats()['hits'] == 1
+
+
+def test_entries_expire(tmp_path):
+    cache = SearchResultCache(str(tmp_path / 'cache.db'), ttl=0.05, negative_ttl=0.05)
+    cache.set('q', RESULTS)
+    time.sleep(0.06)
+    assert cache.get('q') is None
+
+
+def test_negative_caching(tmp_path):
+    cache = SearchResultCache(str(tmp_path / 'cache.db'), negative_ttl=60)
+    cache.set('nothing', [])
+
+    assert cache.get('nothing') == []
+    assert cache.stats()['negative_hits'] == 1
+
+
+def test_size_cap_evicts_least_recently_accessed(tmp_path):
+    cache = SearchResultCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.set('a', RESULTS)
+    time.sleep(0.01)
+    cache.set('b', RESULTS)
+    time.sleep(0.01)
+    cache.get('a')
+    time.sleep(0.01)
+    cache.set('c', RESULTS)
+
+    assert cache.stats()['size'] == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == RESULTS
+
+
+def test_service_reuses_cached_search(tmp_path, monkeypatch):
+    service = make_service(monkeypatch, search_cache_path=str(tmp_path / 'cache.db'))
+
+    fetches = []
+
+    def fake_fetch(query, num_results, timeout, retry=True):
+        fetches.append(query)
+        if query == 'Abu Dhabi beach resorts':
+            raise ConnectionError('proxy down')
+        return RESULTS
+
+    monkeypatch.setattr(service, '_fetch_duckduckgo', fake_fetch)
+
+    assert service.search_duckduckgo('阿布扎比必去景点') == RESULTS
+    assert service.search_duckduckgo('阿布扎比必去景点') == RESULTS
+    assert fetches == ['Abu Dhabi top attractions']
+
+    # 失败的搜索被负缓存，再次搜索不请求网络
+    assert service.search_duckduckgo('阿布扎比海滩度假', fallback=False) == []
+    assert service.search_duckduckgo('阿布扎比海滩度假', fallback=False) == []
+    assert fetches.count('Abu Dhabi beach resorts') == 1
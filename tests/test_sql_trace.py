@@ -0,0 +1,154 @@
+"""
+SQL 追踪测试 - 语句规范化与参数形状、execute + fetch 合并、慢查询日志与轮换、EXPLAIN 全表扫描标记、Flask 请求结束时完成记录
+运行: python -m pytest tests/test_sql_trace.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db_instrument  # noqa: E402
+from utils.sql_trace import SQLTracer, full_scans, normalize_sql, params_shape  # noqa: E402
+
+
+@pytest.fixture
+def make_tracer():
+    tracers = []
+
+    def make(**kwargs):
+        tracer = SQLTracer(**kwargs).install()
+        tracers.append(tracer)
+        return tracer
+
+    yield make
+    for tracer in tracers:
+        tracer.uninstall()
+    db_instrument.uninstall()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'trace.db')
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE user (id INTEGER PRIMARY KEY, name TEXT);
+        CREATE TABLE transactions (id INTEGER PRIMARY KEY, user_id INTEGER, amount REAL);
+    ''')
+    conn.executemany('INSERT INTO user (name) VALUES (?)', [(f'user{i}',) for i in range(10)])
+    conn.executemany('INSERT INTO transactions (user_id, amount) VALUES (?, ?)',
+                     [(i % 10 + 1, i * 1.5) for i in range(100)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_normalize_and_params_shape():
+    assert normalize_sql("SELECT *\n  FROM user WHERE id = 42 AND name = 'it''s' ;") == \
+        'SELECT * FROM user WHERE id = ? AND name = ?'
+    assert normalize_sql('SELECT * FROM t1 WHERE id = ?') == 'SELECT * FROM t1 WHERE id = ?'
+    assert params_shape((1, 'a', None, 2.5, b'x')) == '(int, str, null, float, bytes)'
+    assert params_shape({'name': 'a', 'id': 1}) == '{id: int, name: str}'
+    assert params_shape(list(range(20))) == '(int × 20)'
+    assert params_shape(()) == '()'
+    assert params_shape(None) is None
+    assert full_scans(['SCAN transactions', 'SEARCH user USING INTEGER PRIMARY KEY (rowid=?)',
+                       'SCAN CONSTANT ROW', 'SCAN (subquery-1)', 'SCAN u USING COVERING INDEX idx_u',
+                       'SCAN TABLE message AS m']) == ['transactions', 'message']
+
+
+def test_execute_and_fetch_are_merged(make_tracer, db_path):
+    tracer = make_tracer(slow_threshold=10)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    for user_id in (1, 2, 3):
+        cursor.execute('SELECT amount FROM transactions WHERE user_id = ?', (user_id,))
+        assert len(cursor.fetchmany(4)) == 4
+        cursor.fetchall()
+    conn.execute("UPDATE user SET name = 'x' WHERE id <= 3")
+    conn.close()
+
+    report = {row['sql']: row for row in tracer.report()}
+    select = report['SELECT amount FROM transactions WHERE user_id = ?']
+    assert select['count'] == 3 and select['rows'] == 30 and select['avg_rows'] == 10
+    assert select['params'] == ['(int)']
+    assert select['full_scans'] is None
+    update = report['UPDATE user SET name = ? WHERE id <= ?']
+    assert update['rows'] == 3 and update['params'] == ['()']
+    assert tracer.stats()['pending'] == 0
+
+
+def test_slow_query_log_with_explain(make_tracer, db_path, tmp_path):
+    log_path = str(tmp_path / 'logs' / 'slow.log')
+    tracer = make_tracer(slow_threshold=0, log_path=log_path, max_log_bytes=600, explain='slow')
+    conn = sqlite3.connect(db_path)
+    for user_id in range(1, 6):
+        conn.execute('SELECT SUM(amount) FROM transactions WHERE user_id = ?', (user_id,)).fetchone()
+    conn.execute('SELECT name FROM user WHERE id = ?', (1,)).fetchone()
+    conn.close()
+    tracer.flush()
+
+    slow = tracer.slow_queries()
+    assert len(slow) == 6
+    assert slow[0]['full_scans'] == ['transactions'] and slow[0]['plan'] == ['SCAN transactions']
+    assert slow[0]['rows'] == 1 and slow[0]['params'] == '(int)'
+    assert slow[-1]['full_scans'] == []
+
+    # 文件超过 max_log_bytes 后轮换，两个文件合起来保留了最新的记录
+    assert os.path.exists(log_path + '.1')
+    with open(log_path, encoding='utf-8') as f:
+        latest = [json.loads(line) for line in f]
+    assert latest[-1]['sql'] == 'SELECT name FROM user WHERE id = ?'
+    assert 'duration_ms' in latest[-1]
+
+    # 同一种语句只执行一次 EXPLAIN
+    report = {row['sql']: row for row in tracer.report()}
+    assert report['SELECT SUM(amount) FROM transactions WHERE user_id = ?']['full_scans'] == ['transactions']
+    assert len(tracer._plans) == 2
+
+
+def test_explain_all_and_fast_queries_not_logged(make_tracer, db_path):
+    tracer = make_tracer(slow_threshold=10, explain='all')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE INDEX idx_transactions_user_id ON transactions(user_id)')
+    conn.execute('SELECT SUM(amount) FROM transactions WHERE user_id = ?', (1,)).fetchone()
+    conn.close()
+
+    assert tracer.slow_queries() == []
+    report = {row['sql']: row for row in tracer.report()}
+    assert report['SELECT SUM(amount) FROM transactions WHERE user_id = ?']['full_scans'] == []
+    # DDL 不执行 EXPLAIN
+    assert report['CREATE INDEX idx_transactions_user_id ON transactions(user_id)']['full_scans'] is None
+
+
+def test_flask_request_flush_and_endpoint(db_path):
+    flask = pytest.importorskip('flask')
+    app = flask.Flask(__name__)
+
+    @app.route('/user/<int:user_id>')
+    def user(user_id):
+        conn = sqlite3.connect(db_path)
+        # 只 fetchone、不读完结果，记录在请求结束时完成
+        row = conn.execute('SELECT name FROM transactions JOIN user ON user.id = user_id WHERE user.id = ?',
+                           (user_id,)).fetchone()
+        conn.close()
+        return flask.jsonify({'success': True, 'name': row[0]})
+
+    tracer = SQLTracer(slow_threshold=10, explain='all').init_app(app, token='secret')
+    try:
+        client = app.test_client()
+        assert client.get('/user/2').get_json()['name'] == 'user1'
+        assert tracer.stats()['pending'] == 0 and tracer.stats()['traced'] == 1
+
+        assert client.get('/debug/sql').status_code == 403
+        data = client.get('/debug/sql?limit=5', headers={'X-Debug-Token': 'secret'}).get_json()
+        assert data['success'] and data['stats']['traced'] == 1
+        assert data['statements'][0]['rows'] == 1
+        assert data['statements'][0]['full_scans'] == ['transactions']
+    finally:
+        tracer.uninstall()
+        db_instrument.uninstall()
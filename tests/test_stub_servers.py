@@ -0,0 +1,54 @@
+"""
+桩服务器端到端测试 - 推荐服务与搜索服务在本地桩服务器上完整运行
+运行: python -m pytest tests/test_stub_servers.py
+"""
+
+import os
+import sys
+
+import pytest
+
+pytest.importorskip('requests')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.stub_servers import StubOllamaServer, StubSearchServer  # noqa: E402
+from utils.http import close_sessions  # noqa: E402
+
+
+@pytest.fixture
+def stubs():
+    with StubOllamaServer(first_token_latency=0.0, tokens_per_second=2000) as ollama, \
+            StubSearchServer(latency=0.0) as search:
+        yield ollama, search
+    close_sessions()
+
+
+@pytest.fixture
+def service(stubs):
+    from services.abu_dhabi_service import AbuDhabiService
+
+    ollama, search = stubs
+    return AbuDhabiService(use_proxy=False, ollama_url=ollama.url, search_url=search.duckduckgo_url,
+                           search_cache_path=None, completion_cache_dir=None)
+
+
+def test_generate_recommendations_against_stubs(service, stubs):
+    recommendations = service.generate_topic_recommendations('阿布扎比必去景点')
+
+    assert [r['title'] for r in recommendations] == ['谢赫扎耶德大清真寺', '阿布扎比卢浮宫', '亚斯岛法拉利世界']
+    assert recommendations[0]['url'].startswith('https://www.example-travel')
+    assert stubs[0].requests == 1  # 只有 /api/chat，构造服务时不探测 /api/tags
+
+
+def test_stream_recommendations_against_stubs(service):
+    titles = [r['title'] for r in service.stream_topic_recommendations('阿布扎比美食推荐')]
+    assert titles == ['谢赫扎耶德大清真寺', '阿布扎比卢浮宫', '亚斯岛法拉利世界']
+
+
+def test_baidu_search_against_stub(stubs):
+    from services.search_service import SearchService
+
+    results = SearchService(base_url=stubs[1].url).search_baidu('阿布扎比', num_results=3)
+    assert len(results) == 3
+    assert all(r['url'].startswith('http://www.baidu.com/link?url=') for r in results)
@@ -0,0 +1,84 @@
+"""
+合成数据生成测试 - 行数与关联、同一 seed 可复现、人脸编码格式、拒绝覆盖已有数据
+运行: python -m pytest tests/test_synthetic_data.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('numpy')
+
+from services.card_allocator import permute_prefix  # noqa: E402
+from utils import synthetic_data  # noqa: E402
+from utils.synthetic_data import SyntheticDataGenerator  # noqa: E402
+
+
+def _query(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(sql).fetchall()
+    conn.close()
+    return rows
+
+
+def _dump(db_path):
+    tables = ['user', 'card_prefix', 'credit', 'income_profile', 'transactions', 'blind_box_draw', 'user_reward',
+              'message']
+    return {table: _query(db_path, f'SELECT * FROM {table} ORDER BY rowid') for table in tables}
+
+
+def test_generates_linked_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic_data, 'CHUNK_USERS', 40)
+    db_path = str(tmp_path / 'synthetic.db')
+
+    result = SyntheticDataGenerator(db_path, seed=1, face_ratio=0.5).generate(100, progress=lambda s: None)
+
+    assert result['success'], result['message']
+    assert result['rows']['user'] == 100 and result['rows']['credit'] == 100
+    assert _query(db_path, 'SELECT MIN(id), MAX(id), COUNT(DISTINCT card_number) FROM user') == [(1, 100, 100)]
+    assert _query(db_path, 'SELECT COUNT(*) FROM transactions') == [(result['rows']['transactions'],)]
+    # 所有子表都指向已存在的用户 / 奖品
+    for table in ('transactions', 'blind_box_draw', 'user_reward', 'message', 'credit', 'income_profile'):
+        assert _query(db_path, f'SELECT COUNT(*) FROM {table} WHERE user_id NOT IN (SELECT id FROM user)') == [(0,)]
+    assert _query(db_path, 'SELECT COUNT(*) FROM user_reward WHERE reward_id NOT IN (SELECT id FROM reward)') == [(0,)]
+
+    card_number, = _query(db_path, 'SELECT card_number FROM user WHERE id = 1')[0]
+    assert card_number.replace(' ', '').startswith(permute_prefix(1))
+    assert _query(db_path, 'SELECT seq, user_id FROM card_prefix WHERE seq = 1') == [(1, 1)]
+
+    encodings = [json.loads(row[0]) for row in
+                 _query(db_path, 'SELECT face_encoding FROM user WHERE face_encoding IS NOT NULL')]
+    assert 20 < len(encodings) < 80
+    assert all(len(encoding) == 128 for encoding in encodings)
+
+
+def test_same_seed_is_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setattr(synthetic_data, 'CHUNK_USERS', 30)
+    first, second, other = (str(tmp_path / name) for name in ('a.db', 'b.db', 'c.db'))
+
+    SyntheticDataGenerator(first, seed=7).generate(70, progress=lambda s: None)
+    SyntheticDataGenerator(second, seed=7).generate(70, progress=lambda s: None)
+    SyntheticDataGenerator(other, seed=8).generate(70, progress=lambda s: None)
+
+    assert _dump(first) == _dump(second)
+    assert _dump(first)['transactions'] != _dump(other)['transactions']
+
+
+def test_refuses_existing_users_unless_append(tmp_path):
+    db_path = str(tmp_path / 'synthetic.db')
+    generator = SyntheticDataGenerator(db_path, seed=3)
+    assert generator.generate(10, progress=lambda s: None)['success']
+
+    assert not generator.generate(10, progress=lambda s: None)['success']
+    result = generator.generate(5, append=True, progress=lambda s: None)
+
+    assert result['success']
+    assert _query(db_path, 'SELECT COUNT(*), MAX(id) FROM user') == [(15, 15)]
+    assert _query(db_path, 'SELECT COUNT(*), COUNT(DISTINCT prefix), MAX(seq) FROM card_prefix') == [(15, 15, 15)]
+    # 奖品只初始化一次
+    assert _query(db_path, 'SELECT COUNT(*) FROM reward') == [(len(synthetic_data.DEFAULT_REWARDS),)]
@@ -0,0 +1,96 @@
+"""
+NumPy 树模型后端与 XGBoost 的一致性测试
+运行: python -m pytest tests/test_tree_ensemble.py
+"""
+
+import os
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+xgb = pytest.importorskip('xgboost')
+joblib = pytest.importorskip('joblib')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.credit_limit_service import CreditLimitService  # noqa: E402
+from services.tree_ensemble import TreeEnsemble  # noqa: E402
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'models', 'xgboost_simple_model.pkl')
+
+
+def _random_features(n, seed=0, missing_every=0):
+    rng = np.random.default_rng(seed)
+    x = np.column_stack((rng.uniform(0, 300000, n), rng.uniform(0, 50000, n)))
+    if missing_every:
+        x[::missing_every, 0] = np.nan
+        x[1::missing_every, 1] = np.nan
+    return x
+
+
+def test_parity_with_shipped_model():
+    model = joblib.load(MODEL_PATH)
+    ensemble = TreeEnsemble.from_booster(model.get_booster())
+
+    x = _random_features(20000, missing_every=37)
+    np.testing.assert_array_equal(ensemble.predict(x), model.predict(x))
+
+
+def test_parity_with_freshly_trained_deep_model():
+    rng = np.random.default_rng(1)
+    x = _random_features(3000, seed=2, missing_every=11)
+    y = np.nan_to_num(x[:, 0]) * 0.1 + np.nan_to_num(x[:, 1]) * 2 + rng.normal(0, 100, len(x))
+
+    model = xgb.XGBRegressor(n_estimators=40, max_depth=6, learning_rate=0.3)
+    model.fit(x, y)
+    ensemble = TreeEnsemble.from_booster(model.get_booster())
+
+    test_x = _random_features(5000, seed=3, missing_every=13)
+    np.testing.assert_array_equal(ensemble.predict(test_x), model.predict(test_x))
+
+
+def test_lookup_table_parity_including_cut_points():
+    model = joblib.load(MODEL_PATH)
+    ensemble = TreeEnsemble.from_booster(model.get_booster())
+    assert ensemble.compile_lookup_table(num_features=2)
+
+    x = _random_features(20000, missing_every=37)
+    # 恰好落在切点上的样本（x == threshold 应走右子树）
+    x[:len(ensemble.cut_points[0]), 0] = ensemble.cut_points[0]
+    x[-len(ensemble.cut_points[1]):, 1] = ensemble.cut_points[1]
+    np.testing.assert_array_equal(ensemble.predict(x), model.predict(x))
+
+
+def test_lookup_table_respects_cell_limit():
+    ensemble = TreeEnsemble.from_booster(joblib.load(MODEL_PATH).get_booster())
+    assert not ensemble.compile_lookup_table(num_features=2, max_cells=10)
+    assert ensemble.lookup_table is None
+
+
+def test_save_and_load_round_trip(tmp_path):
+    ensemble = TreeEnsemble.from_booster(joblib.load(MODEL_PATH).get_booster())
+    path = str(tmp_path / 'trees.npz')
+    ensemble.save(path)
+
+    x = _random_features(1000)
+    np.testing.assert_array_equal(TreeEnsemble.load(path).predict(x), ensemble.predict(x))
+
+
+def test_rejects_non_identity_objective():
+    x = _random_features(200)
+    y = (x[:, 0] > 150000).astype(int)
+    model = xgb.XGBClassifier(n_estimators=2, max_depth=2).fit(x, y)
+
+    with pytest.raises(ValueError):
+        TreeEnsemble.from_booster(model.get_booster())
+
+
+def test_numpy_backend_matches_xgboost_backend():
+    x = _random_features(500)
+    expected = CreditLimitService(model_path=MODEL_PATH).predict_many(x[:, 0], x[:, 1])
+    actual = CreditLimitService(model_path=MODEL_PATH, backend='numpy').predict_many(x[:, 0], x[:, 1])
+
+    np.testing.assert_array_equal(actual['credit_limit'], expected['credit_limit'])
+    np.testing.assert_array_equal(actual['risk_level'], expected['risk_level'])
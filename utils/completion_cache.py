@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from utils.cache import LRUCache
+
+
+class CompletionCache:
+    """
+    大模型补全结果缓存（按内容寻址）
+
+    键为 (模型名, 消息列表, 生成参数) 的 SHA-256，相同提示词不再重复调用模型。
+    两级存储：内存 LRU 在前，磁盘文件（每个键一个 JSON 文件）在后，进程重启后仍可命中。
+    两级都在读取时检查 max_age，过期的输出视为未命中，下次生成时刷新；
+    磁盘文件数超过 max_files 时按修改时间删除最旧的文件。
+    """
+
+    def __init__(self, cache_dir='instance/completion_cache', memory_size=256, max_age=24 * 3600, max_files=2000):
+        """
+        Args:
+            cache_dir: 磁盘缓存目录（None 表示只用内存）
+            memory_size: 内存 LRU 的最大条目数
+            max_age: 输出的有效期（秒，None 表示不过期）
+            max_files: 磁盘缓存的最大文件数，超出时删除最旧的文件，直到只剩 90%
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_files = max_files
+        self.memory = LRUCache(maxsize=memory_size)
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._file_count = None  # 第一次写入时统计
+
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._memory_expired = 0
+        self.pruned = 0
+        self._hit_seconds = 0.0
+        self._model_calls = 0
+        self._model_seconds = 0.0
+
+    @staticmethod
+    def make_key(model, messages, options=None):
+        """
+        计算缓存键
+
+        Args:
+            model: 模型名称
+            messages: 对话消息列表 [{'role', 'content'}]
+            options: 生成参数（temperature、num_predict 等）
+
+        Returns:
+            str: 十六进制 SHA-256
+        """
+        content = json.dumps(
+            {'model': model, 'messages': messages, 'options': options or {}},
+            ensure_ascii=False, sort_keys=True, separators=(',', ':')
+        )
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        # 按前两位分子目录，避免单目录文件过多
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def _is_expired(self, created_at):
+        return self.max_age is not None and time.time() - created_at >= self.max_age
+
+    def get(self, key):
+        """
+        读取补全结果
+
+        Returns:
+            str | None: 命中时返回模型输出文本
+        """
+        start = time.perf_counter()
+
+        content = None
+        expired = False
+        entry = self.memory.get(key)
+        if entry is not None:
+            if self._is_expired(entry[1]):
+                self.memory.pop(key)
+                expired = True
+                with self._lock:
+                    self._memory_expired += 1
+            else:
+                content = entry[0]
+
+        if content is None and self.cache_dir:
+            path = self._path(key)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if self._is_expired(data.get('created_at', 0)):
+                    self._remove(path)
+                    expired = True
+                else:
+                    content = data['content']
+                    self.memory.set(key, (content, data.get('created_at', 0)))
+                    with self._lock:
+                        self.disk_hits += 1
+            except (OSError, ValueError, KeyError):
+                content = None
+
+        with self._lock:
+            if content is None:
+                self.misses += 1
+                self.expired += expired
+            else:
+                self._hit_seconds += time.perf_counter() - start
+        return content
+
+    def set(self, key, content, model=None):
+        """写入补全结果（内存 + 磁盘；磁盘写入失败不影响内存缓存）"""
+        created_at = time.time()
+        self.memory.set(key, (content, created_at))
+        if not self.cache_dir:
+            return
+
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            existed = os.path.exists(path)
+            # 先写临时文件再原子替换，避免并发读到半个文件
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'model': model, 'content': content, 'created_at': created_at}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ 补全缓存写入磁盘失败: {e}")
+            return
+
+        if not existed:
+            with self._disk_lock:
+                if self._file_count is None:
+                    self._file_count = len(self._list_files())
+                else:
+                    self._file_count += 1
+                if self.max_files is not None and self._file_count > self.max_files:
+                    self._prune()
+
+    def _list_files(self):
+        """磁盘缓存中的所有文件 [(修改时间, 路径)]"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except OSError:
+                        pass
+        return files
+
+    def _prune(self):
+        """删除最旧的文件，直到只剩 max_files 的 90%（调用方需持有 self._disk_lock）"""
+        files = sorted(self._list_files())
+        keep = int(self.max_files * 0.9)
+        removed = 0
+        for _, path in files[:max(len(files) - keep, 0)]:
+            if self._remove(path):
+                removed += 1
+        self._file_count = len(files) - removed
+        with self._lock:
+            self.pruned += removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def record_model_latency(self, seconds):
+        """记录一次实际调用模型的耗时（用于与命中耗时对比）"""
+        with self._lock:
+            self._model_calls += 1
+            self._model_seconds += seconds
+
+    def stats(self):
+        """
+        缓存统计
+
+        Returns:
+            dict: {
+                'memory_hits', 'disk_hits', 'misses', 'hit_rate',
+                'expired',       # 因过期而未命中的次数（已计入 misses）
+                'pruned',        # 因超出 max_files 删除的磁盘文件数
+                'avg_hit_ms',    # 命中时读取缓存的平均耗时
+                'avg_model_ms'   # 未命中时调用模型的平均耗时
+            }
+        """
+        lru_hits = self.memory.stats()['hits']
+        with self._lock:
+            memory_hits = lru_hits - self._memory_expired
+            hits = memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'memory_hits': memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'expired': self.expired,
+                'pruned': self.pruned,
+                'avg_hit_ms': self._hit_seconds / hits * 1000 if hits else 0.0,
+                'avg_model_ms': self._model_seconds / self._model_calls * 1000 if self._model_calls else 0.0
+            }
@@ -0,0 +1,250 @@
+import threading
+import time
+
+
+class SingleFlight:
+    """
+    请求合并（single-flight）
+
+    同一个键同时只执行一次：第一个调用者执行函数，其余并发调用者等待并共享同一个结果（或同一个异常）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        """
+        执行 fn()，同键的并发调用共享结果
+
+        Args:
+            key: 合并键
+            fn: 无参函数
+
+        Returns:
+            fn() 的返回值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'coalesced': self.coalesced
+            }
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ConcurrencyLimiter:
+    """
+    有界并发限制器
+
+    最多 max_concurrent 个任务同时执行，其余排队等待；等待超过 queue_timeout 秒则放弃，
+    由调用方降级处理。记录排队深度和等待时间。
+    """
+
+    def __init__(self, max_concurrent=2, queue_timeout=5.0):
+        """
+        Args:
+            max_concurrent: 最大并发数
+            queue_timeout: 排队等待的最长时间（秒）
+        """
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self, timeout=None):
+        """
+        申请执行名额
+
+        Args:
+            timeout: 最长等待时间（默认 queue_timeout）
+
+        Returns:
+            bool: 是否获得名额（False 表示排队超时）
+        """
+        timeout = self.queue_timeout if timeout is None else timeout
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+        start = time.perf_counter()
+        ok = self._semaphore.acquire(timeout=timeout)
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self.waiting -= 1
+            self._wait_seconds += waited
+            self._max_wait = max(self._max_wait, waited)
+            if ok:
+                self.active += 1
+                self.acquired += 1
+            else:
+                self.rejected += 1
+        return ok
+
+    def release(self):
+        """释放执行名额"""
+        with self._lock:
+            self.active -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        """
+        限流统计
+
+        Returns:
+            dict: {
+                'max_concurrent', 'active',
+                'queue_depth',        # 当前排队数
+                'max_queue_depth',    # 历史最大排队数
+                'acquired', 'rejected',
+                'avg_wait_ms', 'max_wait_ms'
+            }
+        """
+        with self._lock:
+            attempts = self.acquired + self.rejected
+            return {
+                'max_concurrent': self.max_concurrent,
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'max_queue_depth': self.max_waiting,
+                'acquired': self.acquired,
+                'rejected': self.rejected,
+                'avg_wait_ms': self._wait_seconds / attempts * 1000 if attempts else 0.0,
+                'max_wait_ms': self._max_wait * 1000
+            }
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    - closed: 正常放行；连续失败 failure_threshold 次后进入 open
+    - open: 直接拒绝；recovery_timeout 秒后进入 half_open
+    - half_open: 放行一个试探请求，成功则 closed，失败则重新 open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, recovery_timeout=30.0):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后熔断
+            recovery_timeout: 熔断后多久允许试探（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow_request(self):
+        """是否放行本次请求（open 状态下立即返回 False）"""
+        now = time.monotonic()
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_started = now
+                return True
+            if self._state == self.HALF_OPEN and now - self._trial_started >= self.recovery_timeout:
+                # 上一个试探请求没有回报结果，再放行一个
+                self._trial_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def trip(self):
+        """立即熔断（如健康检查确认服务不可用）"""
+        with self._lock:
+            self._open()
+
+    def half_open(self):
+        """open 状态下不再等待 recovery_timeout，立即放行一个试探请求（试探结果决定是否恢复）"""
+        with self._lock:
+            if self._state == self.OPEN:
+                self._state = self.HALF_OPEN
+                self._trial_started = time.monotonic() - self.recovery_timeout
+
+    def _open(self):
+        if self._state != self.OPEN:
+            self.trips += 1
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
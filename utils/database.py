@@ -3,6 +3,28 @@ from datetime import datetime
 import os
 import json
 
+# 用户收入/余额画像表（注册时写入，供额度重评分使用）
+INCOME_PROFILE_DDL = '''
+CREATE TABLE IF NOT EXISTS income_profile (
+    user_id INTEGER PRIMARY KEY,
+    total_income REAL,
+    balance REAL,
+    updated_at DATETIME,
+    FOREIGN KEY(user_id) REFERENCES user(id)
+)
+'''
+
+# 卡号前缀分配表：prefix 为主键（唯一），seq 为分配序号（唯一，旧数据回填时为 NULL）
+CARD_PREFIX_DDL = '''
+CREATE TABLE IF NOT EXISTS card_prefix (
+    prefix TEXT PRIMARY KEY,
+    seq INTEGER UNIQUE,
+    user_id INTEGER,
+    allocated_at DATETIME,
+    FOREIGN KEY(user_id) REFERENCES user(id)
+)
+'''
+
 class Database:
     """数据库操作类，管理所有数据库相关的增删改查操作"""
 
@@ -290,7 +312,7 @@ class Database:
     
     def update_available_limit(self, user_id, new_limit):
         """
-        更新用户可用额度
+        更新用户可用额度（只更新最新的一条授信记录，重评分会为同一用户追加新记录）
         
         Args:
             user_id: 用户ID
@@ -305,7 +327,12 @@ class Database:
         cursor.execute('''
             UPDATE credit
             SET available_limit = ?, updated_at = ?
-            WHERE user_id = ?
+            WHERE id = (
+                SELECT id FROM credit
+                WHERE user_id = ?
+                ORDER BY updated_at DESC, id DESC
+                LIMIT 1
+            )
         ''', (new_limit, datetime.now(), user_id))
         
         conn.commit()
@@ -393,7 +420,7 @@ class Database:
             SELECT total_limit, available_limit
             FROM credit
             WHERE user_id = ?
-            ORDER BY updated_at DESC
+            ORDER BY updated_at DESC, id DESC
             LIMIT 1
         ''', (user_id,))
         row = cursor.fetchone()
@@ -0,0 +1,140 @@
+"""
+SQLite 语句计时 - 把每次 execute / fetch 的耗时通知给观察者（请求指标、SQL 追踪等）
+
+安装后 sqlite3.connect 默认返回 InstrumentedConnection，Database.get_connection、LotteryMachine、
+RegistrationManager 以及 app.py 中直接调用 sqlite3.connect 的地方都会被计时，无需逐个修改调用点:
+
+    from utils import db_instrument
+    db_instrument.install()
+    db_instrument.add_observer(lambda event: print(event['sql'], event['elapsed']))
+
+观察者收到的事件:
+    {'kind': 'execute' / 'executemany' / 'executescript' / 'fetch', 'sql': str, 'params': 参数或 None,
+     'elapsed': 秒, 'rows': fetch 返回的行数（execute 时为 None）, 'cursor': 产生事件的游标}
+"""
+
+import sqlite3
+import threading
+import time
+
+_observers = []
+_install_lock = threading.Lock()
+_original_connect = None
+
+
+def add_observer(observer):
+    """注册观察者 observer(event)"""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def remove_observer(observer):
+    """移除观察者"""
+    if observer in _observers:
+        _observers.remove(observer)
+
+
+def _notify(kind, sql, params, elapsed, rows=None, cursor=None):
+    if not _observers:
+        return
+    event = {'kind': kind, 'sql': sql, 'params': params, 'elapsed': elapsed, 'rows': rows, 'cursor': cursor}
+    for observer in list(_observers):
+        try:
+            observer(event)
+        except Exception as e:
+            # 观察者出错不影响查询本身
+            print(f"⚠️ SQL观察者出错: {str(e)}")
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """对 execute / fetch 计时的游标"""
+
+    _last_sql = None
+    _last_params = None
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._last_sql, self._last_params = sql, parameters
+            _notify('execute', sql, parameters, time.perf_counter() - start, cursor=self)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._last_sql, self._last_params = sql, None
+            _notify('executemany', sql, None, time.perf_counter() - start, cursor=self)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            self._last_sql, self._last_params = sql_script, None
+            _notify('executescript', sql_script, None, time.perf_counter() - start, cursor=self)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        _notify('fetch', self._last_sql, self._last_params, time.perf_counter() - start,
+                0 if row is None else 1, self)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        _notify('fetch', self._last_sql, self._last_params, time.perf_counter() - start, len(rows), self)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        _notify('fetch', self._last_sql, self._last_params, time.perf_counter() - start, len(rows), self)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """默认创建 InstrumentedCursor 的连接（conn.execute 等快捷方法也经过计时游标）"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def connect(database, **kwargs):
+    """与 sqlite3.connect 相同，默认使用 InstrumentedConnection"""
+    kwargs.setdefault('factory', InstrumentedConnection)
+    return (_original_connect or sqlite3.connect)(database, **kwargs)
+
+
+def install():
+    """替换 sqlite3.connect（重复调用无副作用）"""
+    global _original_connect
+    with _install_lock:
+        if _original_connect is None:
+            _original_connect = sqlite3.connect
+            sqlite3.connect = connect
+
+
+def uninstall():
+    """恢复原来的 sqlite3.connect"""
+    global _original_connect
+    with _install_lock:
+        if _original_connect is not None:
+            sqlite3.connect = _original_connect
+            _original_connect = None
+
+
+def is_installed():
+    return _original_connect is not None
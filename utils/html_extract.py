@@ -0,0 +1,133 @@
+import re
+from html.parser import HTMLParser
+
+
+class _StopParsing(Exception):
+    """已收集到足够结果，提前结束解析"""
+
+
+class ElementExtractor(HTMLParser):
+    """
+    基于 HTMLParser 事件的轻量结果提取器
+
+    只跟踪目标标签（可按 class 过滤），收集其文本和链接，收集到 limit 个后立即停止，
+    不构建 DOM 树，也不会解析页面剩余部分。
+    """
+
+    # 不含结束标签的空元素，不计入嵌套深度
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+    def __init__(self, tag, class_name=None, limit=None):
+        """
+        Args:
+            tag: 目标标签名，如 'a' / 'h3'
+            class_name: 目标 class（元素的 class 属性中包含即可），None 表示不过滤
+            limit: 最多收集的元素数，None 表示不限
+        """
+        super().__init__(convert_charrefs=True)
+        self.tag = tag
+        self.class_name = class_name
+        self.limit = limit
+        self.results = []
+        self._depth = 0        # 当前处于目标元素内部时的嵌套深度
+        self._text = []
+        self._href = None
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth:
+            if tag not in self.VOID_TAGS:
+                self._depth += 1
+            # 目标元素本身没有链接时，使用其内部第一个链接（如 <h3><a href=...></a></h3>）
+            if tag == 'a' and self._href is None:
+                self._href = dict(attrs).get('href')
+            return
+
+        if tag != self.tag:
+            return
+        attrs = dict(attrs)
+        if self.class_name and self.class_name not in (attrs.get('class') or '').split():
+            return
+
+        self._depth = 1
+        self._text = []
+        self._href = attrs.get('href')
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            self.results.append({
+                'text': ' '.join(''.join(self._text).split()),
+                'href': self._href or ''
+            })
+            if self.limit is not None and len(self.results) >= self.limit:
+                raise _StopParsing()
+
+    def handle_data(self, data):
+        if self._depth:
+            self._text.append(data)
+
+
+def extract_elements(html, tag, class_name=None, limit=None):
+    """
+    从HTML中提取目标元素的文本和链接
+
+    Args:
+        html: HTML文本
+        tag: 目标标签名
+        class_name: 目标 class，None 表示不过滤
+        limit: 最多提取的元素数
+
+    Returns:
+        list[dict]: [{'text': 元素文本（空白已合并）, 'href': 链接}]
+    """
+    start = _first_candidate(html, tag, class_name)
+    if start < 0:
+        return []
+
+    extractor = ElementExtractor(tag, class_name=class_name, limit=limit)
+    try:
+        extractor.feed(html[start:] if start else html)
+        extractor.close()
+    except _StopParsing:
+        pass
+    return extractor.results
+
+
+def _first_candidate(html, tag, class_name=None):
+    """
+    定位第一个可能匹配的开始标签，跳过之前的页头、样式和脚本（逐个标签解析的开销远大于字符串查找）
+
+    只会停在脚本、样式内容之外真正的标签边界上（'<' + tag 后跟空白、'/' 或 '>'，不会把 <abbr 当成 <a）
+
+    Returns:
+        int: 开始解析的位置，-1 表示页面中不可能有匹配
+    """
+    if class_name:
+        end = html.find(class_name)
+        if end < 0:
+            return -1
+    else:
+        end = len(html)
+
+    pattern = re.compile(r'<(/?)(script|style|%s)[\s/>]' % re.escape(tag), re.IGNORECASE)
+    raw_text = None  # 当前所在的 script / style 元素
+    start = None
+    for match in pattern.finditer(html, 0, end):
+        closing, name = match.group(1), match.group(2).lower()
+        if raw_text:
+            if closing and name == raw_text:
+                raw_text = None
+        elif name in ElementExtractor.CDATA_CONTENT_ELEMENTS:
+            if not closing:
+                raw_text = name
+        elif not closing:
+            start = match.start()
+            if not class_name:
+                break
+
+    if start is None:
+        # 有 class 匹配但之前找不到可靠的标签边界时从头解析
+        return 0 if class_name else -1
+    return start
@@ -0,0 +1,77 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# 共享会话：按 (名称, 代理) 区分连接池，走代理的搜索流量与本地 Ollama 流量互不占用连接
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def create_session(pool_connections=4, pool_maxsize=16, retries=2, backoff_factor=0.3,
+                   status_forcelist=(429, 500, 502, 503, 504), proxies=None, headers=None):
+    """
+    创建带连接池与重试的 requests.Session
+
+    Args:
+        pool_connections: 缓存连接池的主机数
+        pool_maxsize: 每个主机保持的最大空闲连接数（应不小于并发线程数）
+        retries: 连接失败 / 可重试状态码的最大重试次数
+        backoff_factor: 重试退避系数（第 n 次重试前等待 backoff_factor * 2^(n-1) 秒）
+        status_forcelist: 需要重试的状态码（只对 GET 等幂等请求生效）
+        proxies: 代理配置，如 {'http': url, 'https': url}
+        headers: 默认请求头
+
+    Returns:
+        requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=status_forcelist,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if proxies:
+        session.proxies.update(proxies)
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session(name, proxies=None, **kwargs):
+    """
+    获取进程内共享的会话（同名同代理只创建一次）
+
+    Args:
+        name: 连接池名称，如 'search' / 'ollama'
+        proxies: 代理配置（不同代理使用不同连接池）
+        **kwargs: 首次创建时传给 create_session 的参数
+
+    Returns:
+        requests.Session
+    """
+    key = (name, tuple(sorted((proxies or {}).items())))
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = create_session(proxies=proxies, **kwargs)
+            _sessions[key] = session
+        return session
+
+
+def close_sessions():
+    """关闭所有共享会话（测试或进程退出时使用）"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
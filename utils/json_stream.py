@@ -0,0 +1,65 @@
+import json
+
+
+class JSONObjectStreamParser:
+    """
+    增量解析流式文本中的 JSON 对象
+
+    模型按 token 输出形如 [{"title": ...}, {"title": ...}] 的文本，
+    每喂入一段文本，返回其中新完成的最外层对象（不需要等待整个数组结束）。
+    数组前后的说明文字、代码块标记会被忽略。
+    """
+
+    def __init__(self):
+        self._buffer = []       # 当前对象已读取的字符
+        self._depth = 0         # 对象 / 数组嵌套深度（仅在对象内部计数）
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        """
+        喂入一段文本
+
+        Args:
+            text: 新增的文本片段
+
+        Returns:
+            list[dict]: 本次新完成的对象（解析失败的对象会被跳过）
+        """
+        completed = []
+
+        for char in text:
+            if self._depth == 0:
+                # 对象外：只等待下一个 '{'
+                if char == '{':
+                    self._buffer = [char]
+                    self._depth = 1
+                continue
+
+            self._buffer.append(char)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        obj = json.loads(''.join(self._buffer))
+                        if isinstance(obj, dict):
+                            completed.append(obj)
+                    except ValueError:
+                        pass
+                    self._buffer = []
+
+        return completed
@@ -0,0 +1,88 @@
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    多关键词匹配自动机（Aho-Corasick）
+
+    构建一次后，对文本只扫描一遍即可找出所有关键词的全部出现位置（包括相互重叠、互为子串的关键词），
+    耗时与文本长度成正比，与关键词数量无关。
+    """
+
+    def __init__(self, keywords=None):
+        """
+        Args:
+            keywords: 可迭代的 (关键词, 值) 对；同一关键词可对应多个值
+        """
+        self._goto = [{}]      # 状态 -> {字符: 下一状态}
+        self._fail = [0]       # 状态 -> 失配后跳转的状态
+        self._output = [[]]    # 状态 -> 在此结束的 [(关键词, 值)]
+        self._built = False
+        self.size = 0
+        for keyword, value in keywords or ():
+            self.add(keyword, value)
+
+    def add(self, keyword, value=None):
+        """添加关键词（需在 build 之前调用）"""
+        if not keyword:
+            return
+        if self._built:
+            raise RuntimeError('自动机已构建，不能再添加关键词')
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append((keyword, value))
+        self.size += 1
+
+    def build(self):
+        """按广度优先计算失配指针，并把后缀状态的输出合并进来"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """
+        扫描文本
+
+        产出:
+            tuple: (结束位置, 关键词, 值)，结束位置为关键词最后一个字符之后的下标
+        """
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword, value in output[state]:
+                yield index + 1, keyword, value
+
+    def count(self, text):
+        """
+        统计每个值的命中次数
+
+        Returns:
+            dict: {值: 命中次数}
+        """
+        counts = {}
+        for _, _, value in self.iter_matches(text):
+            counts[value] = counts.get(value, 0) + 1
+        return counts
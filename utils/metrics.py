@@ -0,0 +1,330 @@
+"""
+请求指标 - 按路由统计延迟分布、进行中请求数、每个请求的数据库耗时与语句数、外部调用耗时，
+并以 Prometheus 文本格式在 /metrics 暴露
+
+用法（app.py）:
+    from utils import metrics
+    metrics.init_app(app)
+
+外部调用计时:
+    with metrics.track_external('ollama'):
+        response = session.post(...)
+
+每个请求的数据库 / 外部调用耗时按线程归属：只统计处理该请求的线程内发生的调用。
+提交到线程池的任务用 bind_request_stats 包装后（如并行搜索），其中的调用也计入提交它的请求；
+其余后台线程（推荐缓存刷新）的调用只计入全局指标。
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from utils import db_instrument
+
+# 延迟直方图的桶边界（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 每个请求的语句数直方图的桶边界
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    type_name = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+
+class Counter(_Metric):
+    """只增计数器"""
+
+    type_name = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def _render_items(self, items):
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}'
+                for labels, value in items]
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    type_name = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def _render_items(self, items):
+        return [f'{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}'
+                for labels, value in items]
+
+
+class Histogram(_Metric):
+    """固定桶边界的直方图（输出累计桶计数、总和与次数）"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # [各桶计数..., +Inf 桶计数, 总和]
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def snapshot(self, *labels):
+        """返回 {'count', 'sum', 'buckets': [(上界, 累计计数)]}"""
+        with self._lock:
+            state = list(self._values.get(labels) or [0] * (len(self.buckets) + 1) + [0.0])
+        cumulative, total = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+            total += count
+            cumulative.append((bound, total))
+        return {'count': total, 'sum': state[-1], 'buckets': cumulative}
+
+    def _render_items(self, items):
+        lines = []
+        for labels, state in items:
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                total += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {total}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {total}')
+        return lines
+
+
+class MetricsRegistry:
+    """应用用到的全部指标"""
+
+    def __init__(self, namespace='fintech'):
+        def name(suffix):
+            return f'{namespace}_{suffix}'
+
+        self.request_duration = Histogram(name('http_request_duration_seconds'), '请求处理耗时（含流式响应的输出）',
+                                          ['method', 'route'])
+        self.requests_total = Counter(name('http_requests_total'), '请求数', ['method', 'route', 'status'])
+        self.in_flight = Gauge(name('http_requests_in_flight'), '进行中的请求数', ['route'])
+        self.request_db_seconds = Histogram(name('http_request_db_seconds'), '每个请求中数据库语句的总耗时',
+                                            ['route'])
+        self.request_db_statements = Histogram(name('http_request_db_statements'), '每个请求执行的数据库语句数',
+                                               ['route'], buckets=COUNT_BUCKETS)
+        self.request_external_seconds = Histogram(name('http_request_external_seconds'),
+                                                  '每个请求中外部调用的总耗时', ['route', 'service'])
+        self.db_statements = Counter(name('db_statements_total'), '数据库语句数（含后台线程）', ['kind'])
+        self.db_seconds = Counter(name('db_seconds_total'), '数据库语句总耗时（含后台线程）', ['kind'])
+        self.external_duration = Histogram(name('external_call_duration_seconds'), '外部调用耗时（含后台线程）',
+                                           ['service', 'outcome'])
+        self.metrics = [
+            self.request_duration, self.requests_total, self.in_flight, self.request_db_seconds,
+            self.request_db_statements, self.request_external_seconds, self.db_statements, self.db_seconds,
+            self.external_duration
+        ]
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# 进程内默认注册表
+registry = MetricsRegistry()
+
+# 当前线程正在处理的请求的统计
+_local = threading.local()
+# 同一请求的统计可能被多个线程（bind_request_stats 包装的任务）同时累加
+_stats_lock = threading.Lock()
+
+
+class RequestStats:
+    """一个请求内累计的数据库与外部调用耗时"""
+
+    __slots__ = ('db_seconds', 'db_statements', 'external')
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_statements = 0
+        self.external = {}
+
+
+def current_request_stats():
+    """当前线程正在处理的请求的统计（不在请求中时为 None）"""
+    return getattr(_local, 'stats', None)
+
+
+def bind_request_stats(func):
+    """
+    包装要提交到线程池的函数，使其中的数据库 / 外部调用计入当前请求
+
+    在请求线程中调用（不在请求中时原样返回 func）:
+        executor.submit(metrics.bind_request_stats(search), query)
+    """
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        return func
+
+    def run(*args, **kwargs):
+        previous = getattr(_local, 'stats', None)
+        _local.stats = stats
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.stats = previous
+
+    return run
+
+
+def _on_statement(event):
+    kind = event['kind']
+    elapsed = event['elapsed']
+    registry.db_seconds.inc(kind, amount=elapsed)
+    stats = getattr(_local, 'stats', None)
+    if kind != 'fetch':
+        registry.db_statements.inc(kind)
+    if stats is not None:
+        with _stats_lock:
+            if kind != 'fetch':
+                stats.db_statements += 1
+            stats.db_seconds += elapsed
+
+
+def record_external(service, elapsed, ok=True):
+    """记录一次外部调用（Ollama、搜索等）的耗时"""
+    registry.external_duration.observe(elapsed, service, 'ok' if ok else 'error')
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        with _stats_lock:
+            stats.external[service] = stats.external.get(service, 0.0) + elapsed
+
+
+@contextmanager
+def track_external(service):
+    """对 with 块内的外部调用计时"""
+    start = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record_external(service, time.perf_counter() - start, ok)
+
+
+def init_app(app, endpoint='/metrics', instrument_db=True):
+    """
+    为 Flask 应用注册计时钩子与 /metrics 接口
+
+    Args:
+        app: Flask 应用
+        endpoint: 指标接口路径
+        instrument_db: 是否替换 sqlite3.connect 以统计数据库语句（见 utils/db_instrument.py）
+    """
+    from flask import Response, g, request
+
+    if instrument_db:
+        db_instrument.install()
+        db_instrument.add_observer(_on_statement)
+
+    def finish(state, status):
+        if state.get('done'):
+            return
+        state['done'] = True
+        elapsed = time.perf_counter() - state['start']
+        route, stats = state['route'], state['stats']
+        registry.request_duration.observe(elapsed, state['method'], route)
+        registry.requests_total.inc(state['method'], route, str(status))
+        registry.in_flight.dec(route)
+        registry.request_db_seconds.observe(stats.db_seconds, route)
+        registry.request_db_statements.observe(stats.db_statements, route)
+        for service, seconds in stats.external.items():
+            registry.request_external_seconds.observe(seconds, route, service)
+        if getattr(_local, 'stats', None) is stats:
+            _local.stats = None
+
+    @app.before_request
+    def _metrics_start():
+        # 只用路由模板作为标签（/api/get_user_rewards/<int:user_id>），未匹配的路径统一归为一类
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        stats = _local.stats = RequestStats()
+        g._metrics = {'start': time.perf_counter(), 'method': request.method, 'route': route, 'stats': stats}
+        registry.in_flight.inc(route)
+
+    @app.after_request
+    def _metrics_response(response):
+        state = g.get('_metrics')
+        if state is not None:
+            status = response.status_code
+            if response.is_streamed:
+                # 流式响应在输出完毕、关闭时才记录，延迟包含整个输出过程
+                response.call_on_close(lambda: finish(state, status))
+            else:
+                finish(state, status)
+        return response
+
+    @app.teardown_request
+    def _metrics_teardown(exc):
+        # 未处理的异常不会经过 after_request
+        state = g.get('_metrics')
+        if state is not None and exc is not None:
+            finish(state, 500)
+
+    def metrics_endpoint():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    app.add_url_rule(endpoint, 'metrics', metrics_endpoint)
+    return registry
@@ -0,0 +1,277 @@
+"""
+按需请求剖析 - 对选中的请求采样调用栈（或用 cProfile），结果写入 instance/profiles 并自动轮换
+
+两种方式:
+- sample（默认）: 后台线程每隔 interval 秒读取处理请求的线程的调用栈，输出折叠栈（.folded），
+  可直接交给 flamegraph.pl / speedscope / inferno 生成火焰图；开销与请求本身的函数调用次数无关
+- cprofile: 在处理请求的线程启用 cProfile，输出 .prof（pstats 格式，可用 snakeviz / flameprof 查看），
+  记录每个函数的调用次数，但会让 Python 代码明显变慢
+
+触发条件（满足其一）:
+- 请求头 X-Profile 等于配置的令牌（未配置令牌时忽略请求头，避免任何人都能打开剖析）
+- 按 sample_rate 随机抽样（可用 routes 限定路由模板，如 ['/api/login_with_face']）
+
+用法（app.py）:
+    from utils.profiling import RequestProfiler
+    RequestProfiler(sample_rate=0.01, routes=['/api/login_with_face'], token='secret').init_app(app)
+
+    curl -H 'X-Profile: secret' -X POST http://127.0.0.1:5000/api/upload_bank_statement ...
+    flamegraph.pl instance/profiles/<文件>.folded > flame.svg
+"""
+
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+
+class StackSampler:
+    """周期性采样某个线程的调用栈，累计为折叠栈计数"""
+
+    def __init__(self, thread_id=None, interval=0.005):
+        """
+        Args:
+            thread_id: 被采样线程的 ident（默认为调用 start 的线程）
+            interval: 采样间隔（秒）
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止采样，返回 {折叠栈: 次数}"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.stacks
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f'{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})'
+        return label
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[';'.join(stack)] += 1
+            self.samples += 1
+
+
+def _short_path(path):
+    """项目内文件用相对路径，第三方库保留 site-packages 之后的部分"""
+    marker = 'site-packages' + os.sep
+    if marker in path:
+        return path.split(marker, 1)[1]
+    try:
+        relative = os.path.relpath(path)
+    except ValueError:
+        return path
+    return path if relative.startswith('..') else relative
+
+
+def write_folded(stacks, path):
+    """写入折叠栈文件（每行: 栈帧1;栈帧2;... 次数）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+
+
+class RequestProfiler:
+    """Flask 请求剖析器"""
+
+    def __init__(self, output_dir='instance/profiles', sample_rate=0.0, routes=None, token=None,
+                 header='X-Profile', mode='sample', interval=0.005, min_duration=0.0, max_files=50,
+                 max_concurrent=2):
+        """
+        Args:
+            output_dir: 结果目录
+            sample_rate: 随机抽样比例（0~1，0 表示只靠请求头触发）
+            routes: 随机抽样只针对这些路由模板（默认全部路由；请求头触发不受限制）
+            token: 请求头需要携带的令牌（None 时忽略请求头）
+            header: 触发剖析的请求头名
+            mode: 'sample'（栈采样）或 'cprofile'
+            interval: 栈采样间隔（秒）
+            min_duration: 耗时低于此值（秒）的请求不保存结果（只关心慢请求时使用）
+            max_files: 目录中最多保留的结果文件数，超出时删除最旧的
+            max_concurrent: 同时剖析的请求数上限，超出时跳过（cprofile 模式固定为 1：
+                Python 3.12+ 同一时刻只允许一个 cProfile 启用）
+        """
+        if mode not in ('sample', 'cprofile'):
+            raise ValueError(f'不支持的剖析方式: {mode}')
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.routes = set(routes) if routes else None
+        self.token = token
+        self.header = header
+        self.mode = mode
+        self.interval = interval
+        self.min_duration = min_duration
+        self.max_files = max_files
+        if mode == 'cprofile':
+            max_concurrent = 1
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._stats = {'profiled': 0, 'saved': 0, 'skipped_busy': 0}
+
+    # ==================== 选择与执行 ====================
+
+    def should_profile(self, route, header_value=None):
+        """判断请求是否需要剖析"""
+        if self.token and header_value == self.token:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        if self.routes is not None and route not in self.routes:
+            return False
+        return random.random() < self.sample_rate
+
+    def start(self):
+        """
+        开始剖析当前线程
+
+        Returns:
+            dict 或 None: 剖析状态（名额已满或已有其他剖析器在运行时为 None）
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['skipped_busy'] += 1
+            return None
+        if self.mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # 其他 cProfile（如 python -m cProfile 启动的进程）已在运行
+                self._slots.release()
+                with self._lock:
+                    self._stats['skipped_busy'] += 1
+                return None
+        else:
+            profiler = StackSampler(interval=self.interval).start()
+        return {'profiler': profiler, 'start': time.perf_counter()}
+
+    def finish(self, state, label):
+        """
+        结束剖析并保存结果
+
+        Args:
+            state: start 的返回值
+            label: 写入文件名的描述（如 'POST /api/login_with_face'）
+
+        Returns:
+            str 或 None: 结果文件路径（耗时低于 min_duration 时不保存）
+        """
+        try:
+            profiler = state['profiler']
+            if self.mode == 'cprofile':
+                profiler.disable()
+            else:
+                profiler.stop()
+            elapsed = time.perf_counter() - state['start']
+            with self._lock:
+                self._stats['profiled'] += 1
+            if elapsed < self.min_duration:
+                return None
+
+            os.makedirs(self.output_dir, exist_ok=True)
+            slug = re.sub(r'[^A-Za-z0-9]+', '_', label).strip('_') or 'request'
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            extension = 'prof' if self.mode == 'cprofile' else 'folded'
+            path = os.path.join(self.output_dir, f'{stamp}_{slug}_{elapsed * 1000:.0f}ms.{extension}')
+            if self.mode == 'cprofile':
+                profiler.dump_stats(path)
+            else:
+                write_folded(profiler.stacks, path)
+            with self._lock:
+                self._stats['saved'] += 1
+            self._rotate()
+            return path
+        finally:
+            self._slots.release()
+
+    def _rotate(self):
+        """只保留最新的 max_files 个结果文件"""
+        try:
+            entries = [os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir)
+                       if name.endswith(('.folded', '.prof'))]
+            if len(entries) <= self.max_files:
+                return
+            entries.sort(key=lambda p: (os.path.getmtime(p), p))
+            for path in entries[:len(entries) - self.max_files]:
+                os.remove(path)
+        except OSError as e:
+            print(f"⚠️ 剖析结果轮换失败: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    # ==================== Flask 集成 ====================
+
+    def init_app(self, app):
+        """注册请求钩子：选中的请求在响应头 X-Profile-File 中返回结果文件名"""
+        from flask import g, request
+
+        def done(state, label):
+            if state.get('done'):
+                return None
+            state['done'] = True
+            path = self.finish(state['profile'], label)
+            if path:
+                print(f"📊 已保存剖析结果: {path}")
+            return path
+
+        @app.before_request
+        def _profile_start():
+            route = request.url_rule.rule if request.url_rule else None
+            if route is None or not self.should_profile(route, request.headers.get(self.header)):
+                return
+            profile = self.start()
+            if profile is not None:
+                g._profile = {'profile': profile, 'label': f'{request.method} {route}'}
+
+        @app.after_request
+        def _profile_response(response):
+            state = g.get('_profile')
+            if state is None:
+                return response
+            if response.is_streamed:
+                # 流式响应在输出完毕后才结束剖析，文件名无法再放进响应头
+                response.call_on_close(lambda: done(state, state['label']))
+            else:
+                path = done(state, state['label'])
+                if path:
+                    response.headers['X-Profile-File'] = os.path.basename(path)
+            return response
+
+        @app.teardown_request
+        def _profile_teardown(exc):
+            state = g.get('_profile')
+            if state is not None and exc is not None:
+                done(state, state['label'])
+
+        return self
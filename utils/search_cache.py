@@ -0,0 +1,160 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# 搜索结果缓存表：query 为规范化后的查询键
+SEARCH_CACHE_DDL = '''
+CREATE TABLE IF NOT EXISTS search_cache (
+    query TEXT PRIMARY KEY,
+    results TEXT,
+    success INTEGER,
+    expires_at REAL,
+    accessed_at REAL
+)
+'''
+
+
+class SearchResultCache:
+    """
+    持久化的搜索结果缓存（SQLite）
+
+    - 成功的搜索结果缓存 ttl 秒
+    - 失败或无结果的搜索做负缓存，negative_ttl 秒内不再请求
+    - 条目数超过 max_entries 时淘汰最久未访问的条目
+    """
+
+    def __init__(self, db_path='instance/search_cache.db', ttl=24 * 3600, negative_ttl=300, max_entries=1000):
+        """
+        Args:
+            db_path: 缓存数据库路径（首次使用时创建）
+            ttl: 成功结果的有效期（秒）
+            negative_ttl: 失败 / 空结果的有效期（秒）
+            max_entries: 最大条目数
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query):
+        """规范化查询键：小写、合并空白"""
+        return ' '.join(query.lower().split())
+
+    def get_connection(self):
+        """获取数据库连接（进程内复用同一个连接，首次调用时建表；调用方需持有 self._lock）"""
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            # WAL + NORMAL：读不阻塞写，提交时不必每次 fsync
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(SEARCH_CACHE_DDL)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_accessed ON search_cache(accessed_at)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, query):
+        """
+        读取缓存
+
+        Args:
+            query: 查询键（会被规范化）
+
+        Returns:
+            list | None: 命中时返回结果列表（负缓存命中返回空列表），未命中或已过期返回 None
+        """
+        key = self.normalize(query)
+        now = time.time()
+
+        with self._lock:
+            conn = self.get_connection()
+            row = conn.execute(
+                'SELECT results, success FROM search_cache WHERE query = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            conn.execute('UPDATE search_cache SET accessed_at = ? WHERE query = ?', (now, key))
+            conn.commit()
+
+            if row[1]:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            return json.loads(row[0])
+
+    def set(self, query, results):
+        """
+        写入缓存（results 为空时按负缓存处理）
+
+        Args:
+            query: 查询键（会被规范化）
+            results: 搜索结果列表
+        """
+        key = self.normalize(query)
+        now = time.time()
+        success = bool(results)
+        expires_at = now + (self.ttl if success else self.negative_ttl)
+
+        with self._lock:
+            conn = self.get_connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO search_cache (query, results, success, expires_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(results or [], ensure_ascii=False), int(success), expires_at, now)
+            )
+            # 超出容量：先删过期条目，再按最近访问时间淘汰
+            count = conn.execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+            if count > self.max_entries:
+                conn.execute('DELETE FROM search_cache WHERE expires_at <= ?', (now,))
+                conn.execute('''
+                    DELETE FROM search_cache WHERE query IN (
+                        SELECT query FROM search_cache ORDER BY accessed_at ASC
+                        LIMIT max((SELECT COUNT(*) FROM search_cache) - ?, 0)
+                    )
+                ''', (self.max_entries,))
+            conn.commit()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            conn = self.get_connection()
+            conn.execute('DELETE FROM search_cache')
+            conn.commit()
+
+    def stats(self):
+        """
+        缓存统计
+
+        Returns:
+            dict: {'size', 'max_entries', 'hits', 'negative_hits', 'misses'}
+        """
+        with self._lock:
+            size = self.get_connection().execute('SELECT COUNT(*) FROM search_cache').fetchone()[0]
+            return {
+                'size': size,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'negative_hits': self.negative_hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,401 @@
+"""
+SQL 追踪与慢查询日志 - 基于 utils/db_instrument.py 的观察者，记录每条语句的文本、参数形状、耗时和返回行数
+
+- 每次 execute 与其后同一游标上的 fetch 合并为一条记录：耗时 = execute + fetch，行数 = fetch 到的行数
+  （INSERT / UPDATE / DELETE 取受影响的行数）。游标再次 execute、请求结束或调用 report 时记录完成
+- 按规范化的语句（字符串与数字字面量替换为 ?、合并空白）汇总次数、总耗时、最大耗时、行数和参数形状
+- 耗时超过 slow_threshold 的语句进入慢查询日志（内存中保留最近 max_slow 条，可同时追加写入 JSONL 文件，
+  文件超过 max_log_bytes 时轮换为 .1）
+- explain='slow' / 'all' 时对慢语句 / 所有语句执行 EXPLAIN QUERY PLAN（每种语句只执行一次），
+  标出没有用上索引的全表扫描
+
+参数只记录形状（如 (int, str)），不记录值，日志里不会出现姓名、银行流水等内容。
+
+用法（app.py）:
+    from utils.sql_trace import SQLTracer
+    SQLTracer(slow_threshold=0.1, log_path='instance/slow_queries.log', explain='slow').init_app(app)
+
+    # 脚本中
+    tracer = SQLTracer(explain='all').install()
+    ...
+    tracer.print_report()
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from utils import db_instrument
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+# EXPLAIN QUERY PLAN 中没有用索引的表扫描，如 "SCAN transactions"（旧版本为 "SCAN TABLE transactions AS t"）
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+_EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+_NORMALIZE_CACHE_SIZE = 4096
+
+_normalize_cache = {}
+
+
+def normalize_sql(sql):
+    """规范化语句：字面量替换为 ?，合并空白（结果用作汇总的键）"""
+    normalized = _normalize_cache.get(sql)
+    if normalized is None:
+        normalized = _STRING_LITERAL.sub('?', sql)
+        normalized = _NUMBER_LITERAL.sub('?', normalized)
+        normalized = _WHITESPACE.sub(' ', normalized).strip().rstrip(';').rstrip()
+        if len(_normalize_cache) >= _NORMALIZE_CACHE_SIZE:
+            _normalize_cache.clear()
+        _normalize_cache[sql] = normalized
+    return normalized
+
+
+def _type_name(value):
+    return 'null' if value is None else type(value).__name__
+
+
+def params_shape(params):
+    """
+    参数形状（只有类型，没有值）
+
+    Returns:
+        str 或 None: 如 '(int, str)'、'{name: str}'、'(int × 20)'；executemany / executescript 为 None
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {_type_name(value)}' for key, value in sorted(params.items())) + '}'
+    names = [_type_name(value) for value in params]
+    if len(names) > 6 and len(set(names)) == 1:
+        return f'({names[0]} × {len(names)})'
+    return '(' + ', '.join(names) + ')'
+
+
+def explain_query_plan(conn, sql, params=()):
+    """
+    执行 EXPLAIN QUERY PLAN
+
+    Returns:
+        list[str]: 每个计划步骤的描述（如 'SEARCH user USING INTEGER PRIMARY KEY (rowid=?)'）
+    """
+    # 用未计时的游标，避免 EXPLAIN 本身再被追踪
+    cursor = conn.cursor(sqlite3.Cursor)
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params or ())
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def full_scans(plan):
+    """从查询计划中找出全表扫描的表（或别名）"""
+    tables = []
+    for detail in plan:
+        match = _FULL_SCAN.match(detail)
+        if match and match.group(1) not in tables:
+            tables.append(match.group(1))
+    return tables
+
+
+class SQLTracer:
+    """SQL 追踪器"""
+
+    def __init__(self, slow_threshold=0.1, max_slow=200, log_path=None, max_log_bytes=5 * 1024 * 1024,
+                 explain=None, max_statements=1000, max_pending=256):
+        """
+        Args:
+            slow_threshold: 慢查询阈值（秒，execute + fetch 的总耗时）
+            max_slow: 内存中保留的慢查询条数
+            log_path: 慢查询 JSONL 文件（None 时只保留在内存中）
+            max_log_bytes: 慢查询文件超过此大小时轮换为 .1
+            explain: None（不执行）、'slow'（只对慢语句）或 'all'（所有语句）执行 EXPLAIN QUERY PLAN
+            max_statements: 最多汇总的语句种类，超出时丢弃最久未出现的
+            max_pending: 最多同时等待 fetch 完成的游标数，超出时提前完成最旧的记录
+        """
+        if explain not in (None, 'slow', 'all'):
+            raise ValueError(f'不支持的 explain 方式: {explain}')
+        self.slow_threshold = slow_threshold
+        self.log_path = log_path
+        self.max_log_bytes = max_log_bytes
+        self.explain = explain
+        self.max_statements = max_statements
+        self.max_pending = max_pending
+        self._statements = OrderedDict()
+        self._pending = OrderedDict()
+        self._plans = {}
+        self._slow = deque(maxlen=max_slow)
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self._traced = 0
+        self._slow_total = 0
+
+    # ==================== 安装 ====================
+
+    def install(self):
+        """开始追踪（替换 sqlite3.connect，见 utils/db_instrument.py）"""
+        db_instrument.install()
+        db_instrument.add_observer(self.on_event)
+        return self
+
+    def uninstall(self):
+        """停止追踪（不恢复 sqlite3.connect，请求指标可能仍在使用）"""
+        db_instrument.remove_observer(self.on_event)
+        self.flush(current_thread_only=False)
+
+    # ==================== 事件处理 ====================
+
+    def on_event(self, event):
+        """db_instrument 观察者"""
+        cursor = event.get('cursor')
+        key = id(cursor)
+
+        if event['kind'] == 'fetch':
+            with self._lock:
+                entry = self._pending.get(key)
+                if entry is None:
+                    return
+                entry['fetch'] += event['elapsed']
+                entry['rows'] += event['rows']
+            if self.explain:
+                self._maybe_explain(entry, cursor, event['params'])
+            return
+
+        entry = {
+            'kind': event['kind'],
+            'sql': event['sql'],
+            'params': params_shape(event['params']),
+            'execute': event['elapsed'],
+            'fetch': 0.0,
+            'rows': 0,
+            'thread': threading.get_ident(),
+            'time': time.time(),
+            'plan': None,
+            'explained': False
+        }
+        if self.explain:
+            self._maybe_explain(entry, cursor, event['params'])
+
+        finished = []
+        returns_rows = cursor is not None and event['kind'] == 'execute' and cursor.description is not None
+        if not returns_rows:
+            rowcount = cursor.rowcount if cursor is not None else -1
+            entry['rows'] = rowcount if rowcount >= 0 else None
+        with self._lock:
+            previous = self._pending.pop(key, None)
+            if previous is not None:
+                finished.append(previous)
+            if returns_rows:
+                # 查询语句等 fetch 完成后再记录
+                self._pending[key] = entry
+                while len(self._pending) > self.max_pending:
+                    finished.append(self._pending.popitem(last=False)[1])
+            else:
+                finished.append(entry)
+        for item in finished:
+            self._record(item)
+
+    def _maybe_explain(self, entry, cursor, params):
+        """语句变慢（或 explain='all'）时，趁连接还可用执行 EXPLAIN QUERY PLAN"""
+        if entry['explained'] or entry['kind'] != 'execute' or cursor is None:
+            return
+        if self.explain == 'slow' and entry['execute'] + entry['fetch'] < self.slow_threshold:
+            return
+        entry['explained'] = True
+        sql = entry['sql']
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return
+        fingerprint = normalize_sql(sql)
+        plan = self._plans.get(fingerprint)
+        if plan is None:
+            try:
+                details = explain_query_plan(cursor.connection, sql, params)
+            except sqlite3.Error as e:
+                print(f"⚠️ EXPLAIN QUERY PLAN 失败: {str(e)}")
+                return
+            plan = {'plan': details, 'full_scans': full_scans(details)}
+            with self._lock:
+                if len(self._plans) >= self.max_statements:
+                    self._plans.clear()
+                self._plans[fingerprint] = plan
+            if plan['full_scans']:
+                print(f"⚠️ 全表扫描 {', '.join(plan['full_scans'])}: {fingerprint[:200]}")
+        entry['plan'] = plan
+
+    def _record(self, entry):
+        """一条语句完成：更新汇总，慢语句写入慢查询日志"""
+        fingerprint = normalize_sql(entry['sql'])
+        elapsed = entry['execute'] + entry['fetch']
+        slow = elapsed >= self.slow_threshold
+        plan = entry['plan']
+        record = None
+
+        with self._lock:
+            self._traced += 1
+            stat = self._statements.get(fingerprint)
+            if stat is None:
+                stat = self._statements[fingerprint] = {
+                    'sql': fingerprint, 'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0, 'slow': 0,
+                    'params': set(), 'full_scans': None
+                }
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+            else:
+                self._statements.move_to_end(fingerprint)
+            stat['count'] += 1
+            stat['total'] += elapsed
+            stat['max'] = max(stat['max'], elapsed)
+            stat['rows'] += entry['rows'] or 0
+            if entry['params'] is not None:
+                stat['params'].add(entry['params'])
+            if plan is not None:
+                stat['full_scans'] = plan['full_scans']
+            if slow:
+                stat['slow'] += 1
+                self._slow_total += 1
+                record = {
+                    'time': datetime.fromtimestamp(entry['time']).isoformat(timespec='milliseconds'),
+                    'sql': fingerprint,
+                    'kind': entry['kind'],
+                    'params': entry['params'],
+                    'duration_ms': round(elapsed * 1000, 3),
+                    'execute_ms': round(entry['execute'] * 1000, 3),
+                    'fetch_ms': round(entry['fetch'] * 1000, 3),
+                    'rows': entry['rows']
+                }
+                if plan is not None:
+                    record['plan'] = plan['plan']
+                    record['full_scans'] = plan['full_scans']
+                self._slow.append(record)
+
+        if record is not None:
+            print(f"⚠️ 慢查询 {record['duration_ms']:.1f} ms（{record['rows']} 行）: {fingerprint[:200]}")
+            if self.log_path:
+                self._write_log(record)
+
+    def _write_log(self, record):
+        """追加写入慢查询文件，超过 max_log_bytes 时轮换"""
+        try:
+            with self._log_lock:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.max_log_bytes:
+                    os.replace(self.log_path, self.log_path + '.1')
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️ 慢查询日志写入失败: {str(e)}")
+
+    def flush(self, current_thread_only=True):
+        """完成等待中的记录（默认只处理当前线程的，请求结束时调用）"""
+        thread = threading.get_ident()
+        with self._lock:
+            keys = [key for key, entry in self._pending.items()
+                    if not current_thread_only or entry['thread'] == thread]
+            finished = [self._pending.pop(key) for key in keys]
+        for entry in finished:
+            self._record(entry)
+
+    # ==================== 结果 ====================
+
+    def report(self, limit=20, order='total'):
+        """
+        按语句汇总（会先完成所有等待中的记录）
+
+        Args:
+            limit: 返回条数（None 为全部）
+            order: 排序字段 'total' / 'count' / 'max' / 'rows'
+
+        Returns:
+            list[dict]: [{'sql', 'count', 'total_ms', 'avg_ms', 'max_ms', 'rows', 'avg_rows', 'slow', 'params',
+                'full_scans'}]，full_scans 为 None 表示没有执行过 EXPLAIN
+        """
+        self.flush(current_thread_only=False)
+        with self._lock:
+            stats = [dict(stat, params=sorted(stat['params'])) for stat in self._statements.values()]
+        stats.sort(key=lambda stat: stat[order], reverse=True)
+        return [{
+            'sql': stat['sql'],
+            'count': stat['count'],
+            'total_ms': round(stat['total'] * 1000, 3),
+            'avg_ms': round(stat['total'] / stat['count'] * 1000, 3),
+            'max_ms': round(stat['max'] * 1000, 3),
+            'rows': stat['rows'],
+            'avg_rows': round(stat['rows'] / stat['count'], 1),
+            'slow': stat['slow'],
+            'params': stat['params'],
+            'full_scans': stat['full_scans']
+        } for stat in stats[:limit]]
+
+    def slow_queries(self):
+        """内存中的慢查询记录（从旧到新）"""
+        with self._lock:
+            return list(self._slow)
+
+    def stats(self):
+        with self._lock:
+            return {'traced': self._traced, 'statements': len(self._statements), 'slow': self._slow_total,
+                    'pending': len(self._pending)}
+
+    def reset(self):
+        """清空汇总与内存中的慢查询（不删除慢查询文件）"""
+        with self._lock:
+            self._statements.clear()
+            self._pending.clear()
+            self._plans.clear()
+            self._slow.clear()
+            self._traced = 0
+            self._slow_total = 0
+
+    def print_report(self, limit=20, order='total'):
+        """打印汇总表"""
+        rows = self.report(limit, order)
+        print(f"\n📊 SQL 汇总（按 {order} 排序，前 {len(rows)} 种语句）")
+        print(f"  {'次数':>8}{'总耗时ms':>12}{'平均ms':>10}{'最大ms':>10}{'平均行数':>10}  语句")
+        for row in rows:
+            flag = f"  ⚠️ 全表扫描 {', '.join(row['full_scans'])}" if row['full_scans'] else ''
+            print(f"  {row['count']:>8}{row['total_ms']:>12.1f}{row['avg_ms']:>10.3f}{row['max_ms']:>10.3f}"
+                  f"{row['avg_rows']:>10}  {row['sql'][:100]}{flag}")
+
+    # ==================== Flask 集成 ====================
+
+    def init_app(self, app, endpoint='/debug/sql', token=None, header='X-Debug-Token'):
+        """
+        开始追踪，并在每个请求结束时完成该请求的记录
+
+        Args:
+            app: Flask 应用
+            endpoint: 汇总接口路径（只有配置了 token 才注册）
+            token: 访问汇总接口时请求头需要携带的令牌
+            header: 令牌请求头名
+        """
+        from flask import jsonify, request
+
+        self.install()
+
+        @app.teardown_request
+        def _sql_trace_teardown(exc):
+            self.flush()
+
+        if token:
+            def sql_trace_endpoint():
+                if request.headers.get(header) != token:
+                    return jsonify({'success': False, 'message': '无权访问'}), 403
+                order = request.args.get('order', 'total')
+                if order not in ('total', 'count', 'max', 'rows'):
+                    return jsonify({'success': False, 'message': f'不支持的排序字段: {order}'}), 400
+                return jsonify({
+                    'success': True,
+                    'stats': self.stats(),
+                    'statements': self.report(request.args.get('limit', 20, type=int), order),
+                    'slow_queries': self.slow_queries()
+                })
+
+            app.add_url_rule(endpoint, 'sql_trace', sql_trace_endpoint)
+        return self
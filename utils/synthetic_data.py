@@ -0,0 +1,311 @@
+"""
+合成数据生成器 - 生成生产规模的 fintech.db，用于基准测试和迁移演练
+
+按用户分块生成（每块固定 CHUNK_USERS 个用户，各块使用由 (seed, 块号) 派生的随机数发生器），
+相同的 seed 和用户数总是生成完全相同的数据。每块一个事务，全部用 executemany 写入。
+
+生成内容:
+    user（含卡号、部分用户带 128 维人脸编码）、card_prefix、credit、income_profile、
+    transactions（每人笔数为重尾分布，金额为对数正态分布）、blind_box_draw、user_reward、message
+
+用法:
+    python -m utils.synthetic_data --db instance/fintech_synthetic.db --users 100000 --seed 42
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from services.card_allocator import permute_prefix
+from utils.init_db import DEFAULT_REWARDS, create_tables
+
+# 每块用户数（固定，保证同一 seed 的输出与运行方式无关）
+CHUNK_USERS = 10000
+
+# 生成数据的时间基准（固定，保证可复现）
+DEFAULT_BASE_TIME = datetime(2026, 1, 1)
+
+CURRENCIES = [('UAE', 1.97), ('HKD', 1.0), ('USD', 7.8), ('CNY', 1.08)]
+MESSAGE_TEMPLATES = [
+    ('您的账单已生成，请及时查看。', 'bill'),
+    ('新汇率提醒: UAE/HKD 1.96', 'rate'),
+    ('迪拜 Atalas Shopping Mall多家品牌联合折扣，最高可享30% discount', 'recommend'),
+    ('恭喜获得盲盒奖励，请在奖品包中查看。', 'info'),
+]
+BLIND_BOX_ITEMS = [reward[1] for reward in DEFAULT_REWARDS] + ['谢谢参与']
+
+
+class SyntheticDataGenerator:
+    """合成数据生成器"""
+
+    def __init__(self, db_path='instance/fintech_synthetic.db', seed=42, tx_mean=12.0, tx_skew=1.6,
+                 draws_mean=3.0, messages_mean=2.0, face_ratio=0.2, days=180, base_time=DEFAULT_BASE_TIME):
+        """
+        Args:
+            db_path: 数据库路径
+            seed: 随机种子
+            tx_mean: 每个用户的平均消费笔数
+            tx_skew: 消费笔数的帕累托形状参数（越小越偏，少数用户贡献大部分交易）
+            draws_mean: 每个用户的平均抽奖次数（泊松分布）
+            messages_mean: 每个用户的平均消息数（泊松分布）
+            face_ratio: 录入了 Face ID 的用户比例
+            days: 交易等时间戳分布在 base_time 之前的天数
+            base_time: 时间基准
+        """
+        self.db_path = db_path
+        self.seed = seed
+        self.tx_mean = tx_mean
+        self.tx_skew = tx_skew
+        self.draws_mean = draws_mean
+        self.messages_mean = messages_mean
+        self.face_ratio = face_ratio
+        self.days = days
+        self.base_time = np.datetime64(base_time, 'us')
+
+    def get_connection(self):
+        """获取数据库连接（生成期间关闭同步写盘，加快写入）"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('PRAGMA journal_mode = MEMORY')
+        return conn
+
+    # ==================== 主流程 ====================
+
+    def generate(self, num_users, append=False, progress=None):
+        """
+        生成数据
+
+        Args:
+            num_users: 用户数
+            append: 数据库已有用户时是否继续追加（默认拒绝，避免污染真实数据）
+            progress: 进度回调 progress(stats: dict)，默认打印到控制台
+
+        Returns:
+            dict: {'success', 'users', 'rows': {表名: 行数}, 'elapsed', 'rows_per_second', 'message'}
+        """
+        progress = progress or self._print_progress
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self.get_connection()
+        rows = {}
+        start = time.perf_counter()
+        try:
+            cursor = conn.cursor()
+            create_tables(cursor)
+            cursor.execute('SELECT COUNT(*) FROM reward')
+            if not cursor.fetchone()[0]:
+                cursor.executemany('''
+                    INSERT INTO reward (type, title, details, base_prob, new_user_only, code, extra_info)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', DEFAULT_REWARDS)
+            conn.commit()
+
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM user')
+            first_id = cursor.fetchone()[0] + 1
+            if first_id > 1 and not append:
+                return {
+                    'success': False,
+                    'users': 0,
+                    'rows': rows,
+                    'message': f'数据库已有用户（最大ID {first_id - 1}），如需追加请使用 append=True / --append'
+                }
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM card_prefix')
+            first_seq = cursor.fetchone()[0] + 1
+            cursor.execute('SELECT id FROM reward ORDER BY id')
+            reward_ids = np.array([row[0] for row in cursor.fetchall()])
+
+            for chunk_index, chunk_start in enumerate(range(0, num_users, CHUNK_USERS)):
+                count = min(CHUNK_USERS, num_users - chunk_start)
+                rng = np.random.default_rng([self.seed, chunk_index])
+                user_ids = np.arange(first_id + chunk_start, first_id + chunk_start + count)
+
+                cursor.execute('BEGIN')
+                for table, table_rows in self._chunk_rows(rng, user_ids, first_seq + chunk_start, reward_ids):
+                    rows[table] = rows.get(table, 0) + self._insert(cursor, table, table_rows)
+                conn.commit()
+
+                progress({'users': chunk_start + count, 'total': num_users, 'rows': sum(rows.values()),
+                          'elapsed': time.perf_counter() - start})
+
+            elapsed = time.perf_counter() - start
+            total_rows = sum(rows.values())
+            rate = total_rows / elapsed if elapsed > 0 else 0.0
+            return {
+                'success': True,
+                'users': num_users,
+                'rows': rows,
+                'elapsed': elapsed,
+                'rows_per_second': rate,
+                'message': f'生成完成 - {num_users}个用户，共{total_rows}行，{rate:,.0f} 行/秒'
+            }
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ 生成合成数据失败: {str(e)}")
+            return {'success': False, 'users': 0, 'rows': rows, 'message': f'生成合成数据失败: {str(e)}'}
+        finally:
+            conn.close()
+
+    # ==================== 分块生成 ====================
+
+    INSERT_SQL = {
+        'user': '''INSERT INTO user (id, username, card_number, region, location_city, avatar_initial, landmark_image,
+                                     phone, email, wecoin, redeem_today_count, expected_return_day, created_at,
+                                     face_encoding, face_image_path, face_registered_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        'card_prefix': 'INSERT INTO card_prefix (prefix, seq, user_id, allocated_at) VALUES (?, ?, ?, ?)',
+        'credit': 'INSERT INTO credit (user_id, total_limit, available_limit, updated_at) VALUES (?, ?, ?, ?)',
+        'income_profile': 'INSERT INTO income_profile (user_id, total_income, balance, updated_at) VALUES (?, ?, ?, ?)',
+        'transactions': '''INSERT INTO transactions (user_id, amount, currency, converted_amount, rate, wecoin_earned,
+                                                     spend_time)
+                           VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        'blind_box_draw': '''INSERT INTO blind_box_draw (user_id, draw_date, wecoin_cost, wecoin_returned, item)
+                             VALUES (?, ?, ?, ?, ?)''',
+        'user_reward': 'INSERT INTO user_reward (user_id, reward_id, obtained_date, is_used) VALUES (?, ?, ?, ?)',
+        'message': 'INSERT INTO message (user_id, text, type, is_read, created_at) VALUES (?, ?, ?, ?, ?)',
+    }
+
+    def _insert(self, cursor, table, rows):
+        rows = list(rows)
+        cursor.executemany(self.INSERT_SQL[table], rows)
+        return len(rows)
+
+    def _timestamps(self, rng, count):
+        """base_time 之前 days 天内的随机时间，格式与 sqlite3 默认的 datetime 适配器一致"""
+        offsets = rng.integers(0, self.days * 86400 * 10 ** 6, size=count)
+        stamps = np.datetime_as_string(self.base_time - offsets.astype('timedelta64[us]'), unit='us')
+        return np.char.replace(stamps, 'T', ' ').tolist()
+
+    def _chunk_rows(self, rng, user_ids, first_seq, reward_ids):
+        """
+        生成一块用户的所有行
+
+        Yields:
+            tuple: (表名, 行迭代器)
+        """
+        count = len(user_ids)
+        ids = user_ids.tolist()
+        created = self._timestamps(rng, count)
+
+        # 用户与卡号
+        prefixes = [permute_prefix(seq) for seq in range(first_seq, first_seq + count)]
+        suffixes = rng.integers(0, 10 ** 8, size=count).tolist()
+        card_numbers = [f'{p[:4]} {p[4:]} {s // 10000:04d} {s % 10000:04d}' for p, s in zip(prefixes, suffixes)]
+        return_days = np.datetime_as_string(
+            np.datetime64(self.base_time, 'D') + rng.integers(1, 120, size=count).astype('timedelta64[D]')
+        ).tolist()
+        wecoin = rng.integers(0, 500, size=count).tolist()
+
+        has_face = rng.random(count) < self.face_ratio
+        encodings = rng.normal(0.0, 0.1, size=(int(has_face.sum()), 128)).round(6)
+        face_json = [None] * count
+        face_time = [None] * count
+        face_path = [None] * count
+        for encoding, index in zip(encodings.tolist(), np.flatnonzero(has_face).tolist()):
+            face_json[index] = json.dumps(encoding)
+            face_time[index] = created[index]
+            face_path[index] = f'faces/user_{ids[index]}.jpg'
+
+        yield 'user', (
+            (uid, f'user{uid}', card, 'United Arab Emirates', 'Abu Dhabi', 'U', 'halifata.png',
+             f'+971-50-{uid % 10 ** 7:07d}', f'user{uid}@example.com', coins, 5, day, ts, enc, path, face_ts)
+            for uid, card, coins, day, ts, enc, path, face_ts
+            in zip(ids, card_numbers, wecoin, return_days, created, face_json, face_path, face_time)
+        )
+        yield 'card_prefix', zip(prefixes, range(first_seq, first_seq + count), ids, created)
+
+        # 收入画像与授信（额度与收入正相关）
+        income = rng.lognormal(np.log(60000), 0.8, size=count).round(2)
+        balance = (income * rng.uniform(0.02, 0.4, size=count)).round(2)
+        limits = np.clip((income * 0.8 + balance * 2) // 1000 * 1000, 5000, 500000)
+        yield 'income_profile', zip(ids, income.tolist(), balance.tolist(), created)
+
+        # 消费：笔数为帕累托重尾分布，金额为对数正态
+        scale = self.tx_mean * (self.tx_skew - 1) / self.tx_skew
+        tx_counts = np.minimum((rng.pareto(self.tx_skew, size=count) + 1) * scale, 2000).astype(int)
+        tx_users = np.repeat(user_ids, tx_counts)
+        tx_total = len(tx_users)
+        amounts = rng.lognormal(np.log(150), 1.0, size=tx_total).round(2)
+        currency_index = rng.choice(len(CURRENCIES), size=tx_total, p=[0.6, 0.2, 0.1, 0.1])
+        rates = np.array([rate for _, rate in CURRENCIES])[currency_index]
+        currencies = np.array([name for name, _ in CURRENCIES])[currency_index]
+        yield 'transactions', zip(
+            tx_users.tolist(), amounts.tolist(), currencies.tolist(), (amounts * rates).round(2).tolist(),
+            rates.tolist(), (amounts // 20).astype(int).tolist(), self._timestamps(rng, tx_total)
+        )
+
+        consumed = np.bincount(np.searchsorted(user_ids, tx_users), weights=amounts, minlength=count)
+        available = np.maximum(limits - consumed, 0).round(2)
+        yield 'credit', zip(ids, limits.tolist(), available.tolist(), created)
+
+        # 盲盒抽奖：约 40% 的抽奖获得奖品，写入奖品包
+        draw_counts = rng.poisson(self.draws_mean, size=count)
+        draw_users = np.repeat(user_ids, draw_counts)
+        draw_total = len(draw_users)
+        draw_dates = self._timestamps(rng, draw_total)
+        item_index = rng.integers(0, len(BLIND_BOX_ITEMS), size=draw_total)
+        returned = np.where(rng.random(draw_total) < 0.1, 200, 0)
+        yield 'blind_box_draw', zip(
+            draw_users.tolist(), draw_dates, [10] * draw_total, returned.tolist(),
+            [BLIND_BOX_ITEMS[i] for i in item_index.tolist()]
+        )
+
+        won = np.flatnonzero(rng.random(draw_total) < 0.4)
+        won_rewards = reward_ids[rng.integers(0, len(reward_ids), size=len(won))]
+        used = (rng.random(len(won)) < 0.3).astype(int)
+        yield 'user_reward', zip(
+            draw_users[won].tolist(), won_rewards.tolist(), [draw_dates[i] for i in won.tolist()], used.tolist()
+        )
+
+        # 消息
+        message_counts = rng.poisson(self.messages_mean, size=count)
+        message_users = np.repeat(user_ids, message_counts)
+        template_index = rng.integers(0, len(MESSAGE_TEMPLATES), size=len(message_users)).tolist()
+        yield 'message', zip(
+            message_users.tolist(),
+            [MESSAGE_TEMPLATES[i][0] for i in template_index],
+            [MESSAGE_TEMPLATES[i][1] for i in template_index],
+            (rng.random(len(message_users)) < 0.5).astype(int).tolist(),
+            self._timestamps(rng, len(message_users))
+        )
+
+    @staticmethod
+    def _print_progress(stats):
+        """默认进度输出"""
+        elapsed = stats['elapsed']
+        rate = stats['rows'] / elapsed if elapsed > 0 else 0.0
+        print(f"📊 {stats['users']}/{stats['total']} 用户，{stats['rows']} 行，{rate:,.0f} 行/秒")
+
+
+def main(argv=None):
+    """命令行入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='生成合成的 fintech 数据库')
+    parser.add_argument('--db', default='instance/fintech_synthetic.db', help='数据库路径')
+    parser.add_argument('--users', type=int, default=100000, help='用户数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--tx-mean', type=float, default=12.0, help='每个用户的平均消费笔数')
+    parser.add_argument('--tx-skew', type=float, default=1.6, help='消费笔数的帕累托形状参数（>1，越小越偏）')
+    parser.add_argument('--face-ratio', type=float, default=0.2, help='带人脸编码的用户比例')
+    parser.add_argument('--append', action='store_true', help='数据库已有用户时继续追加')
+    args = parser.parse_args(argv)
+
+    generator = SyntheticDataGenerator(db_path=args.db, seed=args.seed, tx_mean=args.tx_mean,
+                                       tx_skew=args.tx_skew, face_ratio=args.face_ratio)
+    result = generator.generate(args.users, append=args.append)
+    if result['success']:
+        for table, count in result['rows'].items():
+            print(f"   {table:<16} {count:>12,}")
+    print(('✅ ' if result['success'] else '❌ ') + result['message'])
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())